@@ -0,0 +1 @@
+"""Supporting stages for the automated blog generator"""
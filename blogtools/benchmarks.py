@@ -0,0 +1,309 @@
+"""
+Benchmarks for the generator's hot paths
+
+Run from the repository root:
+
+    python -m blogtools.benchmarks --output bench.json
+    python -m blogtools.benchmarks --baseline bench.json
+
+Covers per-template render throughput (one post at a time and in
+batches), end-to-end create_blog_post into a tmpfs directory, manifest
+lookups against large synthetic archives, topic scheduling over a
+50k-topic catalogue, near-duplicate lookups against
+100k signatures, front matter listings of 100k posts and publishing to a
+local bare repository. Results are JSON; with --baseline any metric that
+got worse by more than --threshold fails the run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+TOPIC = "Zero Trust Architecture Implementation"
+
+
+def _best_time(fn, number, repeat=5):
+    """Best wall time of ``repeat`` runs of ``number`` calls"""
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - began)
+    return best
+
+
+def _metric(name, value, unit, better):
+    return {"name": name, "value": value, "unit": unit, "better": better}
+
+
+def _scratch_root():
+    """A tmpfs directory when available so disk speed doesn't dominate"""
+    shm = Path("/dev/shm")
+    return str(shm) if shm.is_dir() and os.access(shm, os.W_OK) else None
+
+
+def bench_templates(generator, number=2000):
+    results = []
+    for method in ("generate_technical_guide", "generate_industry_analysis",
+                   "generate_best_practices", "generate_case_study"):
+        render = getattr(generator, method)
+        elapsed = _best_time(lambda: render(TOPIC), number)
+        results.append(_metric(f"render.{method}", number / elapsed, "posts/s", "higher"))
+    elapsed = _best_time(lambda: generator.generate_blog_content(TOPIC), number)
+    results.append(_metric("render.generate_blog_content", number / elapsed, "posts/s", "higher"))
+    topics = [TOPIC] * number
+    for name in generator.templates.names:
+        elapsed = _best_time(lambda: generator.templates.render_batch(name, topics, generator.author_bio, 0), 1)
+        results.append(_metric(f"render.batch.{name}", number / elapsed, "posts/s", "higher"))
+    return results
+
+
+def bench_create_post(generator, number=200):
+    with tempfile.TemporaryDirectory(dir=_scratch_root()) as tmp:
+        start = datetime(2000, 1, 1)
+        days = iter(range(10 ** 9))
+
+        def create():
+            generator.create_blog_post(start + timedelta(days=next(days)), posts_dir=tmp)
+
+        # create_blog_post reports each file it writes
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            elapsed = _best_time(create, number, repeat=3)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    return [_metric("create_blog_post", number / elapsed, "posts/s", "higher")]
+
+
+def _synthetic_manifest(path, posts_dir, size):
+    from blogtools.manifest import SCHEMA
+
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    start = datetime(2000, 1, 1)
+    per_day = max(1, size // 3650)
+    rows = ((f"post-{i}.md", (start + timedelta(days=i // per_day)).strftime("%Y-%m-%d"),
+             f"post-{i}", f"Topic {i % 5000}", f"template_{i % 4}", "0" * 64, 0, 0)
+            for i in range(size))
+    with db:
+        db.executemany("INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        db.execute("INSERT INTO meta VALUES ('posts_dir_mtime', ?)",
+                   (str(Path(posts_dir).stat().st_mtime_ns),))
+    db.close()
+
+
+def bench_manifest(sizes, number=2000):
+    from blogtools.manifest import PostManifest
+
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(dir=_scratch_root()) as tmp:
+            posts_dir = Path(tmp) / "_posts"
+            posts_dir.mkdir()
+            db_path = Path(tmp) / "manifest.sqlite3"
+            _synthetic_manifest(db_path, posts_dir, size)
+            with PostManifest(posts_dir, db_path) as manifest:
+                checks = {
+                    "refresh": manifest.refresh,
+                    "post_for_date": lambda: manifest.post_for_date("2004-06-01"),
+                    "topic_last_used": lambda: manifest.topic_last_used("Topic 1234"),
+                }
+                for name, check in checks.items():
+                    elapsed = _best_time(check, number)
+                    results.append(_metric(f"manifest.{name}@{size}", elapsed / number * 1e6, "us", "lower"))
+    return results
+
+
+def bench_scheduler(sizes=(20, 50_000), number=20_000):
+    import random
+    from blogtools.scheduler import TopicScheduler
+
+    results = []
+    templates = ["technical_guide", "industry_analysis", "best_practices", "case_study"]
+    for size in sizes:
+        topics = [f"Topic variant {i}" for i in range(size)]
+        scheduler = TopicScheduler(topics, templates, cooldown_days=max(1, size // 20))
+        rng = random.Random(0)
+        days = iter(range(10 ** 9))
+
+        def pick():
+            when = datetime(2000, 1, 1) + timedelta(days=next(days) // 10)
+            topic, template = scheduler.pick(when, rng)
+            scheduler.record(topic, template, when)
+
+        elapsed = _best_time(pick, number, repeat=3)
+        results.append(_metric(f"scheduler.pick@{size}", elapsed / number * 1e6, "us", "lower"))
+        with tempfile.TemporaryDirectory(dir=_scratch_root()) as tmp:
+            state = Path(tmp) / "scheduler_state.json"
+            scheduler.save(state)
+            elapsed = _best_time(lambda: TopicScheduler.load(topics, templates, state), 1, repeat=3)
+        results.append(_metric(f"scheduler.load@{size}", elapsed * 1e3, "ms", "lower"))
+    return results
+
+
+def bench_dedup(generator, sizes=(100_000,), number=200):
+    import numpy as np
+    from blogtools.dedup import NUM_PERM, DuplicateIndex, signature
+
+    _, text = generator.render_post(generator.plan_post(datetime(2000, 1, 1)))
+    sig = signature(text)
+    results = [_metric("dedup.signature", _best_time(lambda: signature(text), number) / number * 1e3,
+                       "ms", "lower")]
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        with tempfile.TemporaryDirectory(dir=_scratch_root()) as tmp:
+            index = DuplicateIndex(Path(tmp) / "minhash")
+            signatures = rng.integers(0, 2 ** 31 - 1, (size, NUM_PERM), dtype=np.uint32)
+            index.add_many((f"post-{i}.md", "0" * 64, row) for i, row in enumerate(signatures))
+            elapsed = _best_time(lambda: index.nearest(sig), number)
+            results.append(_metric(f"dedup.nearest@{size}", elapsed / number * 1e3, "ms", "lower"))
+    return results
+
+
+def bench_frontmatter(generator, sizes=(100_000,)):
+    from blogtools.frontmatter import FrontMatterReader
+    from blogtools.manifest import PostManifest
+
+    results = []
+    filename, text = generator.render_post(generator.plan_post(datetime(2000, 1, 1)))
+    slug = filename[len("2000-01-01-"):]
+    for size in sizes:
+        with tempfile.TemporaryDirectory(dir=_scratch_root()) as tmp:
+            posts_dir = Path(tmp) / "_posts"
+            posts_dir.mkdir()
+            start = datetime(1800, 1, 1)
+            for i in range(size):
+                day = start + timedelta(days=i)
+                (posts_dir / f"{day:%Y-%m-%d}-{slug}").write_text(text.replace("2000-01-01", f"{day:%Y-%m-%d}", 1))
+            cache = Path(tmp) / "front_matter.pickle"
+            with PostManifest(posts_dir, Path(tmp) / "manifest.sqlite3") as manifest:
+                manifest.refresh()
+
+                def listing():
+                    with FrontMatterReader(cache) as reader:
+                        for _ in reader.iter_posts(posts_dir, manifest):
+                            pass
+
+                results.append(_metric(f"frontmatter.cold@{size}", _best_time(listing, 1, repeat=1), "s", "lower"))
+                results.append(_metric(f"frontmatter.warm@{size}", _best_time(listing, 1, repeat=3), "s", "lower"))
+    return results
+
+
+def bench_publish(batch_sizes=(1, 100, 1000)):
+    from blogtools.publish import GitPublisher
+
+    results = []
+    env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@localhost",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@localhost")
+    with tempfile.TemporaryDirectory(dir=_scratch_root()) as tmp:
+        remote = Path(tmp) / "remote.git"
+        work = Path(tmp) / "work"
+        git = lambda *args, cwd=tmp: subprocess.run(["git", *args], cwd=cwd, env=env, check=True,
+                                                    capture_output=True)
+        git("init", "-q", "--bare", str(remote))
+        git("init", "-q", "-b", "main", str(work))
+        git("commit", "-q", "--allow-empty", "-m", "init", cwd=work)
+        git("remote", "add", "origin", str(remote), cwd=work)
+        git("push", "-q", "origin", "main", cwd=work)
+
+        posts_dir = work / "_posts"
+        posts_dir.mkdir()
+        publisher = GitPublisher(work)
+        counter = 0
+        for batch in batch_sizes:
+            for _ in range(batch):
+                path = posts_dir / f"2000-01-01-post-{counter}.md"
+                path.write_text(f"---\ntitle: Post {counter}\n---\n\nBody {counter}\n")
+                publisher.add(path)
+                counter += 1
+            began = time.perf_counter()
+            publisher.publish()
+            elapsed = time.perf_counter() - began
+            results.append(_metric(f"publish.batch@{batch}", elapsed, "s", "lower"))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return human-readable lines for metrics that regressed past ``threshold``"""
+    previous = {m["name"]: m for m in baseline["metrics"]}
+    regressions = []
+    for metric in results["metrics"]:
+        old = previous.get(metric["name"])
+        if not old or not old["value"]:
+            continue
+        change = (metric["value"] - old["value"]) / old["value"]
+        worse = -change if metric["better"] == "higher" else change
+        if worse > threshold:
+            regressions.append(f"{metric['name']}: {old['value']:.4g} -> {metric['value']:.4g} "
+                               f"{metric['unit']} ({worse:.0%} worse)")
+    return regressions
+
+
+def run(stages, manifest_sizes):
+    from generate_content import CybersecurityBlogGenerator
+
+    # No news: a benchmark must not depend on the network or write a feed cache
+    generator = CybersecurityBlogGenerator(news_feeds=[])
+    metrics = []
+    if "templates" in stages:
+        metrics += bench_templates(generator)
+    if "create" in stages:
+        metrics += bench_create_post(generator)
+    if "manifest" in stages:
+        metrics += bench_manifest(manifest_sizes)
+    if "scheduler" in stages:
+        metrics += bench_scheduler()
+    if "dedup" in stages:
+        metrics += bench_dedup(generator)
+    if "frontmatter" in stages:
+        metrics += bench_frontmatter(generator)
+    if "publish" in stages:
+        metrics += bench_publish()
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": metrics,
+    }
+
+
+def main(argv=None):
+    stages = ["templates", "create", "manifest", "scheduler", "dedup", "frontmatter", "publish"]
+    parser = argparse.ArgumentParser(description="Benchmark the blog generator")
+    parser.add_argument("--stages", nargs="+", choices=stages, default=stages)
+    parser.add_argument("--manifest-sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--output", type=Path, help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="compare against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="fractional slowdown tolerated before failing (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    results = run(args.stages, args.manifest_sizes)
+    report = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Change detection between builds
+
+Each build stage (site, search, related) records the commit it last
+built from in .blog/stages.json. On the next run ``git diff`` from that
+commit to HEAD, plus ``git status`` for uncommitted and untracked files,
+names exactly the files that changed under the stage's paths. A run with
+nothing to do then costs two git calls instead of a stat and, after a
+fresh checkout, a hash of every post: a clean checkout gives every file
+a new mtime, so the manifest alone can't tell what really changed.
+
+Inputs git doesn't track (such as the generated _data/related_posts.json)
+are listed as ``hashed`` files and compared by content hash instead.
+
+A stage with no record, a recorded commit git no longer knows (e.g. a
+shallow clone) or no git at all gets None from changes(), meaning
+"unknown": it falls back to a full scan.
+
+    python -m blogtools.changes [STAGE] [--path PATH]...
+"""
+
+import argparse
+import json
+import os
+import subprocess
+from pathlib import Path
+
+from blogtools.manifest import content_hash
+
+DEFAULT_PATH = Path(".blog") / "stages.json"
+
+
+class ChangeSet:
+    """Paths added or modified and paths deleted, relative to the repository root"""
+
+    def __init__(self, changed=(), deleted=(), root="."):
+        self.changed = set(changed)
+        self.deleted = set(deleted) - self.changed
+        self.root = root
+
+    def __bool__(self):
+        return bool(self.changed or self.deleted)
+
+    def __repr__(self):
+        return f"ChangeSet(changed={sorted(self.changed)}, deleted={sorted(self.deleted)})"
+
+    def under(self, directory):
+        """(changed, deleted) filenames directly inside ``directory``
+
+        ``directory`` is a path as seen from the working directory, like the
+        repository ``root`` the ChangeSet was made for.
+        """
+        prefix = Path(os.path.relpath(directory, self.root)).as_posix() + "/"
+
+        def names(paths):
+            return {path[len(prefix):] for path in paths
+                    if path.startswith(prefix) and "/" not in path[len(prefix):]}
+
+        return names(self.changed), names(self.deleted)
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", *args], cwd=repo, capture_output=True, check=True).stdout
+
+
+def head(repo="."):
+    """Commit checked out in ``repo``, or None outside a git repository"""
+    try:
+        return _git(repo, "rev-parse", "--verify", "-q", "HEAD").decode().strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _pending(repo, pathspecs):
+    """Uncommitted changes as (changed, deleted) sets of paths"""
+    out = _git(repo, "status", "--porcelain", "--no-renames", "--untracked-files=all", "-z", *pathspecs)
+    changed, deleted = set(), set()
+    for entry in out.decode("utf-8", "surrogateescape").split("\0"):
+        if entry:
+            status, path = entry[:2], entry[3:]
+            (deleted if "D" in status else changed).add(path)
+    return changed, deleted
+
+
+def git_changes(since, paths, repo="."):
+    """ChangeSet of files under ``paths`` changed since commit ``since``
+
+    Covers commits since ``since`` as well as uncommitted and untracked
+    files. Returns None when git can't answer.
+    """
+    pathspecs = ["--", *(os.fspath(path) for path in paths)]
+    try:
+        committed = _git(repo, "diff", "--name-status", "--no-renames", "-z", since, "HEAD", *pathspecs)
+        pending_changed, pending_deleted = _pending(repo, pathspecs)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    changed, deleted = set(), set()
+    fields = committed.decode("utf-8", "surrogateescape").split("\0")
+    for status, path in zip(fields[0::2], fields[1::2]):
+        (deleted if status == "D" else changed).add(path)
+    changed = (changed - pending_deleted) | pending_changed
+    deleted = (deleted - pending_changed) | pending_deleted
+    return ChangeSet(changed, deleted, repo)
+
+
+def _file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return content_hash(f.read())
+    except FileNotFoundError:
+        return None
+
+
+class StageState:
+    """What each build stage was last built from"""
+
+    def __init__(self, repo=".", path=DEFAULT_PATH):
+        self.repo = Path(repo)
+        self.path = Path(path)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._stages = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._stages = {}
+
+    def changes(self, stage, paths, hashed=()):
+        """ChangeSet of ``stage``'s inputs since it was last built, or None if unknown
+
+        ``paths`` are git pathspecs relative to the repository;
+        ``hashed`` files are compared by content instead of through git.
+        """
+        record = self._stages.get(stage)
+        if not record or not record.get("commit"):
+            return None
+        found = git_changes(record["commit"], paths, self.repo)
+        if found is None:
+            return None
+        # Files that were uncommitted at the last build may since have been
+        # reverted or removed without git seeing any change from the commit
+        found.changed.update(path for path in record.get("pending", ()) if path not in found.deleted)
+        hashes = record.get("hashes", {})
+        for path in hashed:
+            key = Path(path).as_posix()
+            if key not in hashes:
+                return None
+            digest = _file_hash(self.repo / path)
+            if digest != hashes[key]:
+                (found.changed if digest else found.deleted).add(key)
+        return found
+
+    def mark_built(self, stage, paths, hashed=()):
+        """Record that ``stage`` is now built from the working tree and the current ``hashed`` files"""
+        try:
+            changed, deleted = _pending(self.repo, ["--", *(os.fspath(path) for path in paths)])
+        except (OSError, subprocess.CalledProcessError):
+            changed, deleted = set(), set()
+        self._stages[stage] = {
+            "commit": head(self.repo),
+            "pending": sorted(changed | deleted),
+            "hashes": {Path(path).as_posix(): _file_hash(self.repo / path) for path in hashed},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._stages, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show what changed since build stages last ran")
+    parser.add_argument("stages", nargs="*", help="stages to show (default: all recorded)")
+    parser.add_argument("--path", dest="paths", action="append", default=None,
+                        help="pathspec to limit the changes to (default: the whole repository)")
+    args = parser.parse_args(argv)
+
+    state = StageState()
+    for stage in args.stages or sorted(state._stages):
+        found = state.changes(stage, args.paths or ["."])
+        if found is None:
+            print(f"{stage}: unknown, the next run does a full scan")
+            continue
+        commit = (state._stages[stage]["commit"] or "")[:12]
+        print(f"{stage}: {len(found.changed)} changed, {len(found.deleted)} deleted since {commit}")
+        for path in sorted(found.changed):
+            print(f"  M {path}")
+        for path in sorted(found.deleted):
+            print(f"  D {path}")
+
+
+if __name__ == "__main__":
+    main()
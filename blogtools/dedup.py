@@ -0,0 +1,257 @@
+"""
+Near-duplicate detection for posts
+
+Each post body is cut into overlapping five-word shingles and reduced to
+a 128-value MinHash signature. The fraction of matching values between
+two signatures estimates the Jaccard similarity of their shingle sets.
+Signatures are split into 8 bands of 16 values and each band is hashed,
+so only posts sharing at least one band hash are compared in full. A
+query reads one small band matrix and a handful of signature rows, which
+keeps lookups in the millisecond range at 100k+ posts.
+
+The index is append-only and lives under .blog/minhash. Signatures and
+band hashes sit in raw arrays that are memory-mapped. ``index.tsv`` maps
+each row to a post filename and the sha256 it was computed from. A row
+only counts once its line is in ``index.tsv``, so a crashed write leaves
+a short tail that is trimmed on the next open.
+
+Generated posts share most of their text with other posts from the same
+template: two posts on different topics typically measure 0.75-0.95.
+The default threshold of 0.95 therefore targets the same topic rendered
+through the same template again.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import zlib
+from pathlib import Path
+
+from blogtools.deps import optional_import
+
+np = optional_import("numpy", "core")
+
+DEFAULT_DIR = Path(".blog") / "minhash"
+DEFAULT_THRESHOLD = 0.95
+
+NUM_PERM = 128
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_PRIME = (1 << 31) - 1
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _coefficients(name):
+    values = [int.from_bytes(hashlib.sha256(f"minhash-{name}-{i}".encode()).digest()[:8], "big")
+              for i in range(NUM_PERM)]
+    return np.array([v % (_PRIME - 1) + 1 for v in values], dtype=np.uint64)
+
+
+# Fixed permutations so signatures stay comparable across runs and machines
+_A = _coefficients("a")[:, None]
+_B = _coefficients("b")[:, None]
+
+
+class DuplicatePostError(Exception):
+    """Raised when no candidate post clears the similarity threshold"""
+
+
+def _body(text):
+    """Text after the front matter, which differs between otherwise equal posts"""
+    if text.startswith("---"):
+        end = text.find("\n---", 3)
+        if end != -1:
+            return text[end + 4:]
+    return text
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """Distinct hashes of the ``size``-word shingles in a post body"""
+    words = _WORD_RE.findall(_body(text).lower())
+    codes = np.fromiter((zlib.crc32(w.encode()) for w in words), np.uint64, len(words))
+    count = max(1, len(codes) - size + 1)
+    hashes = np.zeros(count, np.uint64)
+    for k in range(min(size, len(codes))):
+        hashes = hashes * _MIX + codes[k:k + count]
+    return np.unique(hashes % np.uint64(_PRIME))
+
+
+def signature(text):
+    """MinHash signature of a post: NUM_PERM uint32 values"""
+    shingles = shingle_hashes(text)[None, :]
+    return ((_A * shingles + _B) % np.uint64(_PRIME)).min(axis=1).astype(np.uint32)
+
+
+def band_hashes(signatures):
+    """Hash each band of one signature or a stack of them"""
+    bands = signatures.astype(np.uint64).reshape(*signatures.shape[:-1], BANDS, ROWS)
+    hashes = np.zeros(bands.shape[:-1], np.uint64)
+    for k in range(ROWS):
+        hashes = hashes * _MIX + bands[..., k]
+    return hashes
+
+
+class DuplicateIndex:
+    """Persistent LSH index of post signatures"""
+
+    def __init__(self, path=DEFAULT_DIR, threshold=DEFAULT_THRESHOLD):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self._signature_file = self.path / "signatures.u32"
+        self._band_file = self.path / "bands.u64"
+        self._index_file = self.path / "index.tsv"
+        self._paths = []
+        self._shas = []
+        self._rows = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._index_file, encoding="utf-8") as f:
+                lines = f.read().split("\n")[:-1]
+        except FileNotFoundError:
+            lines = []
+        sizes = [f.stat().st_size if f.exists() else 0 for f in (self._signature_file, self._band_file)]
+        rows = min(len(lines), sizes[0] // (NUM_PERM * 4), sizes[1] // (BANDS * 8))
+        # Trim whatever an interrupted append left behind
+        if len(lines) > rows:
+            self._rewrite_index(lines[:rows])
+        for f, width in ((self._signature_file, NUM_PERM * 4), (self._band_file, BANDS * 8)):
+            if f.exists() and f.stat().st_size != rows * width:
+                os.truncate(f, rows * width)
+        for row, line in enumerate(lines[:rows]):
+            name, sha = line.split("\t")
+            self._paths.append(name)
+            self._shas.append(sha)
+            self._rows[name] = row
+        self._map()
+
+    def _rewrite_index(self, lines):
+        tmp = self._index_file.with_name(f".{self._index_file.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{line}\n" for line in lines)
+        os.replace(tmp, self._index_file)
+
+    def _map(self):
+        rows = len(self._paths)
+        if rows:
+            self._signatures = np.memmap(self._signature_file, np.uint32, "r", shape=(rows, NUM_PERM))
+            self._bands = np.memmap(self._band_file, np.uint64, "r", shape=(rows, BANDS))
+        else:
+            self._signatures = np.empty((0, NUM_PERM), np.uint32)
+            self._bands = np.empty((0, BANDS), np.uint64)
+
+    def __len__(self):
+        return sum(1 for name, row in self._rows.items() if self._shas[row])
+
+    def digest(self, name):
+        """sha256 the indexed signature of ``name`` was computed from, or None"""
+        row = self._rows.get(name)
+        if row is None:
+            return None
+        return self._shas[row] or None
+
+    def add_many(self, items):
+        """Append (filename, sha256, signature) entries; an empty sha256 removes a post"""
+        items = list(items)
+        if not items:
+            return
+        signatures = np.stack([sig for _, _, sig in items]).astype(np.uint32)
+        # Data first, index lines last: a row exists once its line does
+        with open(self._signature_file, "ab") as f:
+            f.write(signatures.tobytes())
+        with open(self._band_file, "ab") as f:
+            f.write(band_hashes(signatures).tobytes())
+        with open(self._index_file, "a", encoding="utf-8") as f:
+            for name, sha, _ in items:
+                self._rows[name] = len(self._paths)
+                self._paths.append(name)
+                self._shas.append(sha)
+                f.write(f"{name}\t{sha}\n")
+        self._map()
+
+    def add(self, name, sha, sig):
+        self.add_many([(name, sha, sig)])
+
+    def sync(self, manifest, posts_dir):
+        """Index posts the manifest knows about that are new or changed
+
+        Returns the number of posts added, updated or removed.
+        """
+        hashes = manifest.hashes()
+        posts_dir = Path(posts_dir)
+        items = [(name, sha, signature((posts_dir / name).read_text(encoding="utf-8")))
+                 for name, sha in hashes.items() if self.digest(name) != sha]
+        items += [(name, "", np.zeros(NUM_PERM, np.uint32))
+                  for name, row in self._rows.items() if self._shas[row] and name not in hashes]
+        self.add_many(items)
+        if len(self._paths) > 2 * max(1000, len(self)):
+            self.compact()
+        return len(items)
+
+    def compact(self):
+        """Rewrite the index without replaced or removed rows"""
+        live = sorted(row for row in self._rows.values() if self._shas[row])
+        entries = [(self._paths[row], self._shas[row], np.array(self._signatures[row])) for row in live]
+        for f in (self._signature_file, self._band_file, self._index_file):
+            f.unlink(missing_ok=True)
+        self._paths, self._shas, self._rows = [], [], {}
+        self._map()
+        self.add_many(entries)
+
+    def nearest(self, sig, exclude=None):
+        """Return (filename, estimated similarity) of the closest indexed post, or None"""
+        if not self._paths:
+            return None
+        candidates = np.flatnonzero((self._bands == band_hashes(sig)).any(axis=1))
+        if not candidates.size:
+            return None
+        similarity = (self._signatures[candidates] == sig).mean(axis=1)
+        for i in np.argsort(similarity)[::-1]:
+            row = int(candidates[i])
+            name = self._paths[row]
+            if self._rows[name] == row and self._shas[row] and name != exclude:
+                return name, float(similarity[i])
+        return None
+
+    def find_duplicate(self, sig, exclude=None):
+        """Closest post at or above the threshold as (filename, similarity), or None"""
+        match = self.nearest(sig, exclude)
+        return match if match and match[1] >= self.threshold else None
+
+
+def main(argv=None):
+    from blogtools.manifest import PostManifest
+
+    parser = argparse.ArgumentParser(
+        description="Check posts for near-duplicates of the existing archive")
+    parser.add_argument("files", nargs="*", type=Path,
+                        help="posts to check (default: only bring the index up to date)")
+    parser.add_argument("--posts-dir", type=Path, default=Path("_posts"))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"similarity that counts as a duplicate (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    with PostManifest(args.posts_dir) as manifest:
+        manifest.refresh()
+        index = DuplicateIndex(threshold=args.threshold)
+        changed = index.sync(manifest, args.posts_dir)
+    print(f"Indexed {len(index)} posts ({changed} updated)")
+
+    duplicates = 0
+    for path in args.files:
+        match = index.find_duplicate(signature(path.read_text(encoding="utf-8")), exclude=path.name)
+        if match:
+            duplicates += 1
+            print(f"{path}: {match[1]:.0%} similar to {match[0]}")
+    sys.exit(1 if duplicates else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""
+Optional dependency loading
+
+Heavy third-party packages are grouped into requirements-<group>.txt
+files and imported only by the stage that needs them, so the daily
+generate path runs on the core install alone.
+"""
+
+import importlib
+
+
+def optional_import(module, group):
+    """Import ``module`` or fail with a hint naming the requirements group"""
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError(
+            f"'{module}' is required for this command; install it with "
+            f"pip install -r requirements-{group}.txt") from e
@@ -0,0 +1,279 @@
+"""
+Semantic embeddings of posts
+
+Checks how topically new a post is compared with the archive. Posts are
+embedded with a sentence-transformers model on the CPU, in batches, and
+the normalized vectors are appended as float16 rows to
+.blog/embeddings/vectors.f16. ``index.tsv`` maps each row to a post
+filename and the sha256 it was computed from, the same way the MinHash
+index in dedup.py does: a row only counts once its line is written, a
+changed post gets a new row, and dead rows are compacted away once they
+outnumber live ones. The model name and vector width are kept in
+``model.json``; switching models starts a fresh store.
+
+The vectors are memory-mapped and scanned SCAN_ROWS at a time, so
+checking a post costs one embedding plus a dot product per block and
+memory stays flat however large the archive gets. Only posts that are
+new or changed since the last sync are ever encoded.
+
+The model (and with it torch) is loaded on first use, so commands that
+don't encode anything never import it.
+
+    python -m blogtools.embeddings sync
+    python -m blogtools.embeddings check FILE... [--min-novelty 0.1]
+    python -m blogtools.embeddings info
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from blogtools import metrics
+from blogtools.deps import optional_import
+from blogtools.frontmatter import split_front_matter
+
+np = optional_import("numpy", "core")
+
+DEFAULT_DIR = Path(".blog") / "embeddings"
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_MIN_NOVELTY = 0.1
+BATCH_SIZE = 64
+# Posts read and encoded per sync step, bounding the texts held in memory
+SYNC_BATCH = BATCH_SIZE * 16
+SCAN_ROWS = 16384
+
+
+def post_text(text):
+    """Title and body of a post, the part worth embedding"""
+    front, body = split_front_matter(text)
+    title = str((front or {}).get("title") or "")
+    return f"{title}\n\n{body}" if title else body
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped store of post embeddings"""
+
+    def __init__(self, path=DEFAULT_DIR, model_name=DEFAULT_MODEL):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self._vector_file = self.path / "vectors.f16"
+        self._index_file = self.path / "index.tsv"
+        self._model_file = self.path / "model.json"
+        self._model = None
+        self.dim = None
+        try:
+            with open(self._model_file, encoding="utf-8") as f:
+                info = json.load(f)
+        except FileNotFoundError:
+            info = None
+        if info is not None and info["model"] == model_name:
+            self.dim = info["dim"]
+        else:
+            for f in (self._vector_file, self._index_file, self._model_file):
+                f.unlink(missing_ok=True)
+        self._paths = []
+        self._shas = []
+        self._rows = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._index_file, encoding="utf-8") as f:
+                lines = f.read().split("\n")[:-1]
+        except FileNotFoundError:
+            lines = []
+        width = (self.dim or 0) * 2
+        size = self._vector_file.stat().st_size if self._vector_file.exists() else 0
+        rows = min(len(lines), size // width) if width else 0
+        # Trim whatever an interrupted append left behind
+        if len(lines) > rows:
+            tmp = self._index_file.with_name(f".{self._index_file.name}.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(f"{line}\n" for line in lines[:rows])
+            os.replace(tmp, self._index_file)
+        if size != rows * width:
+            os.truncate(self._vector_file, rows * width)
+        for row, line in enumerate(lines[:rows]):
+            name, sha = line.split("\t")
+            self._paths.append(name)
+            self._shas.append(sha)
+            self._rows[name] = row
+        self._map()
+
+    def _map(self):
+        rows = len(self._paths)
+        if rows:
+            self._vectors = np.memmap(self._vector_file, np.float16, "r", shape=(rows, self.dim))
+        else:
+            self._vectors = np.empty((0, self.dim or 0), np.float16)
+        # Latest row of each post still in the archive
+        self._live = np.zeros(rows, bool)
+        self._live[[row for row in self._rows.values() if self._shas[row]]] = True
+
+    def __len__(self):
+        return int(self._live.sum())
+
+    @property
+    def dead_rows(self):
+        return len(self._paths) - len(self)
+
+    def digest(self, name):
+        """sha256 the stored embedding of ``name`` was computed from, or None"""
+        row = self._rows.get(name)
+        if row is None:
+            return None
+        return self._shas[row] or None
+
+    @property
+    def model(self):
+        if self._model is None:
+            sentence_transformers = optional_import("sentence_transformers", "ml")
+            with metrics.phase("embeddings.load_model"):
+                self._model = sentence_transformers.SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def encode(self, texts):
+        """Normalized float16 embeddings of ``texts``, one row each"""
+        with metrics.phase("embeddings.encode"):
+            vectors = self.model.encode(list(texts), batch_size=BATCH_SIZE, convert_to_numpy=True,
+                                        normalize_embeddings=True, show_progress_bar=False)
+        metrics.count("posts_embedded", len(vectors))
+        return np.asarray(vectors, np.float16).reshape(len(vectors), -1)
+
+    def add_many(self, items):
+        """Append (filename, sha256, vector) entries; an empty sha256 removes a post"""
+        items = list(items)
+        if not items:
+            return
+        vectors = np.stack([vector for _, _, vector in items]).astype(np.float16)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self._model_file, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "dim": self.dim}, f)
+        # Data first, index lines last: a row exists once its line does
+        with open(self._vector_file, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self._index_file, "a", encoding="utf-8") as f:
+            for name, sha, _ in items:
+                self._rows[name] = len(self._paths)
+                self._paths.append(name)
+                self._shas.append(sha)
+                f.write(f"{name}\t{sha}\n")
+        self._map()
+
+    def sync(self, manifest, posts_dir):
+        """Embed posts the manifest knows about that are new or changed
+
+        Returns the number of posts added, updated or removed.
+        """
+        hashes = manifest.hashes()
+        posts_dir = Path(posts_dir)
+        todo = [(name, sha) for name, sha in hashes.items() if self.digest(name) != sha]
+        for i in range(0, len(todo), SYNC_BATCH):
+            batch = todo[i:i + SYNC_BATCH]
+            texts = [post_text((posts_dir / name).read_text(encoding="utf-8")) for name, _ in batch]
+            self.add_many((name, sha, vector) for (name, sha), vector in zip(batch, self.encode(texts)))
+        removed = [name for name, row in self._rows.items() if self._shas[row] and name not in hashes]
+        if removed:
+            self.add_many((name, "", np.zeros(self.dim, np.float16)) for name in removed)
+        if self.dead_rows > max(1000, len(self)):
+            self.compact()
+        return len(todo) + len(removed)
+
+    def compact(self):
+        """Rewrite the store without replaced or removed rows"""
+        live = np.flatnonzero(self._live)
+        tmp = self._vector_file.with_name(f".{self._vector_file.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            for start in range(0, len(live), SCAN_ROWS):
+                f.write(np.asarray(self._vectors[live[start:start + SCAN_ROWS]]).tobytes())
+        lines = [f"{self._paths[row]}\t{self._shas[row]}\n" for row in live]
+        self._vectors = None
+        # Old index lines would name the wrong rows of the new file; a crash
+        # before the new index is in place leaves an empty store to resync
+        self._index_file.unlink()
+        os.replace(tmp, self._vector_file)
+        tmp = self._index_file.with_name(f".{self._index_file.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(tmp, self._index_file)
+        self._paths, self._shas, self._rows = [], [], {}
+        self._load()
+
+    def nearest(self, vector, k=1, exclude=None):
+        """The ``k`` most similar posts to ``vector`` as (filename, cosine similarity), best first"""
+        query = np.asarray(vector, np.float32).ravel()
+        best_scores = np.empty(0, np.float32)
+        best_rows = np.empty(0, np.int64)
+        excluded = self._rows.get(exclude, -1)
+        for start in range(0, len(self._paths), SCAN_ROWS):
+            block = np.asarray(self._vectors[start:start + SCAN_ROWS], np.float32)
+            scores = block @ query
+            scores[~self._live[start:start + len(scores)]] = -np.inf
+            if start <= excluded < start + len(scores):
+                scores[excluded - start] = -np.inf
+            top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if len(best_scores) > k:
+                keep = np.argpartition(best_scores, -k)[-k:]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+        order = np.argsort(best_scores)[::-1]
+        return [(self._paths[best_rows[i]], float(best_scores[i])) for i in order
+                if np.isfinite(best_scores[i])]
+
+    def novelty(self, text, exclude=None):
+        """1 - similarity to the closest post, with the closest filename (None if empty)"""
+        match = self.nearest(self.encode([post_text(text)])[0], 1, exclude)
+        if not match:
+            return 1.0, None
+        name, similarity = match[0]
+        return 1.0 - similarity, name
+
+
+def main(argv=None):
+    from blogtools.manifest import PostManifest
+
+    parser = argparse.ArgumentParser(description="Check how topically new posts are against the archive")
+    parser.add_argument("--posts-dir", type=Path, default=Path("_posts"))
+    parser.add_argument("--model", default=DEFAULT_MODEL,
+                        help=f"sentence-transformers model (default: {DEFAULT_MODEL})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("sync", help="embed new and changed posts")
+    check = commands.add_parser("check", help="report the novelty of posts; exits 1 if any is too low")
+    check.add_argument("files", nargs="+", type=Path)
+    check.add_argument("--min-novelty", type=float, default=DEFAULT_MIN_NOVELTY,
+                       help=f"lowest acceptable 1 - cosine similarity (default: {DEFAULT_MIN_NOVELTY})")
+    commands.add_parser("info", help="describe the store without loading the model")
+    args = parser.parse_args(argv)
+
+    store = EmbeddingStore(model_name=args.model)
+    if args.command == "info":
+        print(f"{len(store)} posts embedded with {store.model_name} "
+              f"({store.dim or '?'} dimensions, {store.dead_rows} dead rows)")
+        return
+
+    with PostManifest(args.posts_dir) as manifest:
+        manifest.refresh()
+        changed = store.sync(manifest, args.posts_dir)
+    print(f"Embedded {len(store)} posts ({changed} updated)")
+    if args.command == "sync":
+        return
+
+    stale = 0
+    for path in args.files:
+        novelty, closest = store.novelty(path.read_text(encoding="utf-8"), exclude=path.name)
+        if closest is None:
+            print(f"{path}: nothing to compare against")
+            continue
+        low = novelty < args.min_novelty
+        stale += low
+        print(f"{path}: novelty {novelty:.2f}, closest is {closest}{' (too close)' if low else ''}")
+    sys.exit(1 if stale else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Front matter reading
+
+Archive-wide tools usually need only post metadata, so this module
+reads just the leading ``---`` block of each file: one 4 KiB read
+covers a generated post, and larger blocks are read in more chunks
+until the closing line. The body is never read.
+
+Generated posts always have the same simple shape: ``key: value`` lines
+with quoted strings, plain words and ``[a, b]`` lists. Such a block is
+parsed by a small hand-written parser. Anything it isn't sure would
+load the same way under YAML (numbers, booleans, dates, nesting,
+escapes, comments) goes to ``yaml`` instead, so both paths give
+identical results.
+
+FrontMatterReader caches parsed blocks in .blog/front_matter.pickle,
+keyed by path, mtime and size. The whole cache is one pickled dict, so a
+warm listing costs a single load plus one stat per post.
+
+    python -m blogtools.frontmatter [--posts-dir _posts] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from blogtools.deps import optional_import
+
+# pickle is imported where used: the manifest imports this module on the cron path
+DEFAULT_CACHE = Path(".blog") / "front_matter.pickle"
+CHUNK_SIZE = 4096
+
+_LINE_RE = re.compile(r"([A-Za-z_][\w-]*):[ \t]+(.*?)[ \t]*")
+# Plain scalars YAML is sure to load as the same string
+_PLAIN_RE = re.compile(r"[A-Za-z][^\[\]{},:#\"'\\]*")
+_WORD_RE = re.compile(r"[A-Za-z0-9][\w./+-]*")
+_DATE_STRING_RE = re.compile(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d [+-]\d{4}")
+_YAML_WORDS = {"yes", "no", "on", "off", "true", "false", "null"}
+_YAML_NUMBER_RE = re.compile(r"[-+]?(\.?\d[\d_.:eE+-]*|\.inf|\.nan|0x[\da-fA-F_]+|0o?[0-7_]+|0b[01_]+)",
+                             re.IGNORECASE)
+
+_FALLBACK = object()
+
+
+def _scalar(value, in_list=False):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        inner = value[1:-1]
+        return _FALLBACK if '"' in inner or "\\" in inner else inner
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        inner = value[1:-1]
+        return _FALLBACK if "'" in inner else inner
+    if in_list:
+        # Words like tags; anything YAML would resolve to another type falls back
+        if _WORD_RE.fullmatch(value) and not _YAML_NUMBER_RE.fullmatch(value) \
+                and value.lower() not in _YAML_WORDS:
+            return value
+        return _FALLBACK
+    if _PLAIN_RE.fullmatch(value) and value.lower() not in _YAML_WORDS:
+        return value
+    # The generator's '2025-09-13 10:00:00 +0000' is not a YAML timestamp
+    if _DATE_STRING_RE.fullmatch(value):
+        return value
+    return _FALLBACK
+
+
+def _fast_parse(block):
+    """Parse the generator's front matter shape, or return None if unsure"""
+    if "\r" in block:
+        return None
+    front = {}
+    for line in block.split("\n"):
+        if not line.strip():
+            continue
+        match = _LINE_RE.fullmatch(line)
+        if not match:
+            return None
+        key, value = match.groups()
+        if key.lower() in _YAML_WORDS:
+            return None
+        if value.startswith("[") and value.endswith("]"):
+            inner = value[1:-1].strip()
+            items = [_scalar(item.strip(), True) for item in inner.split(",")] if inner else []
+            if _FALLBACK in items:
+                return None
+            front[sys.intern(key)] = [sys.intern(item) for item in items]
+        else:
+            value = _scalar(value)
+            if value is _FALLBACK:
+                return None
+            # Shared strings are stored once in the pickled cache
+            front[sys.intern(key)] = sys.intern(value) if len(value) < 64 else value
+    return front
+
+
+class FrontMatterError(ValueError):
+    """A front matter block YAML can't parse"""
+
+
+def parse_front_matter(block):
+    """Front matter block (text between the ``---`` lines) as a dict
+
+    Raises FrontMatterError when the block isn't valid YAML.
+    """
+    front = _fast_parse(block)
+    if front is not None:
+        return front
+    yaml = optional_import("yaml", "core")
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        return yaml.load(block, Loader=loader) or {}
+    except yaml.YAMLError as e:
+        raise FrontMatterError(f"invalid front matter: {e}") from None
+
+
+def split_front_matter(text):
+    """Return (front matter dict or None, body) for a Jekyll source file"""
+    if not text.startswith("---"):
+        return None, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return None, text
+    body_start = text.find("\n", end + 4)
+    body = text[body_start + 1:] if body_start != -1 else ""
+    return parse_front_matter(text[3:end]), body
+
+
+def read_block(path):
+    """The raw front matter block of a file, reading no further than its end
+
+    Returns None when the file has no front matter.
+    """
+    with open(path, "rb") as f:
+        data = f.read(CHUNK_SIZE)
+        if not data.startswith(b"---"):
+            return None
+        searched = 3
+        while True:
+            end = data.find(b"\n---", searched)
+            if end != -1:
+                return data[3:end].decode("utf-8")
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return None
+            # The marker may straddle two chunks
+            searched = max(3, len(data) - 3)
+            data += chunk
+
+
+def read_front_matter(path):
+    """Parsed front matter of a file, or None when it has none"""
+    block = read_block(path)
+    return None if block is None else parse_front_matter(block)
+
+
+class FrontMatterReader:
+    """Front matter of many posts, cached by path, mtime and size
+
+    The cache is loaded on first use and written back by close() if
+    anything changed.
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE):
+        self.cache_path = Path(cache_path)
+        self._cache = None
+        self._dirty = False
+
+    def _entries(self):
+        if self._cache is None:
+            import gc
+            import pickle
+
+            # Collections triggered by the many small objects would double the load time
+            gc.disable()
+            try:
+                with open(self.cache_path, "rb") as f:
+                    self._cache = pickle.load(f)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                self._cache = {}
+            finally:
+                gc.enable()
+        return self._cache
+
+    def close(self):
+        if not self._dirty:
+            return
+        import pickle
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(f".{self.cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(self._cache, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.cache_path)
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read(self, path):
+        """Front matter of one file (None if it has none), from the cache when fresh"""
+        key = os.fspath(path)
+        st = os.stat(key)
+        cache = self._entries()
+        hit = cache.get(key)
+        if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+        front = read_front_matter(key)
+        cache[key] = (st.st_mtime_ns, st.st_size, front)
+        self._dirty = True
+        return front
+
+    def iter_posts(self, posts_dir="_posts", manifest=None):
+        """Yield (filename, front matter or None) for each post, in filename order
+
+        With a refreshed PostManifest for ``posts_dir`` the mtimes and
+        sizes it already holds are used, saving a stat per post.
+        """
+        from blogtools.manifest import split_filename
+
+        prefix = os.path.join(os.fspath(posts_dir), "")
+        cache = self._entries()
+        if manifest is not None:
+            entries = manifest.stats()
+        else:
+            try:
+                with os.scandir(posts_dir) as it:
+                    found = sorted((entry.name, entry) for entry in it
+                                   if split_filename(entry.name) and entry.is_file())
+            except FileNotFoundError:
+                found = []
+            entries = ((name, entry.stat()) for name, entry in found)
+            entries = ((name, st.st_mtime_ns, st.st_size) for name, st in entries)
+
+        seen = set()
+        for name, mtime_ns, size in entries:
+            key = prefix + name
+            seen.add(key)
+            hit = cache.get(key)
+            if hit is not None and hit[0] == mtime_ns and hit[1] == size:
+                yield name, hit[2]
+            else:
+                yield name, self.read(key)
+
+        # Every post seen is cached by now, so any extra entry may be a deleted post
+        if len(cache) > len(seen):
+            stale = [key for key in cache if key not in seen and key.startswith(prefix)
+                     and os.sep not in key[len(prefix):]]
+            for key in stale:
+                del cache[key]
+            self._dirty = self._dirty or bool(stale)
+
+
+def main(argv=None):
+    from blogtools.manifest import PostManifest
+
+    parser = argparse.ArgumentParser(description="List the front matter of every post")
+    parser.add_argument("--posts-dir", type=Path, default=Path("_posts"))
+    parser.add_argument("--json", action="store_true", help="print one JSON object per post")
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    count = 0
+    with PostManifest(args.posts_dir) as manifest, FrontMatterReader() as reader:
+        manifest.refresh()
+        for name, front in reader.iter_posts(args.posts_dir, manifest):
+            count += 1
+            front = front or {}
+            if args.json:
+                print(json.dumps({"path": name, **front}, default=str))
+            else:
+                print(f"{name}\t{front.get('date', '')}\t{front.get('title', '')}")
+    print(f"{count} posts in {time.perf_counter() - began:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Link checker
+
+Checks every link in _posts and the site's pages. Posts are rendered
+with Markdown and each HTML page is parsed for ``href`` and ``src``
+attributes. The links found in a file are cached in
+.blog/linkcheck.sqlite3 under its content hash, so only new or changed
+files are parsed again. URLs are then de-duplicated across the whole
+archive, so a link used by 10k posts is fetched once.
+
+External URLs are checked concurrently by one aiohttp session. Its
+connection pool is shared and keeps connections alive per host. At most
+--concurrency requests are in flight, at most --per-host to any one
+host, and requests to a host start at least --host-interval seconds
+apart. A HEAD request is tried first and a GET is sent when a server
+refuses HEAD. Results are cached with a TTL (--ttl for working links,
+FAILURE_TTL for broken ones), so a run only fetches URLs that are new
+or expired. Wall time grows with the number of hosts and the host
+interval rather than with the URL count.
+
+Site-relative links are checked against the built site in _site when
+it exists. Liquid expressions and mailto:, tel: and javascript: links
+are skipped.
+
+    python -m blogtools.linkcheck [--concurrency 32] [--per-host 4] [--ttl DAYS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urldefrag, urlsplit
+
+from blogtools import metrics
+from blogtools.deps import optional_import
+from blogtools.frontmatter import split_front_matter
+from blogtools.manifest import content_hash
+
+DEFAULT_PATH = Path(".blog") / "linkcheck.sqlite3"
+DEFAULT_PAGES = ("index.html", "blog/index.html")
+DEFAULT_TTL = 7 * 86400
+FAILURE_TTL = 3600
+USER_AGENT = "blogtools-linkcheck/1.0"
+# Statuses after which a HEAD request is retried as GET
+_HEAD_REFUSED = {403, 405, 501}
+_SKIPPED_SCHEMES = ("mailto:", "tel:", "javascript:", "data:")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    urls TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT PRIMARY KEY,
+    status INTEGER,
+    error TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+class _LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name in ("href", "src") and value:
+                self.links.append(value.strip())
+
+
+def extract_links(html):
+    """Distinct link targets in an HTML document, fragments removed"""
+    parser = _LinkParser()
+    parser.feed(html)
+    parser.close()
+    links = set()
+    for link in parser.links:
+        if "{{" in link or "{%" in link or link.startswith(("#", *_SKIPPED_SCHEMES)):
+            continue
+        link = urldefrag(link)[0]
+        if link:
+            links.add(link)
+    return sorted(links)
+
+
+def _is_external(url):
+    return url.startswith(("http://", "https://", "//"))
+
+
+class HostLimiter:
+    """Spaces out the starts of requests to the same host"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = {}
+        self._locks = {}
+
+    async def wait(self, host):
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next.get(host, 0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next[host] = loop.time() + self.interval
+
+
+async def _check_one(session, limiter, url, timeout):
+    aiohttp = optional_import("aiohttp", "build")
+    await limiter.wait(urlsplit(url).hostname or "")
+    try:
+        async with session.head(url, allow_redirects=True, timeout=timeout) as response:
+            status = response.status
+        if status in _HEAD_REFUSED:
+            async with session.get(url, allow_redirects=True, timeout=timeout) as response:
+                status = response.status
+        return url, status, None
+    except asyncio.TimeoutError:
+        return url, None, "timed out"
+    except aiohttp.ClientError as e:
+        return url, None, str(e) or type(e).__name__
+
+
+async def check_urls(urls, concurrency=32, per_host=4, host_interval=0.0, timeout=15.0):
+    """Check ``urls`` over one pooled session; returns [(url, status, error)]"""
+    aiohttp = optional_import("aiohttp", "build")
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+    limiter = HostLimiter(host_interval)
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    results = []
+    timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async def worker(session):
+        while True:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results.append(await _check_one(session, limiter, url, timeout))
+
+    async with aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT}) as session:
+        await asyncio.gather(*(worker(session) for _ in range(min(concurrency, len(urls)) or 1)))
+    return results
+
+
+class LinkChecker:
+    """Link extraction and check results, cached between runs"""
+
+    def __init__(self, path=DEFAULT_PATH, site_dir="_site"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.site_dir = Path(site_dir)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+        self._markdown = None
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _render(self, path, text):
+        if path.endswith(".md"):
+            if self._markdown is None:
+                self._markdown = optional_import("markdown", "build").Markdown(extensions=["extra"])
+            _, body = split_front_matter(text)
+            return self._markdown.reset().convert(body)
+        return text
+
+    def collect(self, files):
+        """Map each linked URL to the files linking to it
+
+        ``files`` are (path, sha256 or None) pairs; without a hash the
+        file is read and hashed here. Files no longer listed are dropped
+        from the cache.
+        """
+        cached = {path: (sha, urls) for path, sha, urls in self._db.execute("SELECT * FROM sources")}
+        links = {}
+        updates = []
+        for path, sha in files:
+            path = str(path)
+            if sha is None:
+                with open(path, "rb") as f:
+                    sha = content_hash(f.read())
+            hit = cached.pop(path, None)
+            if hit is not None and hit[0] == sha:
+                urls = json.loads(hit[1])
+            else:
+                with open(path, encoding="utf-8") as f:
+                    urls = extract_links(self._render(path, f.read()))
+                updates.append((path, sha, json.dumps(urls)))
+            for url in urls:
+                links.setdefault(url, []).append(path)
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", updates)
+            self._db.executemany("DELETE FROM sources WHERE path = ?", [(path,) for path in cached])
+        metrics.count("linkcheck_files_parsed", len(updates))
+        return links
+
+    def due(self, urls, ttl=DEFAULT_TTL):
+        """The external ``urls`` with no result younger than their TTL"""
+        now = time.time()
+        fresh = set()
+        for url, status, checked_at in self._db.execute("SELECT url, status, checked_at FROM results"):
+            ok = status is not None and status < 400
+            if now - checked_at < (ttl if ok else FAILURE_TTL):
+                fresh.add(url)
+        return sorted(url for url in urls if _is_external(url) and url not in fresh)
+
+    def record(self, results):
+        now = time.time()
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                 [(url, status, error, now) for url, status, error in results])
+
+    def prune(self, urls):
+        """Forget results for URLs nothing links to any more"""
+        known = [url for url, in self._db.execute("SELECT url FROM results")]
+        with self._db:
+            self._db.executemany("DELETE FROM results WHERE url = ?", [(url,) for url in known if url not in urls])
+
+    def broken(self, urls):
+        """(url, reason) for each external URL whose cached result is a failure"""
+        wanted = set(urls)
+        for url, status, error in self._db.execute("SELECT url, status, error FROM results ORDER BY url"):
+            if url in wanted and (status is None or status >= 400):
+                yield url, error or f"HTTP {status}"
+
+    def missing_internal(self, links):
+        """(link, reason) for site-relative links with no file in the built site"""
+        if not self.site_dir.is_dir():
+            return
+        for link in links:
+            if _is_external(link) or ":" in link.split("/", 1)[0]:
+                continue
+            path = urlsplit(link).path
+            if not path.startswith("/"):
+                continue
+            target = self.site_dir / path.lstrip("/")
+            if not (target.is_file() or (target / "index.html").is_file()):
+                yield link, "not in the built site"
+
+
+def main(argv=None):
+    from blogtools.manifest import PostManifest
+
+    parser = argparse.ArgumentParser(description="Check links in posts and pages")
+    parser.add_argument("--posts-dir", type=Path, default=Path("_posts"))
+    parser.add_argument("--page", dest="pages", action="append", type=Path,
+                        help=f"HTML page to check (default: {', '.join(DEFAULT_PAGES)})")
+    parser.add_argument("--site-dir", type=Path, default=Path("_site"),
+                        help="built site for checking internal links (default: _site)")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight (default: 32)")
+    parser.add_argument("--per-host", type=int, default=4, help="requests in flight per host (default: 4)")
+    parser.add_argument("--host-interval", type=float, default=0.25, metavar="SECONDS",
+                        help="minimum time between requests to one host (default: 0.25)")
+    parser.add_argument("--timeout", type=float, default=15.0, metavar="SECONDS")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL / 86400, metavar="DAYS",
+                        help="days before a working link is checked again (default: 7)")
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    pages = args.pages or [Path(page) for page in DEFAULT_PAGES]
+    with PostManifest(args.posts_dir) as manifest, LinkChecker(site_dir=args.site_dir) as checker:
+        with metrics.phase("linkcheck.manifest"):
+            manifest.refresh()
+        files = [(os.path.join(args.posts_dir, name), sha) for name, sha in sorted(manifest.hashes().items())]
+        files += [(page, None) for page in pages if page.is_file()]
+        with metrics.phase("linkcheck.extract"):
+            links = checker.collect(files)
+        # Protocol-relative links are fetched over https
+        external = {("https:" + url if url.startswith("//") else url): url for url in links if _is_external(url)}
+        due = checker.due(external, args.ttl * 86400)
+        with metrics.phase("linkcheck.fetch"):
+            results = asyncio.run(check_urls(due, args.concurrency, args.per_host, args.host_interval,
+                                             args.timeout)) if due else []
+        checker.record(results)
+        checker.prune(external)
+        problems = [(url, reason, links[external[url]]) for url, reason in checker.broken(external)]
+        problems += [(link, reason, links[link]) for link, reason in checker.missing_internal(links)]
+
+    for url, reason, sources in problems:
+        shown = ", ".join(sources[:3]) + (f" and {len(sources) - 3} more" if len(sources) > 3 else "")
+        print(f"{url}: {reason} (linked from {shown})")
+    print(f"Links: {len(links)} distinct, {len(due)} fetched, {len(problems)} broken "
+          f"in {time.perf_counter() - began:.2f}s")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
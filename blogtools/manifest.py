@@ -0,0 +1,251 @@
+"""
+Persistent manifest of published posts
+
+Keeps one SQLite row per file in _posts (date, slug, topic, template,
+content hash, stat info) so questions like "is there a post today?" or
+"when was this topic last used?" are indexed lookups rather than
+directory scans. The manifest notices it is stale when the mtime of the
+posts directory changes and then re-reads only files whose mtime or size
+moved.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+from blogtools.frontmatter import FrontMatterError, split_front_matter
+
+DEFAULT_PATH = Path(".blog") / "manifest.sqlite3"
+
+_FILENAME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-(.+)\.(?:md|markdown)$")
+_TITLE_RE = re.compile(r'^title:\s*"?(.*?)"?\s*$', re.M)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    path TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    topic TEXT,
+    template TEXT,
+    sha256 TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_date ON posts (date);
+CREATE INDEX IF NOT EXISTS posts_topic_date ON posts (topic, date);
+CREATE INDEX IF NOT EXISTS posts_template_date ON posts (template, date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def split_filename(name):
+    """Return (date, slug) for a Jekyll post filename, or None"""
+    match = _FILENAME_RE.match(name)
+    return match.groups() if match else None
+
+
+def _front_matter_title(text):
+    try:
+        front, _ = split_front_matter(text)
+    except FrontMatterError:
+        # One broken post must not stop the manifest; take the title line as written
+        end = text.find("\n---", 3)
+        match = _TITLE_RE.search(text, 3, end if end != -1 else len(text))
+        return match.group(1) if match else None
+    title = front.get("title") if isinstance(front, dict) else None
+    return str(title) if title is not None else None
+
+
+class PostManifest:
+    """SQLite-backed index of every post in a posts directory"""
+
+    def __init__(self, posts_dir="_posts", path=DEFAULT_PATH):
+        self.posts_dir = Path(posts_dir)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+        self._validated_mtime = None
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _dir_mtime(self):
+        try:
+            return str(self.posts_dir.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return "missing"
+
+    def _meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def refresh(self, force=False, changes=None):
+        """Bring the manifest in line with the posts directory
+
+        Costs a single stat when nothing was added, removed or renamed since
+        the last refresh. Otherwise only files whose mtime or size changed are
+        read and re-hashed. In-place edits that leave the directory mtime
+        alone need ``force=True``. Returns the number of rows changed.
+
+        ``changes`` is a ChangeSet from blogtools.changes naming what
+        changed since the manifest was last in line; only those posts are
+        read and the directory is otherwise trusted, which saves hashing
+        every post after a fresh checkout has moved every mtime.
+        """
+        dir_mtime = self._dir_mtime()
+        # A manifest never refreshed has nothing for the changes to apply to
+        if changes is not None and not force and self._meta("posts_dir_mtime") is not None:
+            return self._apply(changes, dir_mtime)
+        if not force and self._meta("posts_dir_mtime") == dir_mtime:
+            self._validated_mtime = dir_mtime
+            return 0
+
+        known = {path: (mtime_ns, size, sha)
+                 for path, mtime_ns, size, sha in self._db.execute(
+                     "SELECT path, mtime_ns, size, sha256 FROM posts")}
+        upserts = []
+        restats = []
+        seen = set()
+        if self.posts_dir.is_dir():
+            with os.scandir(self.posts_dir) as entries:
+                for entry in entries:
+                    parts = split_filename(entry.name)
+                    if parts is None or not entry.is_file():
+                        continue
+                    seen.add(entry.name)
+                    st = entry.stat()
+                    previous = known.get(entry.name)
+                    if previous and previous[:2] == (st.st_mtime_ns, st.st_size):
+                        continue
+                    with open(entry.path, "rb") as f:
+                        data = f.read()
+                    sha = content_hash(data)
+                    if previous and previous[2] == sha:
+                        # Touched but unchanged (e.g. a fresh checkout)
+                        restats.append((st.st_mtime_ns, st.st_size, entry.name))
+                        continue
+                    title = _front_matter_title(data.decode("utf-8", "replace"))
+                    upserts.append((entry.name, parts[0], parts[1], title, None,
+                                    sha, st.st_mtime_ns, st.st_size))
+        removed = [(path,) for path in known.keys() - seen]
+
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET date = excluded.date, slug = excluded.slug, "
+                "topic = excluded.topic, template = NULL, sha256 = excluded.sha256, "
+                "mtime_ns = excluded.mtime_ns, size = excluded.size", upserts)
+            self._db.executemany("UPDATE posts SET mtime_ns = ?, size = ? WHERE path = ?", restats)
+            self._db.executemany("DELETE FROM posts WHERE path = ?", removed)
+            self._set_meta("posts_dir_mtime", dir_mtime)
+        self._validated_mtime = dir_mtime
+        return len(upserts) + len(restats) + len(removed)
+
+    def _apply(self, changes, dir_mtime):
+        changed, deleted = changes.under(self.posts_dir)
+        upserts = []
+        for name in sorted(changed):
+            parts = split_filename(name)
+            if parts is None:
+                continue
+            try:
+                with open(self.posts_dir / name, "rb") as f:
+                    data = f.read()
+                    st = os.fstat(f.fileno())
+            except FileNotFoundError:
+                deleted.add(name)
+                continue
+            title = _front_matter_title(data.decode("utf-8", "replace"))
+            upserts.append((name, parts[0], parts[1], title, None,
+                            content_hash(data), st.st_mtime_ns, st.st_size))
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET date = excluded.date, slug = excluded.slug, "
+                "topic = excluded.topic, template = NULL, sha256 = excluded.sha256, "
+                "mtime_ns = excluded.mtime_ns, size = excluded.size", upserts)
+            self._db.executemany("DELETE FROM posts WHERE path = ?", [(name,) for name in deleted])
+            self._set_meta("posts_dir_mtime", dir_mtime)
+        self._validated_mtime = dir_mtime
+        return len(upserts) + len(deleted)
+
+    def record(self, entries):
+        """Record freshly written posts in one transaction
+
+        ``entries`` are (post_path, topic, template, sha256) tuples.
+        If the manifest was up to date before these files were written, it
+        stays marked as up to date so the next refresh is a single stat.
+        """
+        rows = []
+        for post_path, topic, template, sha in entries:
+            post_path = Path(post_path)
+            date, slug = split_filename(post_path.name)
+            st = post_path.stat()
+            rows.append((post_path.name, date, slug, topic, template,
+                         sha, st.st_mtime_ns, st.st_size))
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if self._validated_mtime is not None and self._validated_mtime == self._meta("posts_dir_mtime"):
+                self._validated_mtime = self._dir_mtime()
+                self._set_meta("posts_dir_mtime", self._validated_mtime)
+
+    def post_for_date(self, date):
+        """Filename of a post published on ``date`` (YYYY-MM-DD), or None"""
+        row = self._db.execute("SELECT path FROM posts WHERE date = ? LIMIT 1", (date,)).fetchone()
+        return row[0] if row else None
+
+    def topic_last_used(self, topic):
+        """Most recent date ``topic`` was published, or None"""
+        return self._db.execute("SELECT max(date) FROM posts WHERE topic = ?", (topic,)).fetchone()[0]
+
+    def template_last_used(self, template):
+        """Most recent date ``template`` was published, or None"""
+        return self._db.execute("SELECT max(date) FROM posts WHERE template = ?", (template,)).fetchone()[0]
+
+    def history(self, recent=4):
+        """Last date each topic was published and the ``recent`` latest templates
+
+        Shaped like TopicScheduler state, so a scheduler can be rebuilt
+        from the manifest when its own state file is missing.
+        """
+        topics = dict(self._db.execute(
+            "SELECT topic, max(date) FROM posts WHERE topic IS NOT NULL GROUP BY topic"))
+        templates = [row[0] for row in self._db.execute(
+            "SELECT template FROM posts WHERE template IS NOT NULL "
+            "ORDER BY date DESC, path DESC LIMIT ?", (recent,))]
+        return {"topics": topics, "recent_templates": templates[::-1]}
+
+    def stats(self):
+        """Yield (filename, mtime_ns, size) for every post as last seen on disk, by filename"""
+        return iter(self._db.execute("SELECT path, mtime_ns, size FROM posts ORDER BY path"))
+
+    def hashes(self):
+        """Return {filename: sha256} for every post"""
+        return dict(self._db.execute("SELECT path, sha256 FROM posts"))
+
+    def __len__(self):
+        return self._db.execute("SELECT count(*) FROM posts").fetchone()[0]
+
+    def __iter__(self):
+        """Yield (path, date, slug, topic, template, sha256) in date order"""
+        return iter(self._db.execute(
+            "SELECT path, date, slug, topic, template, sha256 FROM posts ORDER BY date, path"))
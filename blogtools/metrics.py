@@ -0,0 +1,160 @@
+"""
+Per-phase timing and metrics
+
+Code marks its phases with ``with metrics.phase("render"):`` and reports
+counters with ``metrics.count("bytes_written", n)``. Until enable() is
+called both are no-ops costing a global lookup and a None check, so the
+instrumentation can stay in the hot paths permanently.
+
+When enabled, each phase accumulates call count, wall time, CPU time and
+any counters reported while it was the innermost open phase; subprocess
+spawns are counted automatically through an audit hook. Results can be
+written as a JSON report, a Prometheus textfile, and (with tracing on) a
+Chrome trace viewer file.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+_NULL_PHASE = nullcontext()
+_recorder = None
+_audit_hook_installed = False
+
+
+class _Phase:
+    __slots__ = ("recorder", "name", "wall_start", "cpu_start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.recorder._stack.append(self.name)
+        self.cpu_start = time.process_time_ns()
+        self.wall_start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter_ns() - self.wall_start
+        cpu = time.process_time_ns() - self.cpu_start
+        self.recorder._stack.pop()
+        self.recorder._finish(self.name, self.wall_start, wall, cpu)
+
+
+class Recorder:
+    """Aggregates phase timings and counters for one process"""
+
+    def __init__(self, trace=False):
+        self.phases = {}
+        self.events = [] if trace else None
+        self._stack = []
+        self._origin_ns = time.perf_counter_ns()
+
+    def _stats(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "counters": {}}
+        return stats
+
+    def _finish(self, name, wall_start, wall_ns, cpu_ns):
+        stats = self._stats(name)
+        stats["calls"] += 1
+        stats["wall_seconds"] += wall_ns / 1e9
+        stats["cpu_seconds"] += cpu_ns / 1e9
+        if self.events is not None:
+            self.events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                "ts": (wall_start - self._origin_ns) / 1000, "dur": wall_ns / 1000,
+                "args": {"cpu_ms": cpu_ns / 1e6},
+            })
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def count(self, counter, value=1):
+        counters = self._stats(self._stack[-1] if self._stack else "main")["counters"]
+        counters[counter] = counters.get(counter, 0) + value
+
+    def _audit(self, event, args):
+        if event == "subprocess.Popen":
+            self.count("subprocesses")
+
+    def report(self):
+        return {"pid": os.getpid(), "argv": sys.argv, "phases": self.phases}
+
+    def prometheus(self, prefix="blog_generator"):
+        # Each metric family has to be emitted as one contiguous group
+        families = [
+            ("phase_calls_total", "counter", "Times each phase ran", "calls"),
+            ("phase_wall_seconds", "gauge", "Wall time spent in each phase", "wall_seconds"),
+            ("phase_cpu_seconds", "gauge", "CPU time spent in each phase", "cpu_seconds"),
+        ]
+        phases = sorted(self.phases.items())
+        lines = []
+        for family, kind, help_text, key in families:
+            lines.append(f"# HELP {prefix}_{family} {help_text}")
+            lines.append(f"# TYPE {prefix}_{family} {kind}")
+            lines.extend(f'{prefix}_{family}{{phase="{name}"}} {stats[key]:.9g}' for name, stats in phases)
+        counters = sorted({c for _, stats in phases for c in stats["counters"]})
+        for counter in counters:
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            lines.extend(f'{prefix}_{counter}_total{{phase="{name}"}} {stats["counters"][counter]}'
+                         for name, stats in phases if counter in stats["counters"])
+        return "\n".join(lines) + "\n"
+
+    def chrome_trace(self):
+        return {"traceEvents": self.events or [], "displayTimeUnit": "ms"}
+
+
+def enable(trace=False):
+    """Start recording in this process; returns the active Recorder"""
+    global _recorder, _audit_hook_installed
+    if _recorder is None:
+        _recorder = Recorder(trace)
+    if not _audit_hook_installed:
+        # Audit hooks cannot be removed, so the hook checks for a live recorder
+        sys.addaudithook(lambda event, args: _recorder is not None and _recorder._audit(event, args))
+        _audit_hook_installed = True
+    return _recorder
+
+
+def disable():
+    global _recorder
+    _recorder = None
+
+
+def phase(name):
+    """Context manager timing one phase; a shared no-op while disabled"""
+    if _recorder is None:
+        return _NULL_PHASE
+    return _recorder.phase(name)
+
+
+def count(counter, value=1):
+    """Add ``value`` to a counter of the innermost open phase"""
+    if _recorder is not None:
+        _recorder.count(counter, value)
+
+
+def _write_atomic(path, text):
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def write_reports(json_path=None, prometheus_path=None, trace_path=None):
+    """Write whichever reports were requested; no-op while disabled"""
+    if _recorder is None:
+        return
+    if json_path:
+        _write_atomic(json_path, json.dumps(_recorder.report(), indent=2) + "\n")
+    if prometheus_path:
+        _write_atomic(prometheus_path, _recorder.prometheus())
+    if trace_path:
+        _write_atomic(trace_path, json.dumps(_recorder.chrome_trace()))
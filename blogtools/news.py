@@ -0,0 +1,151 @@
+"""
+Cybersecurity news ingestion
+
+Fetches RSS/Atom feeds concurrently through one pooled requests.Session,
+sending ETag/Last-Modified validators so unchanged feeds cost a 304.
+Parsed items are kept in an on-disk cache with a TTL; while every feed
+is within its window a run makes no network calls at all. Total fetch
+time is bounded by the slowest feed (plus the per-feed timeout), not by
+the sum of all of them. A long-lived fetcher also keeps the items in
+memory until the first feed goes stale, so repeat calls skip the disk.
+"""
+
+import calendar
+import json
+import os
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from blogtools.deps import optional_import
+
+DEFAULT_FEEDS = [
+    "https://krebsonsecurity.com/feed/",
+    "https://www.bleepingcomputer.com/feed/",
+    "https://feeds.feedburner.com/TheHackersNews",
+    "https://www.darkreading.com/rss.xml",
+    "https://www.schneier.com/feed/atom/",
+    "https://www.cisa.gov/cybersecurity-advisories/all.xml",
+]
+DEFAULT_CACHE = Path(".blog") / "news_cache.json"
+
+NewsItem = namedtuple("NewsItem", ["title", "link", "published", "source"])
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"and", "the", "of", "in", "for", "to", "a", "an", "on", "with"}
+
+
+class NewsFetcher:
+    """Concurrent, conditional, TTL-cached feed fetcher"""
+
+    def __init__(self, feeds=None, cache_path=DEFAULT_CACHE, ttl=3600, timeout=10,
+                 workers=8, max_items=20):
+        self.feeds = list(DEFAULT_FEEDS if feeds is None else feeds)
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.workers = workers
+        self.max_items = max_items
+        self._memo = None
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(f".{self.cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, self.cache_path)
+
+    def _session(self):
+        requests = optional_import("requests", "core")
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(self.feeds),
+                                                pool_maxsize=self.workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = "OfficialAdamRivers-blog-generator"
+        return session
+
+    def _fetch_one(self, session, url, entry, now):
+        feedparser = optional_import("feedparser", "core")
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("modified"):
+            headers["If-Modified-Since"] = entry["modified"]
+        try:
+            response = session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                return dict(entry, fetched_at=now)
+            response.raise_for_status()
+        except Exception as e:
+            # Keep serving what we had; retry once the TTL runs out again
+            print(f"Error fetching news feed {url}: {e}")
+            return dict(entry, fetched_at=now)
+
+        parsed = feedparser.parse(response.content)
+        items = []
+        for item in parsed.entries[:self.max_items]:
+            stamp = item.get("published_parsed") or item.get("updated_parsed")
+            items.append({
+                "title": item.get("title", "").strip(),
+                "link": item.get("link", ""),
+                "published": calendar.timegm(stamp) if stamp else None,
+            })
+        return {
+            "etag": response.headers.get("ETag"),
+            "modified": response.headers.get("Last-Modified"),
+            "fetched_at": now,
+            "items": [item for item in items if item["title"]],
+        }
+
+    def fetch(self):
+        """Return NewsItems from every feed, newest first"""
+        now = time.time()
+        if self._memo is not None and now < self._memo[0]:
+            return list(self._memo[1])
+        cache = self._load_cache()
+        stale = [url for url in self.feeds
+                 if now - cache.get(url, {}).get("fetched_at", 0) >= self.ttl]
+        if stale:
+            with self._session() as session, \
+                    ThreadPoolExecutor(min(self.workers, len(stale))) as pool:
+                fetched = pool.map(lambda url: self._fetch_one(session, url, cache.get(url, {}), now), stale)
+                cache.update(zip(stale, fetched))
+            self._save_cache(cache)
+
+        items = [NewsItem(item["title"], item["link"], item["published"], url)
+                 for url in self.feeds for item in cache.get(url, {}).get("items", [])]
+        items.sort(key=lambda item: item.published or 0, reverse=True)
+        expires = min((cache.get(url, {}).get("fetched_at", 0) for url in self.feeds), default=now) + self.ttl
+        self._memo = (expires, items)
+        return list(items)
+
+
+def _words(text):
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def select_headlines(items, topic=None, limit=3):
+    """Pick ``limit`` headlines, preferring word overlap with ``topic``
+
+    ``items`` must already be newest first; ties keep that order.
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        if item.title.lower() not in seen:
+            seen.add(item.title.lower())
+            unique.append(item)
+    if topic:
+        topic_words = _words(topic)
+        unique.sort(key=lambda item: len(topic_words & _words(item.title)), reverse=True)
+    return unique[:limit]
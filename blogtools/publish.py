@@ -0,0 +1,125 @@
+"""
+Batched git publishing
+
+Queues post files and writes them into a single commit with one
+`git fast-import` process, then pushes once. The number of git processes
+per batch is constant (resolve branch, import, sync index, push) no
+matter how many posts are in it. Any git remote works, including a local
+bare repository for offline testing.
+"""
+
+import subprocess
+import time
+from pathlib import Path
+
+
+class GitPublisher:
+    """Collect post files and publish them as one commit per batch"""
+
+    def __init__(self, repo_dir=".", remote="origin", branch=None,
+                 name="Blog Generator", email="blog@adamrivers.com"):
+        self.repo_dir = Path(repo_dir).resolve()
+        self.remote = remote
+        self.branch = branch
+        self.name = name
+        self.email = email
+        self._queue = {}
+
+    def _git(self, *args, **kwargs):
+        return subprocess.run(['git', *args], cwd=self.repo_dir, check=True, **kwargs)
+
+    def add(self, path):
+        """Queue a file (absolute or relative to the cwd) for the next commit"""
+        path = Path(path).resolve()
+        self._queue[path.relative_to(self.repo_dir).as_posix()] = path
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _resolve_ref(self):
+        """Return (full ref name, current tip sha or None, whether it is checked out)"""
+        head = self._git('symbolic-ref', '-q', 'HEAD', capture_output=True, text=True).stdout.strip()
+        ref = f"refs/heads/{self.branch}" if self.branch else head
+        tip = subprocess.run(['git', 'rev-parse', '-q', '--verify', f"{ref}^{{commit}}"],
+                             cwd=self.repo_dir, capture_output=True, text=True).stdout.strip()
+        checked_out = ref == head and (self.repo_dir / '.git').exists()
+        return ref, tip or None, checked_out
+
+    def tip(self):
+        """Current commit sha of the target branch, or None"""
+        return self._resolve_ref()[1]
+
+    def contains(self, sha):
+        """Whether commit ``sha`` exists here and is on the target branch"""
+        tip = self.tip()
+        if not tip:
+            return False
+        return subprocess.run(['git', 'merge-base', '--is-ancestor', sha, tip], cwd=self.repo_dir,
+                              capture_output=True).returncode == 0
+
+    def unchanged(self, paths):
+        """Repo-relative paths whose working file matches the tip of the target branch"""
+        tip = self.tip()
+        if not tip or not paths:
+            return set()
+        listing = self._git('ls-tree', '-z', tip, '--', *paths, capture_output=True).stdout
+        on_branch = {}
+        for entry in listing.split(b"\0"):
+            if entry:
+                info, name = entry.split(b"\t", 1)
+                on_branch[name.decode('utf-8')] = info.split()[2].decode()
+        local = self._git('hash-object', '--', *paths, capture_output=True, text=True).stdout.split()
+        return {path for path, sha in zip(paths, local) if on_branch.get(path) == sha}
+
+    def _fast_import_stream(self, ref, parent, message):
+        message = message.encode('utf-8')
+        chunks = [
+            f"commit {ref}\n".encode(),
+            f"committer {self.name} <{self.email}> {int(time.time())} +0000\n".encode(),
+            f"data {len(message)}\n".encode(), message, b"\n",
+        ]
+        if parent:
+            chunks.append(f"from {parent}\n".encode())
+        for rel_path, path in self._queue.items():
+            data = path.read_bytes()
+            chunks.append(f"M 100644 inline {rel_path}\ndata {len(data)}\n".encode())
+            chunks.append(data)
+            chunks.append(b"\n")
+        chunks.append(b"\ndone\n")
+        return b"".join(chunks)
+
+    def commit(self, message=None):
+        """Write every queued file into one commit on the target branch
+
+        Returns the new commit sha, or None if nothing was queued. The
+        index entries of the committed paths are refreshed so a checked-out
+        worktree does not show them as changed afterwards.
+        """
+        if not self._queue:
+            return None
+        if message is None:
+            names = [Path(p).stem for p in self._queue]
+            message = (f"Add new blog post: {names[0]}" if len(names) == 1
+                       else f"Add {len(names)} new blog posts")
+
+        ref, parent, checked_out = self._resolve_ref()
+        stream = self._fast_import_stream(ref, parent, message)
+        self._git('fast-import', '--quiet', '--done', input=stream)
+        if checked_out:
+            paths = "\0".join(self._queue).encode('utf-8')
+            self._git('reset', '-q', '--pathspec-from-file=-', '--pathspec-file-nul', input=paths)
+
+        self._queue.clear()
+        return self._git('rev-parse', ref, capture_output=True, text=True).stdout.strip()
+
+    def push(self):
+        """Push the target branch to the remote in a single round-trip"""
+        ref = f"refs/heads/{self.branch}" if self.branch else 'HEAD'
+        self._git('push', '-q', self.remote, ref)
+
+    def publish(self, message=None):
+        """Commit everything queued and push once; returns the commit sha"""
+        sha = self.commit(message)
+        if sha:
+            self.push()
+        return sha
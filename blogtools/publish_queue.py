@@ -0,0 +1,239 @@
+"""
+Durable publish queue
+
+Generation and publishing are separate stages. Generating a post only
+adds its path and content to a queue in .blog/publish_queue.sqlite3. A
+publisher worker drains the queue later and pushes through GitPublisher,
+so no network time is spent while generating and a failed push loses
+nothing. A queued post whose file is gone, e.g. in a fresh CI checkout
+with the .blog cache restored, is written back from the queue first.
+
+Everything pending when the worker wakes up goes into one commit and one
+push. A path that is queued twice is published once. A failed batch
+stays queued, and the whole queue backs off exponentially (base_delay
+doubling per failure, capped at max_delay). The backoff state lives in
+the database, so a restarted worker keeps to it.
+
+The commit and the push are recorded as separate steps. A worker that
+crashed after committing only pushes on resume, provided the commit is
+on the branch it is about to push. A commit that isn't, e.g. one left
+behind on an earlier CI runner whose push failed, is made again from
+the queued content. One that crashed while committing first drops files
+whose content is already on the branch, so no empty commit is made.
+
+    python -m blogtools.publish_queue [FILE...] [--no-drain] [--deadline SECONDS]
+"""
+
+import argparse
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from blogtools import metrics
+from blogtools.publish import GitPublisher
+
+DEFAULT_PATH = Path(".blog") / "publish_queue.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    path TEXT PRIMARY KEY,
+    enqueued_at REAL NOT NULL,
+    data BLOB NOT NULL,
+    commit_sha TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class PublishQueue:
+    """Posts waiting to be committed and pushed, with queue-wide backoff"""
+
+    def __init__(self, path=DEFAULT_PATH, repo_dir=".", base_delay=30, max_delay=3600):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.repo_dir = Path(repo_dir).resolve()
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def add(self, *paths):
+        """Queue files (absolute or relative to the cwd) for publishing"""
+        now = time.time()
+        rows = []
+        for path in paths:
+            path = Path(path).resolve()
+            rows.append((path.relative_to(self.repo_dir).as_posix(), now, path.read_bytes()))
+        with self._db:
+            # Queuing a path again means its content may have moved past any earlier commit
+            self._db.executemany(
+                "INSERT INTO jobs VALUES (?, ?, ?, NULL) ON CONFLICT (path) DO UPDATE "
+                "SET enqueued_at = excluded.enqueued_at, data = excluded.data, commit_sha = NULL", rows)
+
+    def pending(self):
+        """Queued repo-relative paths, oldest first"""
+        return [path for path, in self._db.execute("SELECT path FROM jobs ORDER BY enqueued_at, path")]
+
+    def __len__(self):
+        return self._db.execute("SELECT count(*) FROM jobs").fetchone()[0]
+
+    @property
+    def attempts(self):
+        return int(self._meta("attempts", 0))
+
+    @property
+    def next_attempt(self):
+        """Time before which the worker should not try again"""
+        return float(self._meta("next_attempt", 0))
+
+    @property
+    def last_error(self):
+        return self._meta("last_error")
+
+    def publish_once(self, publisher):
+        """Commit and push everything queued as one batch
+
+        Returns the pushed commit sha, or None if the queue was empty.
+        Failures are recorded for the backoff and re-raised.
+        """
+        try:
+            sha = self._publish(publisher)
+        except Exception as e:
+            attempts = self.attempts + 1
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+            with self._db:
+                self._set_meta("attempts", attempts)
+                # Jitter keeps several workers from retrying in lockstep
+                self._set_meta("next_attempt", time.time() + delay * random.uniform(0.8, 1.0))
+                self._set_meta("last_error", str(e))
+            metrics.count("publish_failures")
+            raise
+        with self._db:
+            self._db.execute("DELETE FROM meta WHERE key IN ('attempts', 'next_attempt', 'last_error')")
+        return sha
+
+    def _publish(self, publisher):
+        # A commit made in another checkout, e.g. by an earlier CI run whose
+        # push failed, isn't on this branch; commit those posts again
+        lost = [(path,) for path, sha in self._db.execute(
+                    "SELECT path, commit_sha FROM jobs WHERE commit_sha IS NOT NULL")
+                if not publisher.contains(sha)]
+        if lost:
+            with self._db:
+                self._db.executemany("UPDATE jobs SET commit_sha = NULL WHERE path = ?", lost)
+
+        for path, data in self._db.execute("SELECT path, data FROM jobs WHERE commit_sha IS NULL"):
+            target = self.repo_dir / path
+            if not target.is_file():
+                print(f"Restoring queued post {path}")
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(data)
+
+        todo = [path for path, in self._db.execute(
+            "SELECT path FROM jobs WHERE commit_sha IS NULL ORDER BY enqueued_at, path")]
+        if todo and self._meta("committing"):
+            # The last worker died between writing a commit and recording it
+            done = publisher.unchanged(todo)
+            todo = [path for path in todo if path not in done]
+            tip = publisher.tip()
+            with self._db:
+                self._db.executemany("UPDATE jobs SET commit_sha = ? WHERE path = ?",
+                                     [(tip, path) for path in done])
+        if todo:
+            for path in todo:
+                publisher.add(self.repo_dir / path)
+            with self._db:
+                self._set_meta("committing", 1)
+            with metrics.phase("publish.commit"):
+                sha = publisher.commit()
+            with self._db:
+                self._db.executemany("UPDATE jobs SET commit_sha = ? WHERE path = ?",
+                                     [(sha, path) for path in todo])
+                self._db.execute("DELETE FROM meta WHERE key = 'committing'")
+
+        committed = [path for path, in self._db.execute("SELECT path FROM jobs WHERE commit_sha IS NOT NULL")]
+        if not committed:
+            return None
+        with metrics.phase("publish.push"):
+            publisher.push()
+        with self._db:
+            self._db.executemany("DELETE FROM jobs WHERE path = ? AND commit_sha IS NOT NULL",
+                                 [(path,) for path in committed])
+        metrics.count("posts_published", len(committed))
+        return publisher.tip()
+
+    def drain(self, publisher, deadline=None, stop=None, poll=1.0):
+        """Publish until the queue is empty, backing off after failures
+
+        Gives up at ``deadline`` (a time.time() value) or once ``stop``, a
+        threading.Event, is set; whatever is left stays queued. Returns
+        True if the queue was emptied.
+        """
+        while len(self) and not (stop is not None and stop.is_set()):
+            wait = self.next_attempt - time.time()
+            if wait > 0:
+                if deadline is not None and time.time() + wait > deadline:
+                    return False
+                if stop is not None and stop.wait(min(wait, poll)):
+                    return False
+                if stop is None:
+                    time.sleep(min(wait, poll))
+                continue
+            try:
+                sha = self.publish_once(publisher)
+            except (subprocess.CalledProcessError, OSError) as e:
+                print(f"Publishing failed (attempt {self.attempts}), retrying in "
+                      f"{max(0, self.next_attempt - time.time()):.0f}s: {e}")
+                continue
+            if sha:
+                print(f"Published queued posts as {sha[:12]}")
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Queue posts for publishing and push them with retries")
+    parser.add_argument("files", nargs="*", type=Path, help="posts to add to the queue")
+    parser.add_argument("--no-drain", dest="drain", action="store_false",
+                        help="only queue the files, don't publish")
+    parser.add_argument("--deadline", type=float, default=600, metavar="SECONDS",
+                        help="stop retrying after this long and leave the rest queued (default: 600)")
+    parser.add_argument("--remote", default="origin")
+    parser.add_argument("--branch", help="branch to publish to (default: the checked-out one)")
+    args = parser.parse_args(argv)
+
+    with PublishQueue() as queue:
+        if args.files:
+            queue.add(*args.files)
+        print(f"{len(queue)} post(s) queued for publishing")
+        if not args.drain or not len(queue):
+            return
+        publisher = GitPublisher(remote=args.remote, branch=args.branch)
+        if not queue.drain(publisher, deadline=time.time() + args.deadline):
+            print(f"Gave up for now with {len(queue)} post(s) still queued: {queue.last_error}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Readability and quality scores
+
+Scores posts for length, mean sentence length, Flesch reading ease,
+Flesch-Kincaid grade, density of the post's topic keyword (its last
+tag) and TextBlob sentiment. ``python -m blogtools.readability`` scores
+the whole archive across a process pool. Each worker loads the NLTK
+sentence tokenizer and the TextBlob analyzer once, in its initializer.
+Scores are cached in .blog/readability.sqlite3 by filename and content
+sha256 from the post manifest, so later runs only score new or changed
+posts.
+
+check_post() is the pre-publish check create_blog_post runs on every new
+post. It uses the same measures with a regex sentence splitter and no
+sentiment, so it needs no third-party packages and takes about a
+millisecond. It reports problems but never blocks a post.
+
+    python -m blogtools.readability [--jobs N] [--json] [--rescore]
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from blogtools import metrics
+from blogtools.deps import optional_import
+from blogtools.frontmatter import split_front_matter
+
+DEFAULT_PATH = Path(".blog") / "readability.sqlite3"
+
+# Pre-publish limits; a post outside them gets a warning
+MIN_WORDS = 250
+MAX_SENTENCE_LENGTH = 25.0
+# Generated posts are jargon-heavy bullet lists and sit around grade 16-18
+MAX_GRADE = 20.0
+MAX_KEYWORD_DENSITY = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+_CODE_RE = re.compile(r"```.*?```", re.DOTALL)
+_LINK_RE = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MARKUP_RE = re.compile(r"^\s*(?:#+|[-*+>]|\d+\.|\|)\s*|[*_`|]", re.MULTILINE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'])|\n\s*\n")
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_VOWELS_RE = re.compile(r"[aeiouy]+")
+
+
+def plain_text(body):
+    """Markdown body reduced to prose: no code, link targets or markup"""
+    text = _LINK_RE.sub(r"\1", _CODE_RE.sub("", body))
+    # Headings and list items end a sentence even without punctuation
+    text = re.sub(r"^(\s*(?:#+|[-*+]|\d+\.)\s.*?)[ \t]*$", r"\1.", text, flags=re.MULTILINE)
+    return _MARKUP_RE.sub("", text)
+
+
+@lru_cache(maxsize=65536)
+def syllables(word):
+    word = word.lower().strip("'-")
+    count = len(_VOWELS_RE.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee")) and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+def measures(sentences, keyword=None):
+    """Length, readability and keyword scores for a list of sentences"""
+    words = [w for sentence in sentences for w in _WORD_RE.findall(sentence)]
+    sentence_count = sum(1 for sentence in sentences if _WORD_RE.search(sentence))
+    n_words = len(words)
+    if not n_words:
+        return {"words": 0, "sentences": 0}
+    per_sentence = n_words / max(1, sentence_count)
+    per_word = sum(syllables(w) for w in words) / n_words
+    scores = {
+        "words": n_words,
+        "sentences": sentence_count,
+        "sentence_length": round(per_sentence, 2),
+        "reading_ease": round(206.835 - 1.015 * per_sentence - 84.6 * per_word, 2),
+        "grade": round(0.39 * per_sentence + 11.8 * per_word - 15.59, 2),
+    }
+    if keyword:
+        phrase = keyword.lower().split()
+        lowered = [w.lower() for w in words]
+        size = len(phrase)
+        hits = sum(1 for i in range(n_words - size + 1) if lowered[i:i + size] == phrase)
+        scores["keyword"] = " ".join(phrase)
+        scores["keyword_density"] = round(hits * size / n_words, 4)
+    return scores
+
+
+def _keyword(front):
+    tags = (front or {}).get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split()
+    return str(tags[-1]).replace("-", " ") if tags else None
+
+
+def check_post(text):
+    """Problems with a post's length, readability or keyword use, as messages"""
+    front, body = split_front_matter(text)
+    sentences = [s for s in _SENTENCE_RE.split(plain_text(body)) if s.strip()]
+    scores = measures(sentences, _keyword(front))
+    problems = []
+    if scores["words"] < MIN_WORDS:
+        problems.append(f"only {scores['words']} words (want at least {MIN_WORDS})")
+    if scores.get("sentence_length", 0) > MAX_SENTENCE_LENGTH:
+        problems.append(f"sentences average {scores['sentence_length']:.0f} words "
+                        f"(want at most {MAX_SENTENCE_LENGTH:.0f})")
+    if scores.get("grade", 0) > MAX_GRADE:
+        problems.append(f"reading grade {scores['grade']:.0f} (want at most {MAX_GRADE:.0f})")
+    if "keyword" in scores:
+        density = scores["keyword_density"]
+        if not density:
+            problems.append(f"topic keyword '{scores['keyword']}' never appears")
+        elif density > MAX_KEYWORD_DENSITY:
+            problems.append(f"topic keyword '{scores['keyword']}' is {density:.1%} of the text "
+                            f"(want at most {MAX_KEYWORD_DENSITY:.0%})")
+    return problems
+
+
+# Per-process scoring state, set once by _init_worker
+_worker = None
+
+
+def _init_worker(posts_dir):
+    global _worker
+    nltk = optional_import("nltk", "analysis")
+    optional_import("textblob", "analysis")
+    from textblob.en.sentiments import PatternAnalyzer
+
+    try:
+        tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
+    except LookupError:
+        raise LookupError("the NLTK punkt tokenizer is missing; install it with "
+                          "python -m nltk.downloader punkt") from None
+    _worker = {
+        "posts_dir": Path(posts_dir),
+        "sentences": tokenizer.tokenize,
+        "sentiment": PatternAnalyzer().analyze,
+    }
+
+
+def _score_post(item):
+    """Score one post; returns its scores-table row"""
+    name, sha = item
+    with open(_worker["posts_dir"] / name, encoding="utf-8") as f:
+        front, body = split_front_matter(f.read())
+    text = plain_text(body)
+    sentences = [s for block in text.split("\n\n") for s in _worker["sentences"](block) if s.strip()]
+    scores = measures(sentences, _keyword(front))
+    polarity, subjectivity = _worker["sentiment"](text)
+    scores["polarity"] = round(polarity, 4)
+    scores["subjectivity"] = round(subjectivity, 4)
+    return name, sha, json.dumps(scores, sort_keys=True)
+
+
+class ReadabilityCache:
+    """Post scores keyed by content hash, refreshed from the manifest"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sync(self, manifest, posts_dir, jobs=None, rescore=False):
+        """Score posts that are new or changed; returns (scored, removed)"""
+        cached = {} if rescore else dict(self._db.execute("SELECT path, sha256 FROM scores"))
+        hashes = manifest.hashes()
+        todo = [(name, sha) for name, sha in hashes.items() if cached.get(name) != sha]
+        removed = [(name,) for name in cached.keys() - hashes.keys()]
+
+        rows = []
+        if todo and (len(todo) < 64 or jobs == 1):
+            _init_worker(posts_dir)
+            rows = [_score_post(item) for item in todo]
+        elif todo:
+            from concurrent.futures import ProcessPoolExecutor
+
+            jobs = jobs or os.cpu_count() or 1
+            with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(posts_dir,)) as pool:
+                rows = list(pool.map(_score_post, todo, chunksize=max(1, len(todo) // (jobs * 4))))
+        metrics.count("posts_scored", len(rows))
+
+        with self._db:
+            if rescore:
+                self._db.execute("DELETE FROM scores")
+            self._db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?)", rows)
+            self._db.executemany("DELETE FROM scores WHERE path = ?", removed)
+        return len(rows), len(removed)
+
+    def scores(self):
+        """Yield (filename, scores dict) for every post, in filename order"""
+        for path, data in self._db.execute("SELECT path, data FROM scores ORDER BY path"):
+            yield path, json.loads(data)
+
+
+def main(argv=None):
+    from blogtools.manifest import PostManifest
+
+    parser = argparse.ArgumentParser(description="Score posts for readability and quality")
+    parser.add_argument("--posts-dir", type=Path, default=Path("_posts"))
+    parser.add_argument("--jobs", type=int, help="worker processes for scoring")
+    parser.add_argument("--rescore", action="store_true", help="ignore cached scores")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per post")
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    with PostManifest(args.posts_dir) as manifest, ReadabilityCache() as cache:
+        with metrics.phase("readability.manifest"):
+            manifest.refresh()
+        with metrics.phase("readability.score"):
+            scored, removed = cache.sync(manifest, args.posts_dir, args.jobs, args.rescore)
+        results = list(cache.scores())
+
+    if args.json:
+        for name, scores in results:
+            print(json.dumps({"path": name, **scores}))
+    else:
+        hardest = sorted((s.get("reading_ease", 0), name) for name, s in results)[:5]
+        for ease, name in hardest:
+            print(f"{ease:7.1f}  {name}")
+        if results:
+            means = {key: sum(s.get(key, 0) for _, s in results) / len(results)
+                     for key in ("words", "sentence_length", "reading_ease", "grade", "polarity")}
+            print("Mean: " + ", ".join(f"{key.replace('_', ' ')} {value:.1f}" for key, value in means.items()))
+    print(f"Readability: {len(results)} posts, {scored} scored, {removed} removed "
+          f"in {time.perf_counter() - began:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
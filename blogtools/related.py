@@ -0,0 +1,315 @@
+"""
+Related posts
+
+Keeps a hashed term-count matrix over _posts together with each post's
+k most similar posts by TF-IDF cosine similarity, and exports the lists
+to _data/related_posts.json for the post layout.
+
+The matrix is stored sparse, as the three CSR arrays (row offsets,
+column indices, counts) in append-only files that are memory-mapped on
+open. Hashing terms into a fixed number of columns means a new post
+never changes the vocabulary, so adding one post scores it against the
+archive with a single sparse matrix-vector product. The new post gets
+its own top-k list and is inserted into the list of any post it beats.
+No other pairs are recomputed. Lists of older posts keep the IDF
+weights from when they were scored; --rebuild rescores everything.
+
+A replaced or deleted post leaves a dead row behind. Once dead rows
+outnumber live ones the index is rebuilt from the posts on disk.
+
+A run exits early when git shows no change under _posts since the last
+one (see blogtools.changes).
+
+    python -m blogtools.related [--rebuild] [-k N]
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+from blogtools import metrics
+from blogtools.changes import StageState
+from blogtools.deps import optional_import
+from blogtools.frontmatter import split_front_matter
+from blogtools.manifest import PostManifest, split_filename
+from blogtools.render_cache import write_if_changed
+from blogtools.site import RELATED_DATA, as_list, parse_post_date, post_url
+
+np = optional_import("numpy", "core")
+
+DEFAULT_DIR = Path(".blog") / "related"
+DATA_FILE = RELATED_DATA
+N_FEATURES = 1 << 18
+TOP_K = 5
+
+# Columns compared per sparse product when scoring a batch of new posts
+_CHUNK = 64
+
+
+def _post_info(name, text):
+    """(title, url) of a post, as the site build derives them"""
+    date_part, slug = split_filename(name)
+    front, _ = split_front_matter(text)
+    front = front or {}
+    date = parse_post_date(front.get("date"), date_part)
+    categories = as_list(front.get("categories") or front.get("category"))
+    title = str(front.get("title") or slug.replace("-", " ").title())
+    return " ".join(title.split()), post_url(date, slug, categories)
+
+
+class RelatedIndex:
+    """Incremental top-k similar posts over a memory-mapped sparse matrix"""
+
+    def __init__(self, path=DEFAULT_DIR, k=TOP_K):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.k = k
+        self._files = {name: self.path / name for name in
+                       ("indptr.i64", "indices.i32", "data.f32", "neighbours.i32", "scores.f32",
+                        "index.tsv", "meta.json")}
+        self._vectorizer = None
+        self._load()
+
+    def _reset(self):
+        for f in self._files.values():
+            f.unlink(missing_ok=True)
+        self._files["meta.json"].write_text(json.dumps({"k": self.k, "n_features": N_FEATURES}))
+
+    def _load(self):
+        try:
+            meta = json.loads(self._files["meta.json"].read_text())
+        except (FileNotFoundError, ValueError):
+            meta = None
+        if meta != {"k": self.k, "n_features": N_FEATURES}:
+            self._reset()
+        try:
+            lines = self._files["index.tsv"].read_text(encoding="utf-8").split("\n")[:-1]
+        except FileNotFoundError:
+            lines = []
+        indptr = np.fromfile(self._files["indptr.i64"], np.int64) \
+            if self._files["indptr.i64"].exists() else np.zeros(0, np.int64)
+        if not len(indptr):
+            indptr = np.zeros(1, np.int64)
+            indptr.tofile(self._files["indptr.i64"])
+        sizes = {name: f.stat().st_size if f.exists() else 0 for name, f in self._files.items()}
+        rows = min(len(lines), len(indptr) - 1,
+                   sizes["neighbours.i32"] // (4 * self.k), sizes["scores.f32"] // (4 * self.k))
+        nnz = min(sizes["indices.i32"], sizes["data.f32"]) // 4
+        while rows and indptr[rows] > nnz:
+            rows -= 1
+
+        # Trim whatever an interrupted append left behind
+        if len(lines) > rows:
+            tmp = self._files["index.tsv"].with_name(f".index.tsv.{os.getpid()}.tmp")
+            tmp.write_text("".join(f"{line}\n" for line in lines[:rows]), encoding="utf-8")
+            os.replace(tmp, self._files["index.tsv"])
+        nnz = int(indptr[rows])
+        for name, size in (("indptr.i64", 8 * (rows + 1)), ("indices.i32", 4 * nnz), ("data.f32", 4 * nnz),
+                           ("neighbours.i32", 4 * self.k * rows), ("scores.f32", 4 * self.k * rows)):
+            if not self._files[name].exists():
+                self._files[name].touch()
+            if sizes[name] != size:
+                os.truncate(self._files[name], size)
+
+        self._entries = [line.split("\t") for line in lines[:rows]]
+        self._rows = {entry[0]: row for row, entry in enumerate(self._entries)}
+        self._map()
+
+    def _map(self):
+        sparse = optional_import("scipy.sparse", "analysis")
+        rows = len(self._entries)
+        indptr = np.fromfile(self._files["indptr.i64"], np.int64, rows + 1)
+        nnz = int(indptr[-1])
+        if nnz:
+            data = np.memmap(self._files["data.f32"], np.float32, "r", shape=(nnz,))
+            indices = np.memmap(self._files["indices.i32"], np.int32, "r", shape=(nnz,))
+        else:
+            data, indices = np.zeros(0, np.float32), np.zeros(0, np.int32)
+        self._matrix = sparse.csr_matrix((data, indices, indptr), shape=(rows, N_FEATURES))
+        if rows:
+            self._neighbours = np.memmap(self._files["neighbours.i32"], np.int32, "r+", shape=(rows, self.k))
+            self._scores = np.memmap(self._files["scores.f32"], np.float32, "r+", shape=(rows, self.k))
+        else:
+            self._neighbours = np.zeros((0, self.k), np.int32)
+            self._scores = np.zeros((0, self.k), np.float32)
+        self._live = np.array([row == self._rows[entry[0]] and bool(entry[1])
+                               for row, entry in enumerate(self._entries)], dtype=bool)
+
+    def __len__(self):
+        return int(self._live.sum())
+
+    def digest(self, name):
+        row = self._rows.get(name)
+        if row is None:
+            return None
+        return self._entries[row][1] or None
+
+    def _vectorize(self, texts):
+        if self._vectorizer is None:
+            text = optional_import("sklearn.feature_extraction.text", "analysis")
+            self._vectorizer = text.HashingVectorizer(
+                n_features=N_FEATURES, alternate_sign=False, norm=None,
+                stop_words="english", dtype=np.float32)
+        matrix = self._vectorizer.transform(texts).tocsr()
+        matrix.sort_indices()
+        return matrix
+
+    def _weights(self):
+        """Squared IDF weights and TF-IDF row norms over live posts"""
+        matrix = self._matrix
+        live_nnz = np.repeat(self._live, np.diff(matrix.indptr))
+        df = np.bincount(matrix.indices[live_nnz], minlength=N_FEATURES)
+        idf = np.log((1 + len(self)) / (1 + df)) + 1
+        idf2 = (idf * idf).astype(np.float32)
+        norms = np.sqrt(matrix.multiply(matrix).dot(idf2))
+        norms[norms == 0] = 1
+        return idf2, norms
+
+    def add_many(self, items):
+        """Index (filename, sha256, title, url, text) entries and score the new posts
+
+        An empty sha256 marks the post as removed.
+        """
+        items = list(items)
+        if not items:
+            return
+        first = len(self._entries)
+        vectors = self._vectorize([text if sha else "" for _, sha, _, _, text in items])
+        nnz = int(self._matrix.indptr[-1])
+        # Matrix and list rows first, index lines last: a row exists once its line does
+        with open(self._files["data.f32"], "ab") as f:
+            f.write(vectors.data.astype(np.float32).tobytes())
+        with open(self._files["indices.i32"], "ab") as f:
+            f.write(vectors.indices.astype(np.int32).tobytes())
+        with open(self._files["indptr.i64"], "ab") as f:
+            f.write((vectors.indptr[1:].astype(np.int64) + nnz).tobytes())
+        for name, dtype in (("neighbours.i32", np.int32), ("scores.f32", np.float32)):
+            with open(self._files[name], "ab") as f:
+                f.write(np.full((len(items), self.k), -1, dtype).tobytes())
+        with open(self._files["index.tsv"], "a", encoding="utf-8") as f:
+            for name, sha, title, url, _ in items:
+                self._rows[name] = len(self._entries)
+                self._entries.append([name, sha, title, url])
+                f.write(f"{name}\t{sha}\t{title}\t{url}\n")
+        self._map()
+        self._score(range(first, len(self._entries)))
+
+    def _score(self, rows, propagate=True):
+        """Fill the lists of ``rows``; with ``propagate``, also insert them into older posts' lists"""
+        rows = [row for row in rows if self._live[row]]
+        if not rows:
+            return
+        first = rows[0]
+        idf2, norms = self._weights()
+        matrix = self._matrix
+        for i in range(0, len(rows), _CHUNK):
+            chunk = rows[i:i + _CHUNK]
+            queries = matrix[chunk].multiply(idf2).T.tocsc()
+            similarity = (matrix @ queries).toarray()
+            similarity /= norms[:, None] * norms[chunk][None, :]
+            similarity[~self._live] = -1
+            for j, row in enumerate(chunk):
+                column = similarity[:, j]
+                column[row] = -1
+                top = np.argpartition(-column, min(self.k, len(column) - 1))[:self.k]
+                top = top[np.argsort(-column[top], kind="stable")]
+                keep = column[top] > 0
+                self._neighbours[row] = -1
+                self._scores[row] = -1
+                self._neighbours[row, :keep.sum()] = top[keep]
+                self._scores[row, :keep.sum()] = column[top][keep]
+                if not propagate:
+                    continue
+                # Older posts this one now outranks
+                older = column[:first]
+                for other in np.flatnonzero((older > 0) & (older > self._scores[:first, -1])):
+                    self._insert(other, row, column[other])
+        self._neighbours.flush()
+        self._scores.flush()
+
+    def _insert(self, row, neighbour, score):
+        if neighbour in self._neighbours[row]:
+            return
+        scores = self._scores[row]
+        position = int(np.searchsorted(-scores, -score, side="right"))
+        self._neighbours[row, position + 1:] = self._neighbours[row, position:-1].copy()
+        self._scores[row, position + 1:] = scores[position:-1].copy()
+        self._neighbours[row, position] = neighbour
+        self._scores[row, position] = score
+
+    def sync(self, manifest, posts_dir, rebuild=False):
+        """Index new, changed and removed posts; returns how many were touched"""
+        hashes = manifest.hashes()
+        posts_dir = Path(posts_dir)
+        dead = len(self._entries) - len(self)
+        if rebuild or (dead > 1000 and dead > len(self)):
+            self._reset()
+            self._load()
+        items = []
+        for name, sha in hashes.items():
+            if self.digest(name) != sha:
+                text = (posts_dir / name).read_text(encoding="utf-8")
+                items.append((name, sha, *_post_info(name, text), text))
+        items += [(name, "", "", "", "") for name, row in self._rows.items()
+                  if self._entries[row][1] and name not in hashes]
+        self.add_many(items)
+
+        # Refill lists that pointed at posts which have since been replaced or removed
+        neighbours = self._neighbours
+        stale = np.zeros(neighbours.shape, dtype=bool)
+        stale[neighbours >= 0] = ~self._live[neighbours[neighbours >= 0]]
+        self._score(np.flatnonzero(stale.any(axis=1) & self._live).tolist(), propagate=False)
+        return len(items)
+
+    def related(self):
+        """{filename: [{"title", "url", "score"}, ...]} for every live post"""
+        result = {}
+        for row in np.flatnonzero(self._live):
+            name = self._entries[row][0]
+            result[name] = [{"title": self._entries[other][2], "url": self._entries[other][3],
+                             "score": round(float(score), 3)}
+                            for other, score in zip(self._neighbours[row], self._scores[row])
+                            if other >= 0 and self._live[other]]
+        return result
+
+    def export(self, path=DATA_FILE):
+        """Write the related-posts data file; returns True if it changed"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(self.related(), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return write_if_changed(path, data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update related-post lists for the site")
+    parser.add_argument("--posts-dir", type=Path, default=Path("_posts"))
+    parser.add_argument("--output", type=Path, default=DATA_FILE,
+                        help=f"data file to write (default: {DATA_FILE})")
+    parser.add_argument("-k", type=int, default=TOP_K, help=f"related posts per post (default: {TOP_K})")
+    parser.add_argument("--rebuild", action="store_true", help="rescore every post from scratch")
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    state = StageState()
+    changes = None if args.rebuild else state.changes("related", [args.posts_dir])
+    if changes is not None and not changes and args.output.exists():
+        print("Related posts: no post changed since the last run")
+        return
+    with PostManifest(args.posts_dir) as manifest:
+        with metrics.phase("related.manifest"):
+            manifest.refresh(changes=changes)
+        index = RelatedIndex(k=args.k)
+        with metrics.phase("related.index"):
+            changed = index.sync(manifest, args.posts_dir, rebuild=args.rebuild)
+    with metrics.phase("related.export"):
+        written = index.export(args.output)
+    state.mark_built("related", [args.posts_dir])
+    print(f"Related posts: {len(index)} posts, {changed} updated, "
+          f"{args.output} {'written' if written else 'unchanged'} "
+          f"in {time.perf_counter() - began:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
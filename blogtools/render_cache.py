@@ -0,0 +1,105 @@
+"""
+Content-addressed render cache
+
+Maps a render key, a hash of everything that determines a post's bytes
+(generator version, timestamp, topic, template, seed, news), to the
+sha256 of the file it produces. Comparing that against the manifest's
+hash of the file on disk lets rebuilds skip both rendering and writing
+for posts that would come out byte-identical, which also leaves their
+mtimes alone. The cache is an SQLite table bounded to ``max_entries``
+with least-recently-used eviction.
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+DEFAULT_PATH = Path(".blog") / "render_cache.sqlite3"
+
+# Bump when rendering changes in a way the template fingerprint can't see
+GENERATOR_VERSION = "2"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS renders (
+    key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS renders_last_used ON renders (last_used);
+"""
+
+
+def render_key(version, spec):
+    """Stable key for a PostSpec rendered by generator ``version``"""
+    parts = [version, spec.when.isoformat(), spec.topic, spec.template, str(spec.seed)]
+    parts.extend(f"{item.title}\x1f{item.link}" for item in spec.news)
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def write_if_changed(path, data):
+    """Write ``data`` unless the file already holds exactly these bytes
+
+    Returns True if the file was written. Leaving identical files alone
+    keeps their mtime, so incremental consumers see no change.
+    """
+    path = Path(path)
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+class RenderCache:
+    """Size-bounded LRU map from render key to output digest"""
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=200_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT count(*) FROM renders").fetchone()[0]
+
+    def get_many(self, keys):
+        """Return {key: digest} for the cached keys and mark them recently used"""
+        found = {}
+        keys = list(keys)
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 900):
+            batch = keys[i:i + 900]
+            found.update(self._db.execute(
+                f"SELECT key, digest FROM renders WHERE key IN ({','.join('?' * len(batch))})", batch))
+        if found:
+            now = time.time_ns()
+            with self._db:
+                self._db.executemany("UPDATE renders SET last_used = ? WHERE key = ?",
+                                     ((now, key) for key in found))
+        return found
+
+    def put_many(self, items):
+        """Store (key, digest) pairs, then evict the least recently used overflow"""
+        now = time.time_ns()
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO renders VALUES (?, ?, ?)",
+                                 ((key, digest, now) for key, digest in items))
+            overflow = len(self) - self.max_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM renders WHERE key IN "
+                    "(SELECT key FROM renders ORDER BY last_used LIMIT ?)", (overflow,))
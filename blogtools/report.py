@@ -0,0 +1,381 @@
+"""
+Archive analytics report
+
+Charts posts per topic and per template over time, post lengths and the
+archive's most frequent terms, and writes them with a summary page to
+report/.
+
+Per-post statistics (date, topic, template, words, sentences and the
+post's TOP_TERMS most frequent terms) are computed once per content hash
+and appended to .blog/analytics/ as Parquet parts of up to BATCH rows.
+Posts are read one at a time and a part is flushed whenever BATCH rows
+are pending, so memory stays flat however large the archive is.
+
+The aggregates behind the charts are counters in
+.blog/analytics/aggregates.sqlite3: posts per (month, topic), posts per
+(month, template), posts per length bucket and term counts. A new post
+adds its counts. A changed or removed post first subtracts the counts
+from its old row, which is read back from its Parquet part. Each chart
+records a digest of its inputs and is redrawn only when they change.
+
+Daily runs add one small part each; once more than MAX_PARTS are live
+they are merged by streaming their live rows into fresh parts.
+
+    python -m blogtools.report [--output report] [--rebuild]
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import re
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+
+from blogtools import metrics
+from blogtools.deps import optional_import
+from blogtools.frontmatter import split_front_matter
+from blogtools.readability import plain_text
+from blogtools.search import STOPWORDS
+
+DEFAULT_DIR = Path(".blog") / "analytics"
+DEFAULT_OUTPUT = Path("report")
+BATCH = 5000
+TOP_TERMS = 30
+CLOUD_TERMS = 200
+LENGTH_BUCKET = 100
+MAX_PARTS = 64
+# Topics and templates drawn individually; the rest are summed as "other"
+CHART_SERIES = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    part INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counts (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_TERM_RE = re.compile(r"[a-z][a-z0-9-]+")
+_SENTENCE_END_RE = re.compile(r"[.!?](?:\s|$)")
+
+
+def post_stats(name, date, topic, template, sha, text):
+    """One row of per-post statistics"""
+    front, body = split_front_matter(text)
+    prose = plain_text(body)
+    terms = Counter(t for t in _TERM_RE.findall(prose.lower()) if t not in STOPWORDS)
+    return {
+        "path": name,
+        "sha256": sha,
+        "month": date[:7],
+        "topic": topic or str((front or {}).get("title") or "unknown"),
+        "template": template or "unknown",
+        "words": len(prose.split()),
+        "sentences": len(_SENTENCE_END_RE.findall(prose)),
+        "terms": json.dumps(terms.most_common(TOP_TERMS)),
+    }
+
+
+def _contributions(row):
+    """(kind, key, count) rows a post adds to the aggregates"""
+    yield "topic_month", f"{row['month']}\t{row['topic']}", 1
+    yield "template_month", f"{row['month']}\t{row['template']}", 1
+    yield "length", str(row["words"] // LENGTH_BUCKET * LENGTH_BUCKET), 1
+    for term, count in json.loads(row["terms"]):
+        yield "term", term, count
+
+
+class CorpusStats:
+    """Per-post statistics in Parquet parts plus incrementally kept aggregates"""
+
+    def __init__(self, path=DEFAULT_DIR):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path / "aggregates.sqlite3")
+        self._db.executescript(SCHEMA)
+        self._pq = None
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _meta(self, key, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def parquet(self):
+        if self._pq is None:
+            self._pq = optional_import("pyarrow.parquet", "analysis")
+        return self._pq
+
+    def _part_path(self, part):
+        return self.path / f"posts-{part:05d}.parquet"
+
+    def _add(self, rows, sign):
+        counts = Counter()
+        for row in rows:
+            for kind, key, count in _contributions(row):
+                counts[kind, key] += count * sign
+        self._db.executemany(
+            "INSERT INTO counts VALUES (?, ?, ?) ON CONFLICT (kind, key) DO UPDATE SET value = value + excluded.value",
+            [(kind, key, value) for (kind, key), value in counts.items()])
+        self._db.execute("DELETE FROM counts WHERE value = 0")
+
+    def _old_rows(self, paths):
+        """Stored rows of ``paths``, read back from the parts holding them"""
+        by_part = {}
+        for i in range(0, len(paths), 900):
+            batch = paths[i:i + 900]
+            for path, part in self._db.execute(
+                    f"SELECT path, part FROM posts WHERE path IN ({','.join('?' * len(batch))})", batch):
+                by_part.setdefault(part, set()).add(path)
+        for part, wanted in sorted(by_part.items()):
+            table = self.parquet.read_table(self._part_path(part), filters=[("path", "in", sorted(wanted))])
+            yield from table.to_pylist()
+
+    def _flush(self, rows):
+        """Write ``rows`` as a new part and fold them into the aggregates"""
+        pa = optional_import("pyarrow", "analysis")
+        part = int(self._meta("parts", 0)) + 1
+        stale = list(self._old_rows([row["path"] for row in rows]))
+        self.parquet.write_table(pa.Table.from_pylist(rows), self._part_path(part))
+        with self._db:
+            self._add(stale, -1)
+            self._add(rows, 1)
+            self._db.executemany("INSERT OR REPLACE INTO posts VALUES (?, ?, ?)",
+                                 [(row["path"], row["sha256"], part) for row in rows])
+            self._set_meta("parts", part)
+        metrics.count("posts_analyzed", len(rows))
+
+    def sync(self, manifest, posts_dir):
+        """Fold new, changed and removed posts into the stats; returns (added, removed)"""
+        posts_dir = Path(posts_dir)
+        known = dict(self._db.execute("SELECT path, sha256 FROM posts"))
+        pending = []
+        added = 0
+        seen = set()
+        for name, date, _, topic, template, sha in manifest:
+            seen.add(name)
+            if known.get(name) == sha:
+                continue
+            text = (posts_dir / name).read_text(encoding="utf-8")
+            pending.append(post_stats(name, date, topic, template, sha, text))
+            if len(pending) >= BATCH:
+                self._flush(pending)
+                added += len(pending)
+                pending = []
+        if pending:
+            self._flush(pending)
+            added += len(pending)
+
+        removed = [path for path in known if path not in seen]
+        if removed:
+            stale = list(self._old_rows(removed))
+            with self._db:
+                self._add(stale, -1)
+                self._db.executemany("DELETE FROM posts WHERE path = ?", [(path,) for path in removed])
+        if len({part for part, in self._db.execute("SELECT DISTINCT part FROM posts")}) > MAX_PARTS:
+            self._compact()
+        self._prune_parts()
+        return added, len(removed)
+
+    def _compact(self):
+        """Stream the live rows of every part into new parts of BATCH rows"""
+        live = dict(self._db.execute("SELECT path, part FROM posts"))
+        part = int(self._meta("parts", 0))
+        moved = []
+        pending = []
+
+        def write():
+            nonlocal part, pending
+            pa = optional_import("pyarrow", "analysis")
+            part += 1
+            self.parquet.write_table(pa.Table.from_pylist(pending), self._part_path(part))
+            moved.extend((part, row["path"]) for row in pending)
+            pending = []
+
+        for old in sorted(set(live.values())):
+            for batch in self.parquet.ParquetFile(self._part_path(old)).iter_batches(BATCH):
+                pending += [row for row in batch.to_pylist() if live.get(row["path"]) == old]
+                if len(pending) >= BATCH:
+                    write()
+        if pending:
+            write()
+        # Until this commits the old parts stay authoritative; the new ones are pruned as orphans
+        with self._db:
+            self._db.executemany("UPDATE posts SET part = ? WHERE path = ?", moved)
+            self._set_meta("parts", part)
+
+    def _prune_parts(self):
+        """Delete parts no current post points at any more"""
+        live = {part for part, in self._db.execute("SELECT DISTINCT part FROM posts")}
+        for path in self.path.glob("posts-*.parquet"):
+            if int(path.stem.split("-")[1]) not in live:
+                path.unlink()
+
+    def counts(self, kind):
+        """{key: value} for one kind of aggregate"""
+        return dict(self._db.execute("SELECT key, value FROM counts WHERE kind = ?", (kind,)))
+
+    def chart_digest(self, name):
+        return self._meta(f"chart:{name}")
+
+    def set_chart_digest(self, name, digest):
+        with self._db:
+            self._set_meta(f"chart:{name}", digest)
+
+    def reset(self):
+        with self._db:
+            self._db.execute("DELETE FROM posts")
+            self._db.execute("DELETE FROM counts")
+            self._db.execute("DELETE FROM meta")
+        self._prune_parts()
+
+
+def _series_frame(counts):
+    """Month x series DataFrame from 'month\\tname' counts, small series merged"""
+    pd = optional_import("pandas", "analysis")
+    frame = pd.Series(counts, dtype="int64")
+    if frame.empty:
+        return pd.DataFrame()
+    frame.index = pd.MultiIndex.from_tuples([tuple(key.split("\t", 1)) for key in frame.index],
+                                            names=["month", "name"])
+    table = frame.unstack("name", fill_value=0).sort_index()
+    table.index = pd.to_datetime(table.index, format="%Y-%m")
+    top = table.sum().sort_values(ascending=False).index[:CHART_SERIES]
+    rest = table.drop(columns=top).sum(axis=1)
+    table = table[top]
+    if rest.any():
+        table = table.assign(other=rest)
+    return table
+
+
+def _plot_series(counts, title, out):
+    plt = optional_import("matplotlib.pyplot", "analysis")
+    table = _series_frame(counts)
+    fig, ax = plt.subplots(figsize=(11, 5))
+    if not table.empty:
+        table.plot.area(ax=ax, linewidth=0)
+        ax.legend(loc="upper left", fontsize="small", ncol=2)
+    ax.set_title(title)
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Posts")
+    fig.tight_layout()
+    fig.savefig(out, dpi=100)
+    plt.close(fig)
+
+
+def _plot_lengths(counts, out):
+    plt = optional_import("matplotlib.pyplot", "analysis")
+    buckets = sorted((int(key), value) for key, value in counts.items())
+    fig, ax = plt.subplots(figsize=(11, 4))
+    ax.bar([b for b, _ in buckets], [v for _, v in buckets], width=LENGTH_BUCKET * 0.9, align="edge")
+    ax.set_title("Post length")
+    ax.set_xlabel("Words")
+    ax.set_ylabel("Posts")
+    fig.tight_layout()
+    fig.savefig(out, dpi=100)
+    plt.close(fig)
+
+
+def _plot_terms(counts, out):
+    wordcloud = optional_import("wordcloud", "analysis")
+    top = dict(Counter(counts).most_common(CLOUD_TERMS))
+    cloud = wordcloud.WordCloud(width=1100, height=500, background_color="white")
+    cloud.generate_from_frequencies(top or {"empty": 1}).to_file(str(out))
+
+
+CHARTS = {
+    "topics.png": ("topic_month", lambda counts, out: _plot_series(counts, "Posts per topic", out)),
+    "templates.png": ("template_month", lambda counts, out: _plot_series(counts, "Posts per template", out)),
+    "lengths.png": ("length", _plot_lengths),
+    "terms.png": ("term", _plot_terms),
+}
+
+
+def render(stats, output):
+    """Draw the charts whose inputs changed and write the summary page
+
+    Returns the names of the charts drawn.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    drawn = []
+    summary = {}
+    for name, (kind, plot) in CHARTS.items():
+        counts = stats.counts(kind)
+        summary[kind] = counts
+        digest = hashlib.sha256(json.dumps(sorted(counts.items())).encode("utf-8")).hexdigest()
+        if stats.chart_digest(name) == digest and (output / name).exists():
+            continue
+        if not drawn:
+            # Headless backend, chosen before pyplot is first imported
+            optional_import("matplotlib", "analysis").use("Agg")
+        with metrics.phase(f"report.{name.split('.')[0]}"):
+            plot(counts, output / name)
+        stats.set_chart_digest(name, digest)
+        drawn.append(name)
+
+    total = sum(summary["length"].values())
+    topics = Counter()
+    for key, value in summary["topic_month"].items():
+        topics[key.split("\t", 1)[1]] += value
+    # Topic names come from post front matter
+    rows = "\n".join(f"<tr><td>{html.escape(name)}</td><td>{count}</td></tr>"
+                     for name, count in topics.most_common())
+    images = "\n".join(f'<p><img src="{html.escape(name)}" alt="{html.escape(name)}"></p>' for name in CHARTS)
+    page = (f"<!DOCTYPE html>\n<html lang=\"en\">\n<head><meta charset=\"UTF-8\"><title>Archive report</title></head>\n"
+            f"<body>\n<h1>Archive report</h1>\n<p>{total} posts</p>\n{images}\n"
+            f"<table>\n<tr><th>Topic</th><th>Posts</th></tr>\n{rows}\n</table>\n</body>\n</html>\n")
+    (output / "index.html").write_text(page, encoding="utf-8")
+    return drawn
+
+
+def main(argv=None):
+    from blogtools.manifest import PostManifest
+
+    parser = argparse.ArgumentParser(description="Chart the post archive")
+    parser.add_argument("--posts-dir", type=Path, default=Path("_posts"))
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT,
+                        help=f"directory for the charts and summary page (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every post's statistics")
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    with PostManifest(args.posts_dir) as manifest, CorpusStats() as stats:
+        with metrics.phase("report.manifest"):
+            manifest.refresh()
+        if args.rebuild:
+            stats.reset()
+        with metrics.phase("report.stats"):
+            added, removed = stats.sync(manifest, args.posts_dir)
+        with metrics.phase("report.render"):
+            drawn = render(stats, args.output)
+    print(f"Report: {added} posts analyzed, {removed} removed, "
+          f"{len(drawn)} chart(s) redrawn in {time.perf_counter() - began:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
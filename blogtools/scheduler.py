@@ -0,0 +1,238 @@
+"""
+History-aware topic scheduling
+
+Replaces a uniform ``random.choice`` over topics with a scheduler that
+remembers when each topic and template was last published. A topic
+that was used rests for ``cooldown_days`` before it can be drawn again.
+Templates avoid repeating any of the last ``template_cooldown`` posts.
+Topics can carry weights and per-month seasonal boosts.
+
+Eligible topics sit in a Fenwick tree of weights, so a weighted draw
+costs O(log n). Topics in cooldown have zero weight and wait in a heap
+ordered by the day they become eligible again. Catalogues of tens of
+thousands of topics stay fast. The history persists as JSON, so a run
+starts without rescanning the archive.
+
+pick() never changes the schedule; only record() does. Topics are moved
+back into the tree by record(), up to the latest day recorded, so picks
+for any date in any order (previews, backfills of past dates, reruns)
+see the same cooldowns. A pick before that day checks every topic.
+"""
+
+import heapq
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+DEFAULT_STATE = Path(".blog") / "scheduler_state.json"
+
+
+class _FenwickTree:
+    """Prefix sums over topic weights with O(log n) update and sampling"""
+
+    def __init__(self, weights):
+        self.size = len(weights)
+        self.weights = list(weights)
+        self.tree = [0.0] * (self.size + 1)
+        for i, weight in enumerate(self.weights, 1):
+            self.tree[i] += weight
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+        self.total = sum(self.weights)
+
+    def set(self, index, weight):
+        delta = weight - self.weights[index]
+        if not delta:
+            return
+        self.weights[index] = weight
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, value):
+        """Index whose cumulative weight range contains ``value``"""
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self.tree[nxt] <= value:
+                position = nxt
+                value -= self.tree[nxt]
+            step >>= 1
+        return min(position, self.size - 1)
+
+
+class TopicScheduler:
+    """Weighted topic and template picker with per-item cooldowns"""
+
+    def __init__(self, topics, templates, cooldown_days=14, template_cooldown=1,
+                 weights=None, seasonal=None, template_weights=None):
+        self.topics = list(topics)
+        self.templates = list(templates)
+        self.cooldown_days = max(1, cooldown_days)
+        self.template_cooldown = min(template_cooldown, len(self.templates) - 1)
+        self.seasonal = seasonal or {}
+        self._index = {topic: i for i, topic in enumerate(self.topics)}
+        weights = weights or {}
+        self._base = [float(weights.get(topic, 1.0)) for topic in self.topics]
+        template_weights = template_weights or {}
+        self._template_weights = [float(template_weights.get(t, 1.0)) for t in self.templates]
+        self._last_used = {}
+        self._recent_templates = []
+        self._cooling = []
+        # Cooldowns ending on or before this day have been moved into the tree
+        self._released = -1
+        self._month = None
+        self._tree = _FenwickTree(self._base)
+
+    def _weight(self, index):
+        boost = self.seasonal.get(self._month, {}).get(self.topics[index], 1.0)
+        return self._base[index] * boost
+
+    def _apply_season(self, month):
+        if month == self._month:
+            return
+        touched = set(self.seasonal.get(self._month, {})) | set(self.seasonal.get(month, {}))
+        self._month = month
+        for topic in touched:
+            index = self._index.get(topic)
+            if index is not None and self._tree.weights[index]:
+                self._tree.set(index, self._weight(index))
+
+    def _release(self, day):
+        """Return topics whose cooldown has ended to the weighted pool"""
+        while self._cooling and self._cooling[0][0] <= day:
+            ready, index = heapq.heappop(self._cooling)
+            # Entries are left in place when a topic is used again; skip stale ones
+            if self._last_used.get(index, -1) + self.cooldown_days == ready:
+                self._tree.set(index, self._weight(index))
+        self._released = max(self._released, day)
+
+    def _ready(self, day):
+        """Topics still in the heap whose cooldown has ended by ``day``"""
+        ready, stack = [], [0]
+        while stack:
+            position = stack.pop()
+            if position >= len(self._cooling) or self._cooling[position][0] > day:
+                continue
+            until, index = self._cooling[position]
+            if self._last_used.get(index, -1) + self.cooldown_days == until:
+                ready.append(index)
+            stack += (2 * position + 1, 2 * position + 2)
+        return ready
+
+    def _draw(self, day, rng):
+        """Weighted draw among topics eligible on ``day``, or None if there are none"""
+        if day >= self._released:
+            extra = self._ready(day)
+            extra_weights = [self._weight(index) for index in extra]
+            total = self._tree.total + sum(extra_weights)
+            if total <= 0:
+                return None
+            value = rng.random() * total
+            if value < self._tree.total:
+                index = self._tree.find(value)
+                return index if self._tree.weights[index] else None
+            value -= self._tree.total
+            for index, weight in zip(extra, extra_weights):
+                if value < weight:
+                    return index
+                value -= weight
+            return extra[-1] if extra else None
+        # Earlier than a recorded post: the tree is ahead of this day, check every topic
+        eligible = [i for i in range(len(self.topics))
+                    if self._last_used.get(i, -self.cooldown_days) + self.cooldown_days <= day]
+        weights = [self._weight(i) for i in eligible]
+        total = sum(weights)
+        if total <= 0:
+            return None
+        value = rng.random() * total
+        for index, weight in zip(eligible, weights):
+            if value < weight:
+                return index
+            value -= weight
+        return eligible[-1]
+
+    def pick(self, when, rng, exclude=()):
+        """Choose (topic, template) for a post published on ``when``; changes nothing"""
+        day = when.toordinal()
+        self._apply_season(when.month)
+
+        index = self._draw(day, rng)
+        if index is not None and self.topics[index] in exclude:
+            index = None
+        if index is None:
+            # Everything is cooling down (or excluded): take the longest-rested topic
+            candidates = [i for i in range(len(self.topics)) if self.topics[i] not in exclude]
+            index = min(candidates, key=lambda i: (self._last_used.get(i, -1), rng.random()))
+
+        recent = set(self._recent_templates[-self.template_cooldown:]) if self.template_cooldown else set()
+        options = [(t, w) for t, w in zip(self.templates, self._template_weights) if t not in recent and w > 0]
+        template = rng.choices([t for t, _ in options], weights=[w for _, w in options])[0]
+        return self.topics[index], template
+
+    def record(self, topic, template, when):
+        """Mark ``topic`` and ``template`` as published on ``when``"""
+        day = when.toordinal()
+        index = self._index.get(topic)
+        if index is not None and day >= self._last_used.get(index, -1):
+            self._last_used[index] = day
+            self._tree.set(index, 0.0)
+            heapq.heappush(self._cooling, (day + self.cooldown_days, index))
+        self._release(max(day, self._released))
+        if template in self.templates:
+            self._recent_templates.append(template)
+            del self._recent_templates[:-max(1, self.template_cooldown)]
+
+    def last_used(self, topic):
+        day = self._last_used.get(self._index.get(topic))
+        return date.fromordinal(day) if day is not None else None
+
+    def to_dict(self):
+        return {
+            "topics": {self.topics[i]: date.fromordinal(day).isoformat()
+                       for i, day in self._last_used.items()},
+            "recent_templates": self._recent_templates,
+        }
+
+    def load_history(self, history):
+        """Replay a saved or reconstructed {topic: 'YYYY-MM-DD'} history"""
+        weights = list(self._tree.weights)
+        for topic, used in history.get("topics", {}).items():
+            index = self._index.get(topic)
+            if index is not None:
+                day = date.fromisoformat(used).toordinal()
+                if day > self._last_used.get(index, -1):
+                    self._last_used[index] = day
+                    weights[index] = 0.0
+        # Bulk rebuild instead of one O(log n) update per topic
+        self._tree = _FenwickTree(weights)
+        self._cooling = [(day + self.cooldown_days, index) for index, day in self._last_used.items()]
+        heapq.heapify(self._cooling)
+        self._release(max(self._last_used.values(), default=-1))
+        for template in history.get("recent_templates", []):
+            self.record(None, template, date.min)
+
+    def save(self, path=DEFAULT_STATE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, topics, templates, path=DEFAULT_STATE, manifest=None, **options):
+        """Restore from ``path``, or rebuild history from ``manifest`` if missing"""
+        scheduler = cls(topics, templates, **options)
+        try:
+            with open(path, encoding="utf-8") as f:
+                history = json.load(f)
+        except (FileNotFoundError, ValueError):
+            history = manifest.history() if manifest is not None else {}
+        scheduler.load_history(history)
+        return scheduler
@@ -0,0 +1,335 @@
+"""
+Sharded client-side search index
+
+Builds an inverted index over _posts (title, tags, excerpt and body) for
+the static search page at /search/. The index is split so a query only
+downloads what it needs:
+
+- ``shards/<prefix>.json`` holds every term starting with a two-character
+  prefix. Each term maps to a flat list of postings,
+  ``[gap, weight, gap, weight, ...]``, where gaps are the differences
+  between successive document ids.
+- ``docs/<n>.json`` holds result metadata (url, title, date, excerpt)
+  for document ids ``n * DOC_CHUNK`` up to the next chunk.
+- ``meta.json`` lists the shards that exist, the document count and the
+  terms too common to index.
+
+Terms found in more than COMMON_RATIO of posts are listed as common.
+For a common term, the shards keep only the posts that carry it in
+their title or tags. If it is that common in titles and tags too, it
+is left out entirely. Template boilerplate therefore never grows a
+shard with the archive. A common term with no postings matches
+everything.
+
+Postings and document ids live in .blog/search_state.sqlite3. Each run
+re-tokenizes only posts whose hash changed in the manifest, then
+rewrites just the shards and document chunks those posts touch. The
+posts to look at come from git when it can say what changed since the
+last build (blogtools.changes), and no post changed means no work.
+
+    python -m blogtools.search [--dest _site/search] [--force]
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from pathlib import Path
+
+from blogtools import metrics
+from blogtools.changes import StageState
+from blogtools.frontmatter import split_front_matter
+from blogtools.manifest import PostManifest, split_filename
+from blogtools.site import as_list, parse_post_date, post_url
+
+DEFAULT_STATE = Path(".blog") / "search_state.sqlite3"
+DEFAULT_DEST = Path("_site") / "search"
+PREFIX_LENGTH = 2
+DOC_CHUNK = 200
+COMMON_RATIO = 0.05
+# Posts analyzed and written per transaction
+BATCH = 1000
+# Per-occurrence weight of each field; a term's weight in a post is capped at 255
+FIELD_WEIGHTS = {"title": 8, "tags": 4, "excerpt": 2, "body": 1}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    sha256 TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    date TEXT NOT NULL,
+    excerpt TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    weight INTEGER NOT NULL,
+    heading INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL,
+    heading_df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_MARKUP_RE = re.compile(r"<[^>]+>|[#*_`>|\[\]()]")
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be been before being below
+between both but by can did do does doing down during each few for from further had has
+have having here how i if in into is it its itself just me more most my no nor not now of
+off on once only or other our out over own same she should so some such than that the
+their them then there these they this those through to too under until up very was we
+were what when where which while who whom why will with you your
+""".split())
+
+
+def tokenize(text):
+    """Lowercase index terms in ``text``: two characters or longer, no stopwords"""
+    return [w for w in _WORD_RE.findall(text.lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+def prefix(term):
+    return term[:PREFIX_LENGTH]
+
+
+def _write_json(path, value):
+    """Atomically replace ``path`` unless it already holds the same JSON"""
+    data = json.dumps(value, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+
+def analyze(name, text):
+    """Return (doc fields, {term: (weight, in title or tags)}) for one post file"""
+    date_part, slug = split_filename(name)
+    front, body = split_front_matter(text)
+    front = front or {}
+    date = parse_post_date(front.get("date"), date_part)
+    categories = as_list(front.get("categories") or front.get("category"))
+    title = str(front.get("title") or slug.replace("-", " ").title())
+    excerpt = str(front.get("excerpt") or "")
+    fields = {
+        "title": title,
+        "tags": " ".join(str(tag).replace("-", " ") for tag in as_list(front.get("tags"))),
+        "excerpt": excerpt,
+        "body": _MARKUP_RE.sub(" ", body),
+    }
+    weights = Counter()
+    heading = set()
+    for field, value in fields.items():
+        counts = Counter(tokenize(value))
+        for term, count in counts.items():
+            weights[term] += count * FIELD_WEIGHTS[field]
+        if field in ("title", "tags"):
+            heading.update(counts)
+    doc = {"url": post_url(date, slug, categories), "title": title,
+           "date": date.strftime("%Y-%m-%d"), "excerpt": excerpt}
+    return doc, {term: (min(weight, 255), term in heading) for term, weight in weights.items()}
+
+
+class SearchIndex:
+    """Incrementally maintained, prefix-sharded search index"""
+
+    def __init__(self, manifest, dest=DEFAULT_DEST, state_path=DEFAULT_STATE):
+        self.manifest = manifest
+        self.dest = Path(dest)
+        Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(state_path)
+        self._db.executescript(SCHEMA)
+        self._db.execute("ATTACH DATABASE ? AS manifest", (str(manifest.path),))
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _remove_docs(self, ids, prefixes):
+        """Drop postings for ``ids``, collecting the prefixes they touched"""
+        for doc in ids:
+            rows = self._db.execute("SELECT term, heading FROM postings WHERE doc = ?", (doc,)).fetchall()
+            prefixes.update(prefix(term) for term, _ in rows)
+            self._db.executemany("UPDATE terms SET df = df - 1, heading_df = heading_df - ? WHERE term = ?",
+                                 ((heading, term) for term, heading in rows))
+            self._db.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+        self._db.execute("DELETE FROM terms WHERE df <= 0")
+
+    def _add_docs(self, analyzed, prefixes, chunks):
+        """Store analyzed posts with one sorted bulk insert of their postings"""
+        postings = []
+        df = Counter()
+        heading_df = Counter()
+        for path, sha, doc_id, doc, weights in analyzed:
+            values = (sha, doc["url"], doc["title"], doc["date"], doc["excerpt"])
+            if doc_id is None:
+                doc_id = self._db.execute(
+                    "INSERT INTO docs (path, sha256, url, title, date, excerpt) VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, *values)).lastrowid
+            else:
+                self._db.execute("UPDATE docs SET sha256 = ?, url = ?, title = ?, date = ?, excerpt = ? "
+                                 "WHERE id = ?", (*values, doc_id))
+            chunks.add(doc_id // DOC_CHUNK)
+            for term, (weight, heading) in weights.items():
+                postings.append((term, doc_id, weight, heading))
+                df[term] += 1
+                heading_df[term] += heading
+        prefixes.update(prefix(term) for term in df)
+        # Inserting in primary-key order keeps the B-tree appends cheap
+        postings.sort()
+        self._db.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", postings)
+        self._db.executemany(
+            "INSERT INTO terms VALUES (?, ?, ?) ON CONFLICT (term) DO UPDATE "
+            "SET df = df + excluded.df, heading_df = heading_df + excluded.heading_df",
+            ((term, count, heading_df[term]) for term, count in sorted(df.items())))
+
+    def _common_terms(self):
+        """(common terms, terms too common to index even from headings)"""
+        total = self._db.execute("SELECT count(*) FROM docs").fetchone()[0]
+        if total < 10:
+            return set(), set()
+        limit = total * COMMON_RATIO
+        rows = self._db.execute("SELECT term, heading_df FROM terms WHERE df > ?", (limit,)).fetchall()
+        return {term for term, _ in rows}, {term for term, heading_df in rows if heading_df > limit}
+
+    def _write_shard(self, shard, common, dropped):
+        postings = {}
+        for term, doc, weight, heading in self._db.execute(
+                "SELECT term, doc, weight, heading FROM postings WHERE term >= ? AND term < ? "
+                "ORDER BY term, doc", (shard, shard + "\uffff")):
+            if term in dropped or (term in common and not heading):
+                continue
+            encoded = postings.setdefault(term, [0])
+            # encoded[0] tracks the previous doc id while building
+            encoded.extend((doc - encoded[0], weight))
+            encoded[0] = doc
+        path = self.dest / "shards" / f"{shard}.json"
+        if not postings:
+            path.unlink(missing_ok=True)
+            return False
+        return _write_json(path, {term: encoded[1:] for term, encoded in postings.items()})
+
+    def _write_chunk(self, chunk):
+        rows = self._db.execute(
+            "SELECT id, url, title, date, excerpt FROM docs WHERE id >= ? AND id < ? ORDER BY id",
+            (chunk * DOC_CHUNK, (chunk + 1) * DOC_CHUNK)).fetchall()
+        path = self.dest / "docs" / f"{chunk}.json"
+        if not rows:
+            path.unlink(missing_ok=True)
+            return False
+        return _write_json(path, {str(row[0]): list(row[1:]) for row in rows})
+
+    def build(self, force=False, changes=None):
+        """Bring the index under ``dest`` up to date; returns a dict of what was done
+
+        ``changes`` is an optional ChangeSet of _posts since the last build.
+        """
+        began = time.perf_counter()
+        with metrics.phase("search.manifest"):
+            self.manifest.refresh(changes=changes)
+        # Fresh state or a missing output directory (e.g. a new _site) needs every file again
+        force = (force or not (self.dest / "meta.json").exists()
+                 or not self._db.execute("SELECT 1 FROM docs LIMIT 1").fetchone())
+        if force:
+            with self._db:
+                self._db.execute("DELETE FROM postings")
+                self._db.execute("DELETE FROM terms")
+                self._db.execute("UPDATE docs SET sha256 = ''")
+
+        changed = list(self._db.execute(
+            "SELECT m.path, m.sha256, d.id FROM manifest.posts m LEFT JOIN docs d ON d.path = m.path "
+            "WHERE d.sha256 IS NULL OR d.sha256 != m.sha256"))
+        removed = list(self._db.execute(
+            "SELECT id FROM docs WHERE path NOT IN (SELECT path FROM manifest.posts)"))
+
+        prefixes, chunks = set(), set()
+        with metrics.phase("search.update"), self._db:
+            self._remove_docs([doc_id for doc_id, in removed], prefixes)
+            chunks.update(doc_id // DOC_CHUNK for doc_id, in removed)
+            self._db.executemany("DELETE FROM docs WHERE id = ?", removed)
+            for i in range(0, len(changed), BATCH):
+                batch = changed[i:i + BATCH]
+                with metrics.phase("search.tokenize"):
+                    analyzed = [(path, sha, doc_id, *analyze(path, (self.manifest.posts_dir / path)
+                                                             .read_text(encoding="utf-8")))
+                                for path, sha, doc_id in batch]
+                self._remove_docs([doc_id for _, _, doc_id in batch if doc_id is not None], prefixes)
+                self._add_docs(analyzed, prefixes, chunks)
+
+            # Terms that crossed a threshold either way change their shard too
+            common, dropped = self._common_terms()
+            previous = json.loads(self._meta("common") or "[[], []]")
+            prefixes.update(prefix(term) for term in common ^ set(previous[0]))
+            prefixes.update(prefix(term) for term in dropped ^ set(previous[1]))
+            if force:
+                prefixes.update(prefix(term) for term, in self._db.execute("SELECT term FROM terms"))
+                chunks.update(doc_id // DOC_CHUNK for doc_id, in self._db.execute("SELECT id FROM docs"))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('common', ?)",
+                             (json.dumps([sorted(common), sorted(dropped)]),))
+
+        with metrics.phase("search.write"):
+            shards_written = sum(self._write_shard(shard, common, dropped) for shard in sorted(prefixes))
+            chunks_written = sum(self._write_chunk(chunk) for chunk in sorted(chunks))
+            shard_dir = self.dest / "shards"
+            shards = sorted(p.stem for p in shard_dir.glob("*.json")) if shard_dir.exists() else []
+            total = self._db.execute("SELECT count(*) FROM docs").fetchone()[0]
+            _write_json(self.dest / "meta.json", {
+                "docs": total, "doc_chunk": DOC_CHUNK, "prefix_length": PREFIX_LENGTH,
+                "shards": shards, "common": sorted(common), "stopwords": sorted(STOPWORDS),
+            })
+        return {
+            "posts_indexed": len(changed),
+            "posts_removed": len(removed),
+            "shards_written": shards_written,
+            "doc_chunks_written": chunks_written,
+            "seconds": round(time.perf_counter() - began, 3),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally build the site search index")
+    parser.add_argument("--posts-dir", type=Path, default=Path("_posts"))
+    parser.add_argument("--dest", type=Path, default=DEFAULT_DEST,
+                        help=f"output directory (default: {DEFAULT_DEST})")
+    parser.add_argument("--force", action="store_true", help="rebuild every shard")
+    args = parser.parse_args(argv)
+
+    state = StageState()
+    changes = None if args.force else state.changes("search", [args.posts_dir])
+    if changes is not None and not changes and (args.dest / "meta.json").exists():
+        print("Search: no post changed since the last build")
+        return
+    with PostManifest(args.posts_dir) as manifest, SearchIndex(manifest, args.dest) as index:
+        report = index.build(force=args.force, changes=changes)
+    state.mark_built("search", [args.posts_dir])
+    print(", ".join(f"{key.replace('_', ' ')}: {value}" for key, value in report.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Generator service
+
+Runs CybersecurityBlogGenerator as a long-lived local HTTP service so
+previews and new posts skip interpreter start, imports, template
+compilation and scheduler loading. Templates, the topic scheduler, the
+duplicate index and fetched headlines stay in memory between requests.
+
+    GET  /health
+    GET  /preview?topic=...&template=...&date=YYYY-MM-DD
+    POST /posts   {"date": "YYYY-MM-DD", "publish": false}
+
+A preview renders a post without writing it or touching the schedule;
+every parameter is optional and missing ones are picked the way the
+next post would pick them. POST /posts does what a cron run does:
+schedule, render, check for duplicates, write, record and optionally
+queue the post for publishing. A worker thread drains the publish queue
+in the background, so the request never waits on git or the network.
+Writes are serialized; previews render in parallel.
+
+At most --max-concurrent requests are handled at a time and the rest
+get 503 with Retry-After. SIGTERM or SIGINT stops accepting connections,
+waits for in-flight requests to finish, stops the publish worker and
+saves the scheduler state. Posts still queued are published next time.
+
+    python -m blogtools.server [--host 127.0.0.1] [--port 8000]
+"""
+
+import argparse
+import json
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from blogtools import metrics
+from blogtools.manifest import PostManifest
+from blogtools.publish import GitPublisher
+from blogtools.publish_queue import PublishQueue
+from blogtools.writer import post_lock
+
+MAX_BODY = 64 * 1024
+
+
+class RequestError(Exception):
+    """A request that can't be served; carries the HTTP status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") + timedelta(hours=10)
+    except (TypeError, ValueError):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"invalid date '{value}', expected YYYY-MM-DD") from None
+
+
+class PublishWorker(threading.Thread):
+    """Drains the publish queue whenever posts are added"""
+
+    def __init__(self, poll=60):
+        super().__init__(name="publish-worker")
+        self.poll = poll
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+        self.join()
+
+    def run(self):
+        # SQLite connections stay on the thread that opened them
+        with PublishQueue() as queue:
+            publisher = GitPublisher()
+            while not self._stopping.is_set():
+                if len(queue):
+                    queue.drain(publisher, stop=self._stopping)
+                self._wake.wait(self.poll)
+                self._wake.clear()
+
+
+class GeneratorService:
+    """Warm generator state shared by every request"""
+
+    def __init__(self, generator, posts_dir, max_similarity=0.95, publisher=None):
+        from generate_content import SCHEDULER_STATE
+
+        self.generator = generator
+        self.posts_dir = Path(posts_dir)
+        self.state_path = SCHEDULER_STATE
+        # Scheduler, manifest and duplicate index are only touched under this lock
+        self._write_lock = threading.Lock()
+        # One feed refresh at a time; concurrent ones would race on the cache file
+        self._news_lock = threading.Lock()
+        self.started = time.time()
+        self.posts_created = 0
+
+        with PostManifest(self.posts_dir) as manifest:
+            manifest.refresh()
+            self.scheduler = generator.make_scheduler(manifest, self.state_path)
+            self.duplicates = None
+            if max_similarity <= 1:
+                from blogtools.dedup import DuplicateIndex
+
+                self.duplicates = DuplicateIndex(threshold=max_similarity)
+                self.duplicates.sync(manifest, self.posts_dir)
+        self.news("")
+        self.publisher = publisher
+        if publisher is not None:
+            publisher.start()
+
+    def news(self, topic):
+        with self._news_lock:
+            return tuple(self.generator.get_cybersecurity_news(topic))
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "posts_created": self.posts_created,
+            "topics": len(self.generator.topics),
+            "templates": self.generator.templates.names,
+        }
+
+    def preview(self, topic=None, template=None, date=None):
+        """Render a post in memory; returns (filename, content, topic, template)"""
+        from generate_content import PostSpec
+
+        when = _parse_date(date) if date else datetime.now()
+        if template is not None and template not in self.generator.templates.names:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"unknown template '{template}'")
+        rng = random.Random(f"{when:%Y-%m-%d}#preview")
+        if topic is None or template is None:
+            # pick() leaves the schedule alone for any date; the lock only keeps
+            # it from reading the scheduler halfway through a create()
+            with self._write_lock:
+                picked_topic, picked_template = self.scheduler.pick(when, rng)
+            topic = topic or picked_topic
+            template = template or picked_template
+        spec = PostSpec(when, topic, template, rng.getrandbits(64), self.news(topic))
+        filename, content = self.generator.render_post(spec)
+        return filename, content, topic, template
+
+    def create(self, date=None, publish=False):
+        """Write the post for ``date`` (default: now) the way a cron run would"""
+        from blogtools.dedup import DuplicatePostError
+
+        when = _parse_date(date) if date else datetime.now()
+        if publish and self.publisher is None:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "publishing is disabled on this server")
+        # create_blog_post fetches headlines itself, so it holds the news lock too.
+        # post_lock keeps a cron run of generate_content.py off the same date.
+        with self._write_lock, self._news_lock, post_lock(when), PostManifest(self.posts_dir) as manifest:
+            manifest.refresh()
+            existing = manifest.post_for_date(f"{when:%Y-%m-%d}")
+            if existing:
+                raise RequestError(HTTPStatus.CONFLICT, f"a post already exists for {when:%Y-%m-%d}: {existing}")
+            try:
+                post_path = self.generator.create_blog_post(when, self.posts_dir, manifest, self.scheduler,
+                                                            self.duplicates)
+            except DuplicatePostError as e:
+                raise RequestError(HTTPStatus.CONFLICT, str(e)) from None
+            self.scheduler.save(self.state_path)
+            self.posts_created += 1
+            if publish:
+                self.generator.queue_for_publishing(post_path)
+                self.publisher.notify()
+        return post_path
+
+    def close(self):
+        if self.publisher is not None:
+            self.publisher.stop()
+        with self._write_lock:
+            self.scheduler.save(self.state_path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.0: one request per connection, so idle keep-alives never hold up shutdown
+    server_version = "BlogGenerator/1.0"
+
+    def _send(self, status, payload, content_type="application/json"):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, route):
+        if not self.server.slots.acquire(blocking=False):
+            self.close_connection = True
+            self._send(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "too many concurrent requests"})
+            return
+        try:
+            with metrics.phase(f"server.{self.command.lower()}"):
+                self._send(*route())
+        except RequestError as e:
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            self.log_error("%s failed: %r", self.path, e)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+        finally:
+            self.server.slots.release()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/health":
+            self._dispatch(lambda: (HTTPStatus.OK, self.server.service.health()))
+        elif url.path == "/preview":
+            self._dispatch(lambda: self._preview(query))
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no route for GET {url.path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path == "/posts":
+            self._dispatch(self._create)
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"no route for POST {url.path}"})
+
+    def _preview(self, query):
+        filename, content, topic, template = self.server.service.preview(
+            query.get("topic"), query.get("template"), query.get("date"))
+        if query.get("format") == "markdown":
+            return HTTPStatus.OK, content.encode("utf-8"), "text/markdown; charset=utf-8"
+        return HTTPStatus.OK, {"filename": filename, "topic": topic, "template": template, "content": content}
+
+    def _create(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > MAX_BODY:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "request body is not valid JSON") from None
+        if not isinstance(body, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "request body must be a JSON object")
+        post_path = self.server.service.create(body.get("date"), bool(body.get("publish")))
+        return HTTPStatus.CREATED, {"path": str(post_path)}
+
+
+class GeneratorServer(ThreadingHTTPServer):
+    """Thread-per-request server that lets in-flight requests finish on close"""
+
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, address, service, max_concurrent=4):
+        super().__init__(address, _Handler)
+        self.service = service
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+
+
+def serve(server):
+    """Serve until SIGTERM/SIGINT, then drain requests and save state"""
+    def stop(signum, frame):
+        print(f"Received signal {signum}, shutting down")
+        # shutdown() waits for serve_forever, so it can't run on this thread
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+def main(argv=None):
+    from generate_content import POSTS_DIR, CybersecurityBlogGenerator
+
+    parser = argparse.ArgumentParser(description="Serve post previews and generation over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--posts-dir", type=Path, default=POSTS_DIR)
+    parser.add_argument("--max-concurrent", type=int, default=4,
+                        help="requests handled at once; more get 503 (default: 4)")
+    parser.add_argument("--max-similarity", type=float, default=0.95, metavar="RATIO",
+                        help="duplicate threshold for new posts (default: 0.95; above 1 disables the check)")
+    parser.add_argument("--no-publish", dest="publish", action="store_false",
+                        help="don't run the publish worker or accept publish requests")
+    parser.add_argument("--no-news", dest="news_feeds", action="store_const", const=[],
+                        help="don't fetch news headlines")
+    args = parser.parse_args(argv)
+
+    began = time.perf_counter()
+    generator = CybersecurityBlogGenerator(news_feeds=args.news_feeds)
+    publisher = PublishWorker() if args.publish and Path(".git").exists() else None
+    service = GeneratorService(generator, args.posts_dir, args.max_similarity, publisher)
+    server = GeneratorServer((args.host, args.port), service, args.max_concurrent)
+    print(f"Serving on http://{args.host}:{server.server_port} "
+          f"(ready in {time.perf_counter() - began:.2f}s)")
+    serve(server)
+
+
+if __name__ == "__main__":
+    main()
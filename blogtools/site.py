@@ -0,0 +1,779 @@
+"""
+Incremental static site build
+
+Renders _posts/*.md and the site's pages into _site without a full
+Jekyll build. Build state lives in .blog/site_state.sqlite3 and records,
+for every post, the content hash it was rendered from plus the metadata
+listing pages need. Dependencies are tracked explicitly:
+
+- a post page depends on its source file, _templates/post.html,
+  _config.yml and its entry in _data/related_posts.json
+- a page that uses ``site.posts`` (blog/index.html) and the Atom feed
+  depend on the newest LISTING_SIZE posts and the post count
+- an archive page depends on the posts it lists and its neighbours'
+  URLs, see below
+- other pages and static files depend only on themselves
+
+Changed posts are found by joining against the post manifest, so adding
+one post re-renders that post, the listing pages and the feed, and
+nothing else. Post rendering fans out across a process pool for large
+rebuilds.
+
+Archives list every post (/posts/), each tag (/tags/<tag>/), category
+(/categories/<category>/) and month (/archive/YYYY/MM/), rendered with
+_templates/archive.html. Numbered pages are filled oldest first, so
+page 1 always holds a listing's first ARCHIVE_PAGE_SIZE posts and a new
+post only lands on the last page; the listing's index page shows the
+newest posts. A changed post marks its listings dirty from its date on,
+and only pages from that point are checked against their digests.
+
+sitemap.xml lists pages, archive indexes and posts. Past SITEMAP_LIMIT
+URLs it becomes a sitemap index over sitemaps/pages.xml and fixed
+chunks of SITEMAP_CHUNK posts, oldest first, so a new post rewrites
+only the last chunk. The sitemap and feed are replaced atomically.
+
+Each run records the commit it built from (see blogtools.changes); when
+git reports no change to the source or _data/related_posts.json since,
+the run stops after two git calls. Otherwise the changed posts are
+handed to the manifest, so a fresh checkout isn't re-hashed in full.
+
+Pages keep their Liquid markup; the subset the site uses (``limit:``
+and filter arguments) is translated to Jinja2 before rendering.
+
+    python -m blogtools.site [--force] [--jobs N]
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from blogtools import metrics
+from blogtools.changes import StageState
+from blogtools.deps import optional_import
+from blogtools.frontmatter import split_front_matter
+from blogtools.manifest import PostManifest, split_filename
+
+DEFAULT_STATE = Path(".blog") / "site_state.sqlite3"
+TEMPLATES_DIR = "_templates"
+RELATED_DATA = Path("_data") / "related_posts.json"
+LISTING_SIZE = 10
+ARCHIVE_PAGE_SIZE = 20
+SITEMAP_LIMIT = 50000
+SITEMAP_CHUNK = 10000
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    date TEXT NOT NULL,
+    author TEXT,
+    excerpt TEXT,
+    categories TEXT NOT NULL,
+    tags TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_date ON posts (date);
+CREATE TABLE IF NOT EXISTS related (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_posts (
+    key TEXT NOT NULL,
+    date TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (key, date, path)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dirty_archives (
+    key TEXT PRIMARY KEY,
+    since TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_pages (
+    path TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archive_pages_key ON archive_pages (key, page);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_LIQUID_LIMIT_RE = re.compile(r"(\{%-?\s*for\s+\w+\s+in\s+[\w.]+)\s+limit:\s*(\d+)")
+_LIQUID_FILTER_ARGS_RE = re.compile(
+    r"\|\s*(\w+):\s*((?:\"[^\"]*\"|'[^']*'|[^|}%\"'])+?)\s*(?=\||\}\}|%\})")
+_TAG_RE = re.compile(r"<[^>]+>")
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def load_config(source="."):
+    yaml = optional_import("yaml", "core")
+    try:
+        with open(Path(source) / "_config.yml", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return value.split()
+    return [str(v) for v in value]
+
+
+def parse_post_date(value, fallback):
+    """Front matter dates come as datetimes or strings like '2025-09-13 10:00:00 +0000'"""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        for fmt in ("%Y-%m-%d %H:%M:%S %z", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+            try:
+                parsed = datetime.strptime(value.strip(), fmt)
+                return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+    return datetime.strptime(fallback, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def post_url(date, slug, categories):
+    """URL for the ``/:categories/:year/:month/:day/:title/`` permalink"""
+    parts = [c.lower().replace(" ", "-") for c in categories]
+    parts += [f"{date:%Y}", f"{date:%m}", f"{date:%d}", slug]
+    return "/" + "/".join(parts) + "/"
+
+
+def slugify(name):
+    return _SLUG_RE.sub("-", str(name).lower()).strip("-")
+
+
+def archive_keys(date, categories, tags):
+    """Archive listings a post appears in, named by their URL path"""
+    keys = {"posts", f"archive/{date[:4]}/{date[5:7]}"}
+    keys.update(f"categories/{slug}" for slug in map(slugify, categories) if slug)
+    keys.update(f"tags/{slug}" for slug in map(slugify, tags) if slug)
+    return keys
+
+
+def archive_title(key):
+    kind, _, name = key.partition("/")
+    if kind == "tags":
+        return f"Posts tagged {name}"
+    if kind == "categories":
+        return f"{name.replace('-', ' ').title()} posts"
+    if kind == "archive":
+        year, month = name.split("/")
+        return datetime(int(year), int(month), 1).strftime("Posts from %B %Y")
+    return "All posts"
+
+
+def liquid_to_jinja(source):
+    """Translate the Liquid subset used by the site's pages to Jinja2"""
+    source = _LIQUID_LIMIT_RE.sub(r"\1[:\2]", source)
+    return _LIQUID_FILTER_ARGS_RE.sub(r"| \1(\2) ", source)
+
+
+def _date_filter(value, fmt):
+    if value == "now":
+        value = datetime.now(timezone.utc)
+    elif isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime(fmt)
+
+
+def _truncate_filter(value, length=50, ellipsis="..."):
+    value = str(value)
+    return value if len(value) <= length else value[:max(0, length - len(ellipsis))] + ellipsis
+
+
+def make_environment(source="."):
+    jinja2 = optional_import("jinja2", "build")
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(Path(source) / TEMPLATES_DIR)),
+        autoescape=jinja2.select_autoescape(["html", "xml"]),
+        undefined=jinja2.ChainableUndefined,
+    )
+    env.filters.update(
+        date=_date_filter,
+        date_to_xmlschema=lambda value: value.isoformat(),
+        slugify=slugify,
+        strip_html=lambda value: _TAG_RE.sub("", str(value)),
+        truncate=_truncate_filter,
+    )
+    return env
+
+
+class PostList(list):
+    """List of post dicts that also answers Liquid's ``.size``"""
+
+    def __init__(self, posts, size=None):
+        super().__init__(posts)
+        self.size = len(self) if size is None else size
+
+
+# Post fields shown on listing pages, after the path
+_LISTING_COLUMNS = "path, url, title, date, excerpt, categories, tags"
+
+
+def _archive_entries(path, listed):
+    """archive_posts rows for a post, from its listing columns"""
+    date, categories, tags = listed[2], listed[4], listed[5]
+    return [(key, date, path) for key in archive_keys(date, json.loads(categories), json.loads(tags))]
+
+
+def _row_to_post(row):
+    path, _, url, title, date, author, excerpt, categories, tags = row
+    return {"path": path, "url": url, "title": title, "date": datetime.fromisoformat(date),
+            "author": author, "excerpt": excerpt,
+            "categories": json.loads(categories), "tags": json.loads(tags)}
+
+
+# Per-process rendering state, set once by _init_worker
+_worker = None
+
+
+def _init_worker(source, dest, site):
+    global _worker
+    markdown = optional_import("markdown", "build")
+    env = make_environment(source)
+    _worker = {
+        "source": Path(source),
+        "dest": Path(dest),
+        "site": site,
+        "markdown": markdown.Markdown(extensions=["extra"]),
+        "layout": env.get_template("post.html"),
+    }
+
+
+def _first_paragraph(body):
+    for block in body.split("\n\n"):
+        block = block.strip()
+        if block and not block.startswith(("#", "-", "*", "|", ">", "1.")):
+            return block
+    return ""
+
+
+def _render_post(item):
+    """Render one post page; returns its posts-table row"""
+    name, sha, related = item
+    date_part, slug = split_filename(name)
+    with open(_worker["source"] / "_posts" / name, encoding="utf-8") as f:
+        front, body = split_front_matter(f.read())
+    front = front or {}
+    date = parse_post_date(front.get("date"), date_part)
+    categories = as_list(front.get("categories") or front.get("category"))
+    post = {
+        "title": str(front.get("title") or slug.replace("-", " ").title()),
+        "date": date,
+        "author": front.get("author"),
+        "excerpt": str(front.get("excerpt") or _first_paragraph(body)),
+        "categories": categories,
+        "tags": as_list(front.get("tags")),
+        "url": post_url(date, slug, categories),
+        "related": related,
+    }
+    converter = _worker["markdown"]
+    content = converter.reset().convert(body)
+    html = _worker["layout"].render(site=_worker["site"], post=post, content=content)
+
+    out = _worker["dest"] / post["url"].strip("/") / "index.html"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    data = html.encode("utf-8")
+    try:
+        unchanged = out.read_bytes() == data
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        out.write_bytes(data)
+    return (name, sha, post["url"], post["title"], date.isoformat(), post["author"],
+            post["excerpt"], json.dumps(categories), json.dumps(post["tags"]))
+
+
+def _write_atomic(path, data):
+    """Replace ``path`` with ``data`` unless it already holds it; True if written"""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+
+def _urlset(entries):
+    """Sitemap for (absolute URL, lastmod or None) pairs"""
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<urlset xmlns="{SITEMAP_NS}">']
+    for loc, lastmod in entries:
+        lastmod = f"<lastmod>{lastmod}</lastmod>" if lastmod else ""
+        lines.append(f"<url><loc>{escape(loc)}</loc>{lastmod}</url>")
+    lines.append("</urlset>\n")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _sitemap_index(locations):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', f'<sitemapindex xmlns="{SITEMAP_NS}">']
+    lines += [f"<sitemap><loc>{escape(loc)}</loc></sitemap>" for loc in locations]
+    lines.append("</sitemapindex>\n")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _remove_output(path, dest):
+    """Delete a generated file and any directories it leaves empty"""
+    path.unlink(missing_ok=True)
+    parent = path.parent
+    while parent != dest and parent.is_dir() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+
+class SiteBuilder:
+    """Incrementally renders the site from its sources into ``dest``"""
+
+    def __init__(self, source=".", dest="_site", manifest=None, state_path=DEFAULT_STATE, jobs=None):
+        self.source = Path(source)
+        self.dest = Path(dest)
+        self.jobs = jobs
+        self.manifest = manifest or PostManifest(self.source / "_posts")
+        self.config = load_config(self.source)
+        Path(state_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(state_path)
+        self._db.executescript(SCHEMA)
+        self._db.execute("ATTACH DATABASE ? AS manifest", (str(self.manifest.path),))
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _meta(self, key):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _site(self):
+        site = {k: v for k, v in self.config.items() if isinstance(v, (str, int, float, bool, list))}
+        site.setdefault("url", "")
+        site.setdefault("baseurl", "")
+        return site
+
+    def _layout_digest(self):
+        digest = hashlib.sha256()
+        for path in (self.source / TEMPLATES_DIR / "post.html", self.source / "_config.yml"):
+            if path.exists():
+                digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def _excluded(self, rel, name):
+        if name.startswith(("_", ".", "#", "~")) or name.endswith("~"):
+            return True
+        patterns = [str(p).rstrip("/") for p in self.config.get("exclude", [])]
+        return any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+    def _site_files(self):
+        """Relative paths of every page and static file Jekyll would publish"""
+        for root, dirs, files in os.walk(self.source):
+            rel_root = os.path.relpath(root, self.source)
+            rel_root = "" if rel_root == "." else rel_root
+            dirs[:] = [d for d in dirs if not self._excluded(os.path.join(rel_root, d), d)]
+            for name in files:
+                rel = os.path.join(rel_root, name)
+                if not self._excluded(rel, name):
+                    yield rel
+
+    def _related(self):
+        """Related-post lists by filename, with a digest of each list"""
+        try:
+            with open(self.source / RELATED_DATA, encoding="utf-8") as f:
+                related = json.load(f)
+        except FileNotFoundError:
+            related = {}
+        digests = {name: hashlib.sha256(json.dumps(items, sort_keys=True).encode("utf-8")).hexdigest()
+                   for name, items in related.items()}
+        return related, digests
+
+    def _build_posts(self, force):
+        layout = self._layout_digest()
+        if self._meta("layout_digest") != layout:
+            force = True
+        related, related_digests = self._related()
+        if force:
+            todo = list(self._db.execute("SELECT path, sha256 FROM manifest.posts"))
+        else:
+            todo = list(self._db.execute(
+                "SELECT m.path, m.sha256 FROM manifest.posts m LEFT JOIN posts s ON s.path = m.path "
+                "WHERE s.sha256 IS NULL OR s.sha256 != m.sha256"))
+            # Unchanged posts whose related list moved still need a new page
+            previous = dict(self._db.execute("SELECT path, digest FROM related"))
+            moved = {name for name, digest in related_digests.items() if previous.get(name) != digest}
+            moved |= previous.keys() - related_digests.keys()
+            moved -= {path for path, _ in todo}
+            if moved:
+                hashes = self.manifest.hashes()
+                todo += [(name, hashes[name]) for name in moved if name in hashes]
+        todo = [(path, sha, related.get(path, [])) for path, sha in todo]
+        removed = list(self._db.execute(
+            f"SELECT {_LISTING_COLUMNS} FROM posts WHERE path NOT IN (SELECT path FROM manifest.posts)"))
+        previous = {}
+        for i in range(0, len(todo), 900):
+            batch = [path for path, _, _ in todo[i:i + 900]]
+            previous.update((row[0], row[1:]) for row in self._db.execute(
+                f"SELECT {_LISTING_COLUMNS} FROM posts WHERE path IN ({','.join('?' * len(batch))})", batch))
+
+        site = self._site()
+        if len(todo) < 64 or self.jobs == 1:
+            _init_worker(self.source, self.dest, site)
+            rows = [_render_post(item) for item in todo]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            jobs = self.jobs or os.cpu_count() or 1
+            with ProcessPoolExecutor(jobs, initializer=_init_worker,
+                                     initargs=(self.source, self.dest, site)) as pool:
+                rows = list(pool.map(_render_post, todo, chunksize=max(1, len(todo) // (jobs * 4))))
+
+        # Posts that moved (new date or category) leave their old page behind
+        stale_urls = [row[1] for row in removed]
+        stale_urls += [previous[row[0]][0] for row in rows
+                       if row[0] in previous and previous[row[0]][0] != row[2]]
+        for url in stale_urls:
+            _remove_output(self.dest / url.strip("/") / "index.html", self.dest)
+
+        # Archive listings change only where a post's listed fields did
+        stale_entries = [entry for row in removed for entry in _archive_entries(row[0], row[1:])]
+        new_entries = []
+        for row in rows:
+            listed = (row[2], row[3], row[4], row[6], row[7], row[8])
+            before = previous.get(row[0])
+            if before != listed:
+                stale_entries += _archive_entries(row[0], before) if before else []
+                new_entries += _archive_entries(row[0], listed)
+        dirty = {}
+        for key, date, _ in stale_entries + new_entries:
+            dirty[key] = min(date, dirty.get(key, date))
+
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.executemany("DELETE FROM posts WHERE path = ?", [(path,) for path, *_ in removed])
+            self._db.executemany("INSERT OR REPLACE INTO related VALUES (?, ?)",
+                                 [(path, related_digests[path]) for path, _, _ in todo
+                                  if path in related_digests])
+            self._db.executemany("DELETE FROM related WHERE path = ?",
+                                 [(path,) for path, _, _ in todo if path not in related_digests]
+                                 + [(path,) for path, *_ in removed])
+            self._db.executemany("DELETE FROM archive_posts WHERE key = ? AND date = ? AND path = ?",
+                                 stale_entries)
+            self._db.executemany("INSERT OR REPLACE INTO archive_posts VALUES (?, ?, ?)", new_entries)
+            self._mark_archives(dirty.items())
+            if "posts" in dirty:
+                self._db.execute("INSERT INTO meta VALUES ('sitemap_since', ?) ON CONFLICT (key) DO UPDATE "
+                                 "SET value = min(value, excluded.value)", (dirty["posts"],))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('layout_digest', ?)", (layout,))
+        return len(rows), len(removed)
+
+    def _mark_archives(self, dirty):
+        """Record (key, date) pairs: the listing must be checked from that date on"""
+        self._db.executemany("INSERT INTO dirty_archives VALUES (?, ?) ON CONFLICT (key) DO UPDATE "
+                             "SET since = min(since, excluded.since)", dirty)
+
+    def listing(self, limit=LISTING_SIZE):
+        """The newest ``limit`` posts as a PostList whose size is the full count"""
+        rows = self._db.execute("SELECT * FROM posts ORDER BY date DESC, path DESC LIMIT ?", (limit,))
+        total = self._db.execute("SELECT count(*) FROM posts").fetchone()[0]
+        return PostList([_row_to_post(row) for row in rows], total)
+
+    def _build_pages(self, force):
+        """Render pages and copy static files whose inputs changed"""
+        env = make_environment(self.source)
+        site = self._site()
+        site["posts"] = self.listing()
+        listing_digest = hashlib.sha256(json.dumps(
+            [[p["url"], p["title"], p["date"].isoformat(), p["excerpt"], p["categories"]]
+             for p in site["posts"]] + [site["posts"].size]).encode("utf-8")).hexdigest()
+        config_digest = self._layout_digest()
+        previous = dict(self._db.execute("SELECT path, digest FROM outputs"))
+        current = {}
+        rendered = copied = 0
+
+        for rel in self._site_files():
+            src = self.source / rel
+            st = src.stat()
+            with open(src, "rb") as f:
+                is_page = f.read(3) == b"---"
+            if not is_page:
+                digest = f"static:{st.st_mtime_ns}:{st.st_size}"
+                current[rel] = digest
+                out = self.dest / rel
+                if force or previous.get(rel) != digest or not out.exists():
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(src, out)
+                    copied += 1
+                continue
+
+            text = src.read_text(encoding="utf-8")
+            parts = [hashlib.sha256(text.encode("utf-8")).hexdigest(), config_digest]
+            if "site.posts" in text:
+                parts.append(listing_digest)
+            digest = "page:" + ":".join(parts)
+            current[rel] = digest
+            out = self.dest / (rel[:-3] + ".html" if rel.endswith(".md") else rel)
+            if not force and previous.get(rel) == digest and out.exists():
+                continue
+            front, body = split_front_matter(text)
+            html = env.from_string(liquid_to_jinja(body)).render(site=site, page=front or {})
+            if rel.endswith(".md"):
+                html = optional_import("markdown", "build").markdown(html, extensions=["extra"])
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(html, encoding="utf-8")
+            rendered += 1
+
+        feed_template = self.source / TEMPLATES_DIR / "feed.xml"
+        if feed_template.exists():
+            digest = "feed:" + hashlib.sha256(feed_template.read_bytes()).hexdigest() + ":" + listing_digest
+            current["feed.xml"] = digest
+            out = self.dest / "feed.xml"
+            if force or previous.get("feed.xml") != digest or not out.exists():
+                _write_atomic(out, env.get_template("feed.xml").render(site=site).encode("utf-8"))
+                rendered += 1
+
+        gone = previous.keys() - current.keys()
+        for rel in gone:
+            _remove_output(self.dest / (rel[:-3] + ".html" if rel.endswith(".md") else rel), self.dest)
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO outputs VALUES (?, ?)", current.items())
+            self._db.executemany("DELETE FROM outputs WHERE path = ?", [(rel,) for rel in gone])
+        return rendered, copied, len(gone)
+
+    def _reindex_archives(self):
+        """Rebuild archive_posts from the posts table and mark every listing dirty"""
+        entries = [entry for row in self._db.execute(f"SELECT {_LISTING_COLUMNS} FROM posts")
+                   for entry in _archive_entries(row[0], row[1:])]
+        with self._db:
+            self._db.execute("DELETE FROM archive_posts")
+            self._db.executemany("INSERT OR REPLACE INTO archive_posts VALUES (?, ?, ?)", entries)
+            keys = {key for key, _, _ in entries}
+            keys.update(key for key, in self._db.execute("SELECT DISTINCT key FROM archive_pages"))
+            self._mark_archives((key, "") for key in keys)
+
+    def _archive_pages(self, key, since):
+        """Yield (page, output path, posts, newer url, older url) for pages to check
+
+        Page 0 is the listing's index. Numbered pages before the one
+        holding ``since`` can't have changed and are skipped; the old and
+        new last pages are always included since their links change.
+        """
+        size = ARCHIVE_PAGE_SIZE
+        total, before = self._db.execute(
+            "SELECT count(*), count(CASE WHEN date < ? THEN 1 END) FROM archive_posts WHERE key = ?",
+            (since, key)).fetchone()
+        pages = -(-total // size)
+        if not pages:
+            return
+        last_rendered = self._db.execute("SELECT max(page) FROM archive_pages WHERE key = ?",
+                                         (key,)).fetchone()[0] or pages
+        first = max(1, min(before // size + 1, pages, last_rendered))
+
+        query = ("SELECT p.path, p.sha256, p.url, p.title, p.date, p.author, p.excerpt, p.categories, p.tags "
+                 "FROM archive_posts a JOIN posts p ON p.path = a.path WHERE a.key = ? ")
+        base = "/" + key + "/"
+        rows = self._db.execute(query + "ORDER BY a.date DESC, a.path DESC LIMIT ?", (key, size))
+        yield 0, base, [_row_to_post(row) for row in rows], None, \
+            f"{base}page/{pages - 1}/" if pages > 1 else None
+
+        rows = self._db.execute(query + "ORDER BY a.date, a.path LIMIT -1 OFFSET ?", (key, (first - 1) * size))
+        for page in range(first, pages + 1):
+            posts = [_row_to_post(row) for row in rows.fetchmany(size)]
+            posts.reverse()
+            newer = f"{base}page/{page + 1}/" if page < pages else base
+            older = f"{base}page/{page - 1}/" if page > 1 else None
+            yield page, f"{base}page/{page}/", posts, newer, older
+
+    def _build_archives(self, force):
+        """Render the archive pages of dirty listings whose content changed"""
+        template_path = self.source / TEMPLATES_DIR / "archive.html"
+        if not template_path.exists():
+            return 0, 0
+        layout = hashlib.sha256(template_path.read_bytes() + self._layout_digest().encode("ascii")
+                                + str(ARCHIVE_PAGE_SIZE).encode("ascii")).hexdigest()
+        if force or self._meta("archive_digest") != layout:
+            self._reindex_archives()
+            force = True
+        template = make_environment(self.source).get_template("archive.html")
+        site = self._site()
+        rendered = removed = 0
+
+        for key, since in list(self._db.execute("SELECT key, since FROM dirty_archives")):
+            previous = dict(self._db.execute("SELECT path, digest FROM archive_pages WHERE key = ?", (key,)))
+            current = {}
+            last = 0
+            for page, url, posts, newer, older in self._archive_pages(key, since):
+                last = max(last, page)
+                digest = hashlib.sha256(json.dumps(
+                    [layout, newer, older] + [[p["url"], p["title"], p["date"].isoformat(), p["excerpt"]]
+                                              for p in posts]).encode("utf-8")).hexdigest()
+                rel = url.strip("/") + "/index.html"
+                current[rel] = (page, digest)
+                out = self.dest / rel
+                if not force and previous.get(rel) == digest and out.exists():
+                    continue
+                archive = {"key": key, "title": archive_title(key), "url": url, "page": page}
+                html = template.render(site=site, archive=archive, posts=PostList(posts),
+                                       newer_url=newer, older_url=older)
+                out.parent.mkdir(parents=True, exist_ok=True)
+                out.write_text(html, encoding="utf-8")
+                rendered += 1
+
+            gone = [rel for rel, in self._db.execute(
+                "SELECT path FROM archive_pages WHERE key = ? AND (page > ? OR ? = 0)", (key, last, last))]
+            for rel in gone:
+                _remove_output(self.dest / rel, self.dest)
+            removed += len(gone)
+            with self._db:
+                self._db.executemany("INSERT OR REPLACE INTO archive_pages VALUES (?, ?, ?, ?)",
+                                     [(rel, key, page, digest) for rel, (page, digest) in current.items()])
+                self._db.executemany("DELETE FROM archive_pages WHERE path = ?", [(rel,) for rel in gone])
+                self._db.execute("DELETE FROM dirty_archives WHERE key = ? AND since = ?", (key, since))
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('archive_digest', ?)", (layout,))
+        return rendered, removed
+
+    def _sitemap_pages(self):
+        """URLs of the site's pages and archive indexes, sorted"""
+        urls = ["/" + key + "/" for key, in self._db.execute("SELECT key FROM archive_pages WHERE page = 0")]
+        for rel, digest in self._db.execute("SELECT path, digest FROM outputs"):
+            rel = Path(rel).as_posix()
+            is_page = rel.endswith(".html") or rel.endswith(".md") and digest.startswith("page:")
+            if not is_page or rel == "404.html":
+                continue
+            url = "/" + (rel[:-3] + ".html" if rel.endswith(".md") else rel)
+            urls.append(url[:-len("index.html")] if url.endswith("/index.html") else url)
+        return sorted(urls)
+
+    def _post_entries(self, base, offset=0, limit=-1):
+        rows = self._db.execute("SELECT url, date FROM posts ORDER BY date, path LIMIT ? OFFSET ?",
+                                (limit, offset))
+        return [(base + url, date[:10]) for url, date in rows]
+
+    def _build_sitemap(self, force):
+        """Bring sitemap.xml (and past SITEMAP_LIMIT, its chunks) up to date
+
+        Returns the number of sitemap files written.
+        """
+        site = self._site()
+        base = str(site["url"]).rstrip("/") + str(site["baseurl"]).rstrip("/")
+        pages = [(base + url, None) for url in self._sitemap_pages()]
+        pages_digest = hashlib.sha256(json.dumps([self._layout_digest(), pages]).encode("utf-8")).hexdigest()
+        since = self._meta("sitemap_since")
+        total = self._db.execute("SELECT count(*) FROM posts").fetchone()[0]
+        mode = "single" if len(pages) + total <= SITEMAP_LIMIT else "index"
+        out = self.dest / "sitemap.xml"
+        chunk_dir = self.dest / "sitemaps"
+        if not force and since is None and out.exists() and self._meta("sitemap_pages") == pages_digest \
+                and self._meta("sitemap_mode") == mode:
+            return 0
+
+        written = 0
+        if mode == "single":
+            written += _write_atomic(out, _urlset(pages + self._post_entries(base)))
+            chunk_files = list(chunk_dir.glob("*.xml")) if chunk_dir.is_dir() else []
+            for path in chunk_files:
+                _remove_output(path, self.dest)
+        else:
+            chunks = -(-total // SITEMAP_CHUNK)
+            first = 1
+            if not force and since is not None and self._meta("sitemap_mode") == "index":
+                before = self._db.execute("SELECT count(*) FROM posts WHERE date < ?", (since,)).fetchone()[0]
+                first = before // SITEMAP_CHUNK + 1
+            written += _write_atomic(chunk_dir / "pages.xml", _urlset(pages))
+            for chunk in range(1, chunks + 1):
+                path = chunk_dir / f"posts-{chunk}.xml"
+                if chunk >= first or not path.exists():
+                    entries = self._post_entries(base, (chunk - 1) * SITEMAP_CHUNK, SITEMAP_CHUNK)
+                    written += _write_atomic(path, _urlset(entries))
+            for path in chunk_dir.glob("posts-*.xml"):
+                if int(path.stem.split("-")[1]) > chunks:
+                    _remove_output(path, self.dest)
+            locations = [f"{base}/sitemaps/pages.xml"]
+            locations += [f"{base}/sitemaps/posts-{chunk}.xml" for chunk in range(1, chunks + 1)]
+            written += _write_atomic(out, _sitemap_index(locations))
+
+        with self._db:
+            self._db.execute("DELETE FROM meta WHERE key = 'sitemap_since'")
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('sitemap_pages', ?)", (pages_digest,))
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('sitemap_mode', ?)", (mode,))
+        return written
+
+    def build(self, force=False, changes=None):
+        """Bring ``dest`` up to date; returns a dict of what was done
+
+        ``changes`` is an optional ChangeSet of the source since the last
+        build, which spares the manifest a scan of _posts.
+        """
+        began = time.perf_counter()
+        self.dest.mkdir(parents=True, exist_ok=True)
+        with metrics.phase("site.manifest"):
+            self.manifest.refresh(changes=changes)
+        with metrics.phase("site.posts"):
+            posts_rendered, posts_removed = self._build_posts(force)
+        with metrics.phase("site.pages"):
+            pages_rendered, static_copied, outputs_removed = self._build_pages(force)
+        with metrics.phase("site.archives"):
+            archives_rendered, archives_removed = self._build_archives(force)
+        with metrics.phase("site.sitemap"):
+            sitemaps_written = self._build_sitemap(force)
+        return {
+            "posts_rendered": posts_rendered,
+            "posts_removed": posts_removed,
+            "pages_rendered": pages_rendered,
+            "static_copied": static_copied,
+            "outputs_removed": outputs_removed,
+            "archives_rendered": archives_rendered,
+            "archives_removed": archives_removed,
+            "sitemaps_written": sitemaps_written,
+            "seconds": round(time.perf_counter() - began, 3),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally build the site into _site")
+    parser.add_argument("--source", default=".", help="site source directory (default: .)")
+    parser.add_argument("--dest", default="_site", help="output directory (default: _site)")
+    parser.add_argument("--jobs", type=int, help="worker processes for post rendering")
+    parser.add_argument("--force", action="store_true", help="rebuild everything")
+    args = parser.parse_args(argv)
+
+    dest = Path(args.source) / args.dest
+    state = StageState(args.source)
+    changes = None if args.force else state.changes("site", ["."], [RELATED_DATA])
+    if changes is not None and not changes and dest.is_dir():
+        print("Site: nothing changed since the last build")
+        return
+    with SiteBuilder(args.source, dest, jobs=args.jobs) as builder:
+        report = builder.build(force=args.force, changes=changes)
+    state.mark_built("site", ["."], [RELATED_DATA])
+    print(", ".join(f"{key.replace('_', ' ')}: {value}" for key, value in report.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Startup profiling
+
+Re-runs a command under ``python -X importtime`` and summarises where
+interpreter startup time went, so import regressions on the cron path
+are easy to spot.
+"""
+
+import subprocess
+import sys
+import time
+
+IMPORTTIME_PREFIX = "import time:"
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into (module, self_us, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        fields = line[len(IMPORTTIME_PREFIX):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return rows
+
+
+def profile_startup(script, argv, top=15):
+    """Run ``script argv`` with -X importtime and print an import report
+
+    The command really runs, so pair this with side-effect free options
+    such as --check-today when only the startup cost is of interest.
+    Returns the exit status of the profiled command.
+    """
+    began = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", script, *argv],
+                            stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - began
+
+    rows = parse_importtime(result.stderr)
+    other_stderr = [line for line in result.stderr.splitlines()
+                    if not line.startswith(IMPORTTIME_PREFIX)]
+    if other_stderr:
+        print("\n".join(other_stderr), file=sys.stderr)
+
+    total_us = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+    print(f"\nStartup profile: {len(rows)} modules imported in {total_us / 1000:.1f} ms "
+          f"(process wall time {wall * 1000:.1f} ms)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        print(f"{cumulative / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+    return result.returncode
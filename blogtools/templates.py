@@ -0,0 +1,1113 @@
+"""
+Blog post template registry
+
+Each template is split once at import time into static text chunks and
+named slots, so rendering a post is a single join over precomputed parts
+and only the chosen template is ever rendered.
+
+Slots listed in VARIANTS vary between posts: a Phrasing picks one of
+several wordings of a passage, a Figure picks a statistic from a range
+and a Selection picks some items of a list, keeping their order. Every
+option is compiled like a template, and a post's choices are indices
+into those options. They are drawn from one NumPy Generator call per
+template, a row of uniform keys per post. render_batch() draws the keys
+for a whole batch at once, so rendering thousands of posts costs one
+draw plus the joins.
+"""
+
+import hashlib
+import html
+import random
+import re
+from itertools import accumulate
+from string import Formatter
+from urllib.parse import quote, urlsplit
+
+from blogtools.deps import optional_import
+
+# company_type -> (industry, size, revenue) used by the case study template
+COMPANY_PROFILES = {
+    "Fortune 500 manufacturer": ("Manufacturing", "15,000+ employees", "$5B+ annually"),
+    "Regional healthcare system": ("Healthcare", "5,000+ employees", "$1B+ annually"),
+    "Growing technology company": ("Technology", "500+ employees", "$100M+ annually"),
+    "Financial services firm": ("Financial Services", "500+ employees", "$100M+ annually"),
+}
+COMPANY_TYPES = list(COMPANY_PROFILES)
+
+
+# Markdown punctuation a feed title could use to start a link, emphasis or code
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_\[\]()#+\-!|~])")
+# Characters left as they are in a news link; anything else is percent-encoded
+_URL_SAFE = ";/?:@&=+$,-_.!~*#%"
+
+
+def _escape_title(title):
+    """A feed title as inert Markdown text: no HTML, links, emphasis or Liquid"""
+    text = _MARKDOWN_SPECIAL.sub(r"\\\1", " ".join(title.split()))
+    # Entities last, so their '#' isn't escaped
+    text = html.escape(text, quote=True)
+    return text.replace("{", "&#123;").replace("}", "&#125;")
+
+
+def _safe_link(link):
+    """An http(s) feed link, percent-encoded so it can't close the Markdown link; None otherwise"""
+    if not link:
+        return None
+    parts = urlsplit(link.strip())
+    if parts.scheme.lower() not in ("http", "https") or not parts.netloc:
+        return None
+    return quote(parts.geturl(), safe=_URL_SAFE)
+
+
+def _news_section(ctx):
+    """Markdown list of the headlines passed in as ``news``, or nothing
+
+    Headlines come from third-party feeds and end up in the page as HTML,
+    so titles are escaped and only http(s) links are kept.
+    """
+    if not ctx["news"]:
+        return ""
+    lines = []
+    for item in ctx["news"]:
+        title = _escape_title(item.title)
+        link = _safe_link(item.link)
+        lines.append(f"- [{title}]({link})" if link else f"- {title}")
+    return "## In the News\n\n" + "\n".join(lines) + "\n\n"
+
+
+# Slot resolvers: each derives one slot value from the render context.
+# Values are computed at most once per render and only if the template uses them.
+SLOT_RESOLVERS = {
+    "topic_lower": lambda ctx: ctx["topic"].lower(),
+    "company_type": lambda ctx: ctx.rng.choice(COMPANY_TYPES),
+    "company_industry": lambda ctx: COMPANY_PROFILES[ctx["company_type"]][0],
+    "company_size": lambda ctx: COMPANY_PROFILES[ctx["company_type"]][1],
+    "company_revenue": lambda ctx: COMPANY_PROFILES[ctx["company_type"]][2],
+    "news_section": _news_section,
+}
+
+
+class RenderContext(dict):
+    """Slot values for one render, resolved lazily through SLOT_RESOLVERS"""
+
+    def __init__(self, rng, **values):
+        super().__init__(values)
+        self.rng = rng
+
+    def __missing__(self, key):
+        try:
+            resolver = SLOT_RESOLVERS[key]
+        except KeyError:
+            raise KeyError(f"No value or resolver for template slot '{key}'") from None
+        value = self[key] = resolver(self)
+        return value
+
+
+class Phrasing:
+    """Interchangeable wordings of a passage; a post gets one of them"""
+
+    keys = picks = 1
+
+    def __init__(self, *options):
+        self.options = [Template(None, option.strip()) for option in options]
+        self.source = "\x1e".join(option.text for option in self.options)
+
+    def pick(self, keys):
+        return (keys * len(self.options)).astype("intp")
+
+    def render(self, chosen, context):
+        return self.options[chosen[0]].render(context)
+
+
+class Figure:
+    """A statistic drawn from ``low`` to ``high`` in steps of ``step``"""
+
+    keys = picks = 1
+
+    def __init__(self, low, high, step=1, fmt="{}"):
+        self.low = low
+        self.step = step
+        self.count = int(round((high - low) / step)) + 1
+        self.fmt = fmt
+        self.source = f"{low}:{high}:{step}:{fmt}"
+
+    def pick(self, keys):
+        return (keys * self.count).astype("intp")
+
+    def render(self, chosen, context):
+        return self.fmt.format(self.low + int(chosen[0]) * self.step)
+
+
+class Selection:
+    """``k`` of a list's items, in list order, as a bulleted or numbered list"""
+
+    def __init__(self, k, *items, numbered=False):
+        self.items = [Template(None, item.strip()) for item in items]
+        self.keys = len(items)
+        self.picks = k
+        self.numbered = numbered
+        self.source = f"{k}:{numbered}:" + "\x1e".join(item.text for item in self.items)
+
+    def pick(self, keys):
+        # The k smallest of one random key per item are a uniform k-subset
+        chosen = keys.argsort(axis=1)[:, :self.picks]
+        chosen.sort(axis=1)
+        return chosen
+
+    def render(self, chosen, context):
+        if self.numbered:
+            return "\n".join(f"{n}. {self.items[i].render(context)}" for n, i in enumerate(chosen, 1))
+        return "\n".join(f"- {self.items[i].render(context)}" for i in chosen)
+
+
+class Template:
+    """A template compiled into static chunks with slot positions"""
+
+    def __init__(self, name, text, variants=None):
+        self.name = name
+        self.text = text
+        parts = []
+        positions = []
+        for literal, field, _spec, _conversion in Formatter().parse(text):
+            if literal:
+                parts.append(literal)
+            if field is not None:
+                positions.append((len(parts), field))
+                parts.append(None)
+        self._parts = parts
+        self._positions = tuple(positions)
+        self.slots = tuple(dict.fromkeys(field for _, field in positions))
+
+        # (slot, variant, first key column, first pick column) per variant slot
+        layout = []
+        self.key_width = self.pick_width = 0
+        for field in self.slots:
+            variant = (variants or {}).get(field)
+            if variant is not None:
+                layout.append((field, variant, self.key_width, self.pick_width))
+                self.key_width += variant.keys
+                self.pick_width += variant.picks
+        self._variants = tuple(layout)
+
+    @property
+    def variants(self):
+        """{slot: variant} for the slots that vary between posts"""
+        return {field: variant for field, variant, _, _ in self._variants}
+
+    def pick(self, generator, count):
+        """Variant choices for ``count`` posts as a (count, pick_width) index array"""
+        np = optional_import("numpy", "core")
+        keys = generator.random((count, self.key_width))
+        picks = np.empty((count, self.pick_width), np.intp)
+        for _, variant, key, pick in self._variants:
+            picks[:, pick:pick + variant.picks] = variant.pick(keys[:, key:key + variant.keys])
+        return picks
+
+    def render(self, context, picks=None):
+        """Fill every slot from the context and join the parts once
+
+        ``picks`` is this post's row from pick(); without it the choices
+        are drawn from a NumPy Generator seeded from ``context.rng``.
+        """
+        if not self._positions:
+            return self.text
+        if self._variants:
+            if picks is None:
+                np = optional_import("numpy", "core")
+                picks = self.pick(np.random.default_rng(context.rng.getrandbits(64)), 1)[0]
+            for field, variant, _, pick in self._variants:
+                if field not in context:
+                    context[field] = variant.render(picks[pick:pick + variant.picks], context)
+        parts = self._parts.copy()
+        for index, field in self._positions:
+            parts[index] = context[field]
+        return "".join(parts)
+
+
+class TemplateRegistry:
+    """Named templates with pluggable selection weights"""
+
+    def __init__(self, variants=None):
+        self._templates = {}
+        self._weights = {}
+        self._cum_weights = None
+        self._variants = dict(variants or {})
+
+    def register(self, name, text, weight=1.0):
+        self._templates[name] = Template(name, text.strip(), self._variants)
+        self._weights[name] = weight
+        self._cum_weights = None
+
+    def set_weights(self, weights):
+        """Override selection weights; templates not listed keep their weight"""
+        for name, weight in weights.items():
+            if name not in self._templates:
+                raise KeyError(f"Unknown template: {name}")
+            self._weights[name] = weight
+        self._cum_weights = None
+
+    @property
+    def names(self):
+        return list(self._templates)
+
+    @property
+    def weights(self):
+        return dict(self._weights)
+
+    def __getitem__(self, name):
+        return self._templates[name]
+
+    def fingerprint(self):
+        """Hash of every registered template's name and text, and of the variants it uses"""
+        digest = hashlib.sha256()
+        for name, template in self._templates.items():
+            digest.update(f"{name}\x00{template.text}\x00".encode("utf-8"))
+            for field, variant in template.variants.items():
+                digest.update(f"{field}\x00{type(variant).__name__}\x00{variant.source}\x00".encode("utf-8"))
+        return digest.hexdigest()
+
+    def choose(self, rng=random):
+        """Pick a template name according to the selection weights"""
+        if self._cum_weights is None:
+            self._names = list(self._weights)
+            self._cum_weights = list(accumulate(self._weights.values()))
+        return rng.choices(self._names, cum_weights=self._cum_weights)[0]
+
+    def render(self, name, topic, author_bio, rng=random, news=()):
+        context = RenderContext(rng, topic=topic, author_bio=author_bio, news=news)
+        return self._templates[name].render(context)
+
+    def render_batch(self, name, topics, author_bio, seed=None, news=()):
+        """Render ``name`` once per topic, drawing every post's variants in one call
+
+        The batch is reproducible from ``seed`` as a whole; a post in it
+        won't match render() of the same topic with some other seed.
+        """
+        np = optional_import("numpy", "core")
+        template = self._templates[name]
+        topics = list(topics)
+        picks = template.pick(np.random.default_rng(seed), len(topics))
+        rng = random.Random(seed)
+        return [template.render(RenderContext(rng, topic=topic, author_bio=author_bio, news=news), row)
+                for topic, row in zip(topics, picks)]
+
+
+TECHNICAL_GUIDE = """
+# {topic}: A Comprehensive Technical Guide
+
+## Executive Summary
+
+{guide_summary}
+
+## Introduction
+
+{guide_intro}
+
+## Technical Overview
+
+### Core Components
+
+The implementation of {topic_lower} involves several key technical components:
+
+{guide_components}
+
+### Implementation Strategy
+
+A successful {topic_lower} implementation requires a phased approach:
+
+**Phase 1: Assessment and Planning**
+{guide_phase_assess}
+
+**Phase 2: Pilot Implementation**
+{guide_phase_pilot}
+
+**Phase 3: Full Deployment**
+{guide_phase_deploy}
+
+## Best Practices and Recommendations
+
+### Strategic Considerations
+
+1. **Business Alignment**: Ensure security initiatives support business objectives
+2. **Risk-Based Approach**: Focus resources on highest-impact areas
+3. **Stakeholder Engagement**: Maintain clear communication with all stakeholders
+4. **Continuous Improvement**: Establish processes for ongoing optimization
+
+### Common Pitfalls to Avoid
+
+{guide_pitfalls}
+
+## Measuring Success
+
+Key performance indicators for {topic_lower} implementation include:
+
+- **Security Metrics**: Reduction in security incidents, improved detection times
+- **Operational Metrics**: System performance, user satisfaction
+- **Business Metrics**: Compliance status, risk reduction, cost optimization
+
+## Future Considerations
+
+The cybersecurity landscape continues to evolve, and organizations must remain agile in their approach to {topic_lower}. Emerging trends include:
+
+{trends}
+
+## Conclusion
+
+{guide_conclusion}
+
+{closing}
+
+{news_section}---
+
+*About the Author: {author_bio}*
+"""
+
+INDUSTRY_ANALYSIS = """
+# {topic}: Industry Trends and Strategic Insights
+
+## Market Overview
+
+{analysis_overview}
+
+## Current Market Dynamics
+
+### Investment Trends
+
+Organizations are increasingly recognizing the strategic importance of {topic_lower}, with cybersecurity budgets reflecting this priority:
+
+- Enterprise spending on related technologies has increased by {spending_growth}% year-over-year
+- SMB adoption is accelerating due to improved accessibility and reduced costs
+- Regulatory requirements are driving compliance-focused investments
+
+### Technology Evolution
+
+The landscape of {topic_lower} is characterized by rapid innovation:
+
+**Emerging Technologies**
+{analysis_technologies}
+
+**Market Consolidation**
+- Strategic acquisitions by major vendors
+- Platform integration initiatives
+- Ecosystem partnership development
+
+## Industry Challenges
+
+### Common Implementation Hurdles
+
+Organizations face several key challenges when implementing {topic_lower}:
+
+{analysis_challenges}
+
+### Regulatory Landscape
+
+The regulatory environment continues to evolve, with new requirements impacting {topic_lower}:
+
+- Enhanced data protection regulations
+- Industry-specific compliance mandates
+- Cross-border data transfer restrictions
+- Incident reporting requirements
+
+## Strategic Recommendations
+
+### For Enterprise Organizations
+
+Large enterprises should focus on:
+- Comprehensive risk assessment and strategy development
+- Multi-year implementation planning
+- Executive leadership engagement
+- Cross-functional team collaboration
+
+### for Mid-Market Companies
+
+Mid-market organizations should prioritize:
+- Cost-effective solution selection
+- Phased implementation approaches
+- Managed service provider partnerships
+- Compliance automation tools
+
+### For Small Businesses
+
+Small businesses should consider:
+- Cloud-based security solutions
+- Managed security services
+- Industry-specific security frameworks
+- Cybersecurity insurance integration
+
+## Future Outlook
+
+### Technology Trends
+
+The future of {topic_lower} will be shaped by several key trends:
+
+**Automation and AI**
+- Increased use of artificial intelligence for threat detection
+- Automated response and remediation capabilities
+- Predictive security analytics
+
+**Zero Trust Architecture**
+- Continued adoption of zero trust principles
+- Identity-centric security models
+- Micro-segmentation strategies
+
+**Cloud Security Evolution**
+- Cloud-native security tools
+- Multi-cloud security management
+- Serverless security considerations
+
+### Market Predictions
+
+Industry analysts predict continued growth and evolution in the {topic_lower} space:
+
+- Market size expected to double within {market_doubling_years} years
+{analysis_predictions}
+
+## Conclusion
+
+{analysis_conclusion}
+
+{closing}
+
+{news_section}---
+
+*About the Author: {author_bio}*
+"""
+
+BEST_PRACTICES = """
+# {topic}: Essential Best Practices for Security Leaders
+
+## Introduction
+
+{practices_intro}
+
+## Foundation Principles
+
+### Strategic Alignment
+
+Every {topic_lower} initiative must align with broader business objectives:
+
+{practices_alignment}
+
+### Governance Framework
+
+Establishing proper governance is crucial for success:
+
+1. **Policy Development**: Create comprehensive, enforceable policies
+2. **Roles and Responsibilities**: Define clear ownership and accountability
+3. **Decision-Making Process**: Establish efficient approval workflows
+4. **Regular Review Cycles**: Ensure policies remain current and effective
+
+## Implementation Best Practices
+
+### Planning and Preparation
+
+**Comprehensive Assessment**
+- Conduct thorough current-state analysis
+- Identify gaps and vulnerabilities
+- Document existing processes and systems
+- Establish baseline metrics
+
+**Resource Planning**
+- Determine budget requirements
+- Identify skill gaps and training needs
+- Plan for adequate staffing
+- Consider third-party support requirements
+
+### Execution Excellence
+
+**Phased Deployment**
+- Start with pilot programs
+- Gather feedback and lessons learned
+- Refine approach based on results
+- Scale gradually across organization
+
+**Change Management**
+- Communicate benefits clearly
+- Provide comprehensive training
+- Address user concerns proactively
+- Celebrate quick wins
+
+### Operational Considerations
+
+**Monitoring and Metrics**
+
+Establish comprehensive monitoring to ensure ongoing success:
+
+- **Performance Metrics**: Track system performance and availability
+- **Security Metrics**: Monitor threat detection and response times
+- **Business Metrics**: Measure impact on business operations
+- **User Experience**: Track adoption and satisfaction levels
+
+**Continuous Improvement**
+
+{topic} is not a one-time implementation but an ongoing process:
+
+- Regular security assessments
+- Technology refresh planning
+- Process optimization
+- Skills development programs
+
+## Common Pitfalls and How to Avoid Them
+
+### Technical Pitfalls
+
+**Over-Engineering Solutions**
+- Focus on business requirements, not technical complexity
+- Prioritize user experience and operational efficiency
+- Avoid unnecessary customization
+
+**Inadequate Testing**
+- Implement comprehensive testing protocols
+- Include both technical and user acceptance testing
+- Plan for rollback procedures
+
+### Organizational Pitfalls
+
+**Insufficient Stakeholder Engagement**
+- Identify all affected stakeholders early
+- Maintain regular communication
+- Address concerns promptly and transparently
+
+**Neglecting Training and Support**
+- Develop comprehensive training programs
+- Provide ongoing support resources
+- Establish feedback mechanisms
+
+## Industry-Specific Considerations
+
+### Healthcare
+
+Healthcare organizations face unique challenges:
+- HIPAA compliance requirements
+- Patient safety considerations
+- Complex IT environments
+- Limited downtime windows
+
+### Financial Services
+
+Financial institutions must address:
+- Regulatory compliance (PCI, SOX, etc.)
+- High availability requirements
+- Customer trust and reputation
+- Sophisticated threat landscape
+
+### Manufacturing
+
+Manufacturing companies should consider:
+- Operational technology integration
+- Supply chain security
+- Legacy system constraints
+- Safety and reliability requirements
+
+## Measuring Success
+
+### Key Performance Indicators
+
+Track these essential metrics:
+
+**Security KPIs**
+{practices_security_kpis}
+
+**Operational KPIs**
+{practices_operational_kpis}
+
+**Business KPIs**
+- Cost savings achieved
+- Revenue protection
+- Customer satisfaction
+- Competitive advantage
+
+## Future-Proofing Your Implementation
+
+### Technology Evolution
+
+Stay ahead of technological changes:
+- Monitor emerging threats and solutions
+- Plan for technology refresh cycles
+- Maintain vendor relationships
+- Invest in staff development
+
+### Regulatory Changes
+
+Prepare for evolving compliance requirements:
+- Monitor regulatory developments
+- Participate in industry forums
+- Maintain documentation and audit trails
+- Plan for requirement changes
+
+## Conclusion
+
+{practices_conclusion}
+
+{closing}
+
+{news_section}---
+
+*About the Author: {author_bio}*
+"""
+
+CASE_STUDY = """
+# {topic}: Real-World Implementation Case Study
+
+## Executive Summary
+
+{case_summary}
+
+## Organization Background
+
+### Company Profile
+
+Our client, a {company_type}, faced increasing cybersecurity challenges as their business expanded and threat landscape evolved. Key characteristics included:
+
+- **Industry**: {company_industry}
+- **Size**: {company_size}
+- **Revenue**: {company_revenue}
+- **IT Environment**: Hybrid cloud infrastructure with legacy systems
+
+### Initial Challenges
+
+The organization faced several critical security challenges:
+
+1. **Legacy Infrastructure**: Aging systems with limited security capabilities
+2. **Compliance Requirements**: Increasing regulatory obligations
+3. **Threat Sophistication**: Advanced persistent threats targeting their industry
+4. **Resource Constraints**: Limited cybersecurity staff and budget
+5. **Business Growth**: Rapid expansion creating new security risks
+
+## Project Objectives
+
+### Primary Goals
+
+The {topic_lower} implementation aimed to achieve:
+
+- **Enhanced Security Posture**: Improve threat detection and response capabilities
+- **Regulatory Compliance**: Meet industry-specific requirements
+- **Operational Efficiency**: Streamline security processes and reduce manual tasks
+- **Risk Reduction**: Minimize potential business impact from cyber incidents
+- **Scalability**: Support future business growth and technology evolution
+
+### Success Metrics
+
+Key performance indicators included:
+- {response_cut}% reduction in security incident response time
+- 90% compliance with regulatory requirements
+- {false_positive_target}% reduction in false positive alerts
+- Zero tolerance for unplanned security-related downtime
+
+## Implementation Strategy
+
+### Phase 1: Assessment and Planning (Months 1-2)
+
+**Current State Analysis**
+- Comprehensive security assessment
+- Gap analysis against industry standards
+- Risk evaluation and prioritization
+- Technology inventory and evaluation
+
+**Strategic Planning**
+- Implementation roadmap development
+- Resource allocation and budgeting
+- Stakeholder engagement strategy
+- Change management planning
+
+### Phase 2: Foundation Building (Months 3-4)
+
+**Infrastructure Preparation**
+- Hardware and software procurement
+- Network architecture updates
+- Security policy development
+- Staff training initiation
+
+**Pilot Implementation**
+- Limited scope deployment
+- Initial testing and validation
+- Process refinement
+- Feedback collection and analysis
+
+### Phase 3: Full Deployment (Months 5-8)
+
+**Organization-Wide Rollout**
+- Phased deployment across all locations
+- Comprehensive user training
+- Process documentation
+- Performance monitoring
+
+**Integration and Optimization**
+- System integration with existing tools
+- Process optimization based on usage data
+- Fine-tuning of security policies
+- Incident response procedure updates
+
+### Phase 4: Stabilization and Enhancement (Months 9-12)
+
+**Operations Establishment**
+- 24/7 monitoring implementation
+- Incident response team training
+- Vendor relationship management
+- Regular review and reporting processes
+
+## Challenges and Solutions
+
+### Technical Challenges
+
+**Legacy System Integration**
+- *Challenge*: Integrating modern security tools with legacy infrastructure
+- *Solution*: Implemented hybrid architecture with API-based connectors and gradual system modernization plan
+
+**Performance Impact**
+- *Challenge*: Security measures affecting system performance
+- *Solution*: Optimized configurations, implemented performance monitoring, and established baseline metrics
+
+### Organizational Challenges
+
+**Change Resistance**
+- *Challenge*: User resistance to new security processes
+- *Solution*: Comprehensive change management program including training, communication, and incentives
+
+**Resource Constraints**
+- *Challenge*: Limited internal cybersecurity expertise
+- *Solution*: Partnership with managed security service provider and aggressive staff development program
+
+## Results and Outcomes
+
+### Security Improvements
+
+**Threat Detection**
+- {detection_gain}% improvement in threat detection accuracy
+- {false_positive_cut}% reduction in false positive alerts
+- {identification_gain}% faster incident identification
+
+**Response Capabilities**
+- {response_cut}% reduction in incident response time
+- {containment_gain}% improvement in containment effectiveness
+- 95% of incidents resolved within SLA requirements
+
+### Business Impact
+
+**Operational Benefits**
+- Zero security-related business disruptions
+- 30% reduction in security-related helpdesk tickets
+- 20% improvement in user productivity
+
+**Financial Results**
+- ROI of {roi}% within {roi_months} months
+- {premium_cut}% reduction in cyber insurance premiums
+- Avoided estimated ${breach_costs}M in potential breach costs
+
+### Compliance Achievements
+
+- 100% compliance with industry regulations
+- Successful completion of all regulatory audits
+- Recognition as industry security leader
+
+## Lessons Learned
+
+### Key Success Factors
+
+{case_success_factors}
+
+### Areas for Improvement
+
+- Earlier involvement of end-users in planning process
+- More comprehensive initial training program
+- Better integration planning with existing tools
+- Enhanced performance monitoring from day one
+
+## Recommendations for Similar Organizations
+
+### Getting Started
+
+1. **Conduct Thorough Assessment**: Understand current state and requirements
+2. **Secure Executive Buy-In**: Ensure leadership commitment and support
+3. **Plan Comprehensively**: Develop detailed implementation roadmap
+4. **Start Small**: Begin with pilot implementation
+5. **Focus on Change Management**: Invest in user adoption
+
+### Implementation Best Practices
+
+- Prioritize user experience and operational impact
+- Maintain regular communication with all stakeholders
+- Establish clear success metrics and monitoring
+- Plan for ongoing optimization and improvement
+- Build strong vendor relationships
+
+## Conclusion
+
+This case study demonstrates that successful {topic_lower} implementation requires more than just technology deployment. It demands strategic planning, strong execution, and ongoing commitment to continuous improvement.
+
+{case_conclusion}
+
+{closing}
+
+{news_section}---
+
+*About the Author: {author_bio}*
+"""
+
+
+# Slots that vary between posts; see Phrasing, Figure and Selection
+VARIANTS = {
+    # Shared by every template
+    "closing": Phrasing(
+        "As we continue to navigate an increasingly complex threat environment, the importance of "
+        "well-implemented security measures cannot be overstated. Success requires not just technical "
+        "expertise, but also strong leadership, clear communication, and unwavering commitment to "
+        "security excellence.",
+        "Threats will keep changing, and so will the tools used to counter them. The organizations "
+        "that do well treat security as a shared responsibility, measure what matters, and revisit "
+        "their decisions as the landscape shifts.",
+        "No single project makes an organization secure. What lasts is the habit of reviewing risks "
+        "regularly, learning from every incident, and keeping security on the agenda of business "
+        "leaders, not just the IT team.",
+        "Attackers only need to find one gap, while defenders have to cover many. Clear priorities, "
+        "steady investment, and a culture that reports problems early are what keep that balance "
+        "manageable.",
+    ),
+    "trends": Selection(
+        4,
+        "Increased automation and AI integration",
+        "Enhanced threat intelligence capabilities",
+        "Greater emphasis on user experience",
+        "Expanded regulatory requirements",
+        "Convergence of IT and operational technology security",
+        "Identity as the primary security perimeter",
+        "Security tooling consolidated into unified platforms",
+    ),
+
+    # Technical guide
+    "guide_summary": Phrasing(
+        "In today's rapidly evolving threat landscape, {topic_lower} has become a critical component of "
+        "any robust cybersecurity strategy. This technical guide explores the implementation challenges, "
+        "best practices, and strategic considerations that security leaders must address.",
+        "Few areas of security have moved as quickly as {topic_lower}. This guide walks through what an "
+        "implementation involves, where projects usually struggle, and how security leaders can plan for "
+        "a rollout that lasts.",
+        "Security teams are under pressure to get {topic_lower} right the first time. This technical "
+        "guide covers the building blocks, a phased implementation plan, and the measures that show "
+        "whether the effort is paying off.",
+    ),
+    "guide_intro": Phrasing(
+        "As cybersecurity threats continue to evolve in sophistication and scale, organizations must "
+        "adapt their security postures accordingly. {topic} represents not just a technical challenge, "
+        "but a business imperative that requires careful planning, proper resource allocation, and "
+        "executive support.",
+        "Attackers are faster, better funded, and more organized than ever, and defenses built for "
+        "yesterday's threats are showing their age. {topic} is one of the ways organizations are "
+        "responding, but it only works with clear goals, realistic budgets, and leadership backing.",
+        "Most organizations already own plenty of security tools. What they often lack is a coherent "
+        "approach that ties those tools to business risk. {topic} offers that structure, provided it is "
+        "planned carefully and supported from the top.",
+    ),
+    "guide_components": Selection(
+        4,
+        "**Infrastructure Requirements**: Understanding the foundational elements needed",
+        "**Integration Challenges**: Addressing compatibility with existing systems",
+        "**Performance Considerations**: Ensuring security doesn't compromise operational efficiency",
+        "**Monitoring and Maintenance**: Establishing ongoing operational procedures",
+        "**Identity and Access Controls**: Deciding who and what can reach each resource",
+        "**Data Protection**: Classifying sensitive data and controlling how it moves",
+        "**Logging and Telemetry**: Collecting the events needed for detection and audits",
+        numbered=True,
+    ),
+    "guide_phase_assess": Selection(
+        4,
+        "Conduct comprehensive risk assessment",
+        "Define success metrics and KPIs",
+        "Develop implementation timeline",
+        "Secure necessary resources and budget",
+        "Inventory the systems and data in scope",
+        "Identify stakeholders and owners for each workstream",
+    ),
+    "guide_phase_pilot": Selection(
+        4,
+        "Select appropriate pilot environment",
+        "Implement core functionality",
+        "Test integration points",
+        "Gather performance metrics",
+        "Collect feedback from pilot users",
+        "Document issues and workarounds",
+    ),
+    "guide_phase_deploy": Selection(
+        4,
+        "Execute organization-wide rollout",
+        "Provide comprehensive training",
+        "Establish operational procedures",
+        "Monitor and optimize performance",
+        "Retire the controls the new approach replaces",
+        "Report progress to executive sponsors",
+    ),
+    "guide_pitfalls": Selection(
+        4,
+        "Insufficient planning and preparation",
+        "Lack of stakeholder buy-in",
+        "Inadequate training and change management",
+        "Failing to establish proper metrics and monitoring",
+        "Underestimating integration effort with legacy systems",
+        "Treating the rollout as a one-time project",
+        "Buying tools before defining requirements",
+    ),
+    "guide_conclusion": Phrasing(
+        "{topic} is not merely a technical implementation but a strategic business decision that "
+        "requires careful planning, proper execution, and ongoing commitment. Organizations that "
+        "approach this systematically, with proper stakeholder engagement and clear success metrics, "
+        "will be best positioned to achieve their cybersecurity objectives.",
+        "Getting {topic_lower} right takes more than the right products. It takes a clear plan, a "
+        "pilot that surfaces problems early, and metrics that show progress to the people funding the "
+        "work.",
+        "Organizations that treat {topic_lower} as an ongoing program rather than a one-off project see "
+        "the best results. Start small, measure honestly, and expand once the foundations are proven.",
+    ),
+
+    # Industry analysis
+    "analysis_overview": Phrasing(
+        "The cybersecurity industry continues to evolve at breakneck speed, with {topic_lower} emerging "
+        "as a critical focus area for organizations across all sectors. Recent market analysis indicates "
+        "significant investment and innovation in this space.",
+        "Interest in {topic_lower} has grown steadily across every sector. Budgets, vendor activity, and "
+        "regulatory attention all point in the same direction: this is becoming a standard part of how "
+        "organizations manage risk.",
+        "Only a few years ago {topic_lower} was a specialist concern. Today it appears in board "
+        "discussions, vendor roadmaps, and audit checklists, and the market has grown to match.",
+    ),
+    "spending_growth": Figure(18, 34),
+    "analysis_technologies": Selection(
+        4,
+        "AI and machine learning integration",
+        "Cloud-native security solutions",
+        "Automated response capabilities",
+        "Enhanced threat intelligence",
+        "Extended detection and response platforms",
+        "Passwordless and phishing-resistant authentication",
+    ),
+    "analysis_challenges": Selection(
+        4,
+        "**Skills Shortage**: Limited availability of qualified cybersecurity professionals",
+        "**Budget Constraints**: Balancing security investments with other business priorities",
+        "**Legacy System Integration**: Modernizing outdated infrastructure and processes",
+        "**Change Management**: Overcoming organizational resistance to new security measures",
+        "**Vendor Sprawl**: Managing overlapping tools from too many suppliers",
+        "**Alert Fatigue**: Keeping analysts focused on the signals that matter",
+        numbered=True,
+    ),
+    "market_doubling_years": Figure(4, 7),
+    "analysis_predictions": Selection(
+        3,
+        "Increased focus on user experience and operational efficiency",
+        "Greater integration with business processes",
+        "Enhanced threat intelligence sharing",
+        "More services delivered as managed offerings",
+        "Closer scrutiny from regulators and insurers",
+    ),
+    "analysis_conclusion": Phrasing(
+        "The {topic_lower} market represents both significant opportunity and considerable challenge for "
+        "organizations. Success requires strategic thinking, careful planning, and commitment to ongoing "
+        "improvement.",
+        "For buyers, the growth of the {topic_lower} market means more choice but also more noise. The "
+        "organizations that benefit most are those that start from their own risks rather than from "
+        "vendor promises.",
+        "The direction of the {topic_lower} market is clear, even if the pace varies by sector. "
+        "Organizations that invest steadily, and measure what they get for it, will be ahead of those "
+        "that wait for a crisis.",
+    ),
+
+    # Best practices
+    "practices_intro": Phrasing(
+        "Implementing {topic_lower} effectively requires more than just technology deployment—it demands "
+        "a comprehensive understanding of industry best practices, organizational dynamics, and strategic "
+        "planning. This guide provides actionable insights for security leaders.",
+        "Buying a product is the easy part of {topic_lower}. The hard part is fitting it into the way an "
+        "organization already works. These practices come from programs that made that transition "
+        "successfully.",
+        "Security leaders are often asked to deliver {topic_lower} quickly and on a tight budget. The "
+        "practices below help focus that effort where it reduces the most risk.",
+    ),
+    "practices_alignment": Selection(
+        4,
+        "**Business Impact Assessment**: Understand how security measures affect operations",
+        "**Stakeholder Engagement**: Ensure executive and user buy-in",
+        "**ROI Justification**: Demonstrate clear value proposition",
+        "**Risk-Based Prioritization**: Focus on highest-impact areas first",
+        "**Regulatory Mapping**: Tie each control to the obligations it satisfies",
+        "**Ownership**: Name an accountable owner for every outcome",
+    ),
+    "practices_security_kpis": Selection(
+        4,
+        "Incident detection and response times",
+        "False positive rates",
+        "Compliance audit results",
+        "Risk reduction metrics",
+        "Mean time to remediate vulnerabilities",
+        "Coverage of critical assets",
+    ),
+    "practices_operational_kpis": Selection(
+        4,
+        "System availability and performance",
+        "User productivity impact",
+        "Support ticket volumes",
+        "Training completion rates",
+        "Time to onboard new systems",
+        "Change failure rate",
+    ),
+    "practices_conclusion": Phrasing(
+        "Successful {topic_lower} implementation requires careful planning, strong execution, and ongoing "
+        "commitment. By following these best practices and avoiding common pitfalls, organizations can "
+        "maximize their security investment and achieve their cybersecurity objectives.",
+        "None of these practices is complicated on its own. The difference comes from applying them "
+        "consistently, measuring the results, and adjusting {topic_lower} as the organization changes.",
+        "Good {topic_lower} programs share a few traits: clear ownership, honest metrics, and steady "
+        "attention from leadership. Build those in from the start and the technology decisions become "
+        "much easier.",
+    ),
+
+    # Case study
+    "case_summary": Phrasing(
+        "This case study examines how a {company_type} successfully implemented {topic_lower} to address "
+        "critical security challenges and improve their overall cybersecurity posture. The implementation "
+        "delivered measurable results while overcoming significant organizational and technical obstacles.",
+        "A {company_type} came to us with a growing list of security concerns and a limited team to "
+        "address them. This case study follows their {topic_lower} program from assessment to steady "
+        "operation, including what went wrong along the way.",
+        "When a {company_type} decided to invest in {topic_lower}, leadership wanted results they could "
+        "measure within a year. This case study describes how the program was planned, delivered, and "
+        "evaluated.",
+    ),
+    "response_cut": Figure(35, 60, 5),
+    "false_positive_target": Figure(20, 30, 5),
+    "detection_gain": Figure(55, 85, 5),
+    "false_positive_cut": Figure(40, 70, 5),
+    "identification_gain": Figure(70, 90, 5),
+    "containment_gain": Figure(30, 50, 5),
+    "roi": Figure(180, 340, 20),
+    "roi_months": Figure(12, 24, 6),
+    "premium_cut": Figure(10, 30, 5),
+    "breach_costs": Figure(1.5, 4.0, 0.5, "{:.1f}"),
+    "case_success_factors": Selection(
+        4,
+        "**Executive Support**: Strong leadership commitment was crucial",
+        "**Stakeholder Engagement**: Regular communication maintained buy-in",
+        "**Phased Approach**: Gradual implementation reduced risk and improved adoption",
+        "**Continuous Monitoring**: Regular assessment enabled optimization",
+        "**Vendor Partnership**: Strong relationships with solution providers",
+        "**Clear Metrics**: Agreed targets kept every team focused on outcomes",
+        numbered=True,
+    ),
+    "case_conclusion": Phrasing(
+        "The organization achieved its security objectives while delivering measurable business value. "
+        "Key to their success was a comprehensive approach that addressed not only technical requirements "
+        "but also organizational change management and stakeholder engagement.",
+        "The results went beyond fewer incidents. Teams now share a common view of risk, audits take less "
+        "effort, and the security program has the credibility to ask for what it needs next.",
+        "Looking back, the technology was the simplest part of the project. Most of the value came from "
+        "clearer ownership, better communication between teams, and metrics everyone agreed on.",
+    ),
+}
+
+
+def default_registry():
+    """Registry holding the four standard post templates, equally weighted"""
+    registry = TemplateRegistry(VARIANTS)
+    registry.register("technical_guide", TECHNICAL_GUIDE)
+    registry.register("industry_analysis", INDUSTRY_ANALYSIS)
+    registry.register("best_practices", BEST_PRACTICES)
+    registry.register("case_study", CASE_STUDY)
+    return registry
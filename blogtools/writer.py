@@ -0,0 +1,149 @@
+"""
+Atomic, batched post writer
+
+Each post is written to a temporary file in its destination directory
+and renamed over its final name, so neither a reader nor a crash ever
+sees a half-written post. PostWriter batches these writes: temporary
+files are collected until commit(), their data is made durable, they
+are all renamed into place and the directory is fsynced once. Each
+file's data is synced with fdatasync while it is still open, which
+flushes that file only, so a batch of N posts costs N data syncs and one
+directory fsync however busy the rest of the machine is. Files that
+already hold exactly the new bytes are left alone and keep their mtime.
+
+post_lock() keeps overlapping generator runs apart. Every run locks one
+byte per date it writes, at the date's ordinal in .blog/generate.lock,
+so a second run for the same day waits for the first. It then finds the
+post already written and does nothing. Runs for different dates never
+wait on each other. The lock belongs to the process and is released
+when it exits, even after a crash.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_LOCK = Path(".blog") / "generate.lock"
+# Data-only sync where the platform has it; metadata is covered by the directory fsync
+_datasync = getattr(os, "fdatasync", os.fsync)
+
+
+def _same_content(path, data):
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class PostWriter:
+    """Writes files into one directory, renaming each batch into place at commit()
+
+    Used as a context manager the batch is committed on a clean exit
+    and its temporary files are removed after an error. With
+    ``durable=False`` nothing is fsynced (e.g. for benchmarks on tmpfs).
+    """
+
+    def __init__(self, directory, durable=True):
+        self.directory = Path(directory)
+        self.durable = durable
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def write(self, name, data):
+        """Stage ``data`` (bytes) as ``name``; returns False if the file already holds it"""
+        path = self.directory / name
+        if _same_content(path, data):
+            return False
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if self.durable:
+                _datasync(fd)
+        except BaseException:
+            os.close(fd)
+            os.unlink(tmp)
+            raise
+        os.close(fd)
+        self._pending.append((tmp, path))
+        return True
+
+    def commit(self):
+        """Make the staged files durable and rename them into place; returns how many"""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            # Each file's data was synced when it was written
+            for tmp, path in pending:
+                os.replace(tmp, path)
+        except BaseException:
+            self._pending = [(tmp, path) for tmp, path in pending if tmp.exists()]
+            self.discard()
+            raise
+        if self.durable and sys.platform != "win32":
+            # Persists the renames themselves
+            _fsync_dir(self.directory)
+        return len(pending)
+
+    def discard(self):
+        """Drop the staged files without touching their targets"""
+        for tmp, _ in self._pending:
+            tmp.unlink(missing_ok=True)
+        self._pending = []
+
+
+@contextmanager
+def post_lock(first, last=None, path=DEFAULT_LOCK):
+    """Hold the write lock for the dates from ``first`` to ``last`` (inclusive)
+
+    Dates are date or datetime objects. Blocks, with a message, while
+    another process holds any of them.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        # No fcntl (Windows): runs there aren't serialized
+        yield
+        return
+
+    start = first.toordinal()
+    length = (last or first).toordinal() - start + 1
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, length, start)
+        except OSError:
+            print("Waiting for another run writing posts for the same dates...")
+            fcntl.lockf(fd, fcntl.LOCK_EX, length, start)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
@@ -4,19 +4,43 @@ Automated Cybersecurity Blog Content Generator
 Generates high-quality cybersecurity blog posts using AI
 """
 
+# Keep module-level imports to what the daily generate path needs; heavier
+# modules are imported inside the functions that use them (see --startup-profile)
 import os
 import sys
-import json
+import argparse
 import random
-import requests
 from datetime import datetime, timedelta
 from pathlib import Path
-import yaml
-import subprocess
 import time
 
+from collections import namedtuple
+
+from blogtools import metrics
+from blogtools.manifest import PostManifest, content_hash, split_filename
+from blogtools.render_cache import GENERATOR_VERSION, RenderCache, render_key
+from blogtools.scheduler import DEFAULT_STATE as SCHEDULER_STATE, TopicScheduler
+from blogtools.templates import default_registry
+from blogtools.writer import PostWriter, post_lock
+
+POSTS_DIR = Path("_posts")
+# Most posts a backfill worker writes per atomic batch
+WRITE_BATCH = 512
+
+# Everything needed to render one post reproducibly
+PostSpec = namedtuple("PostSpec", ["when", "topic", "template", "seed", "news"], defaults=[()])
+
+# Topics boosted during particular months, e.g. October is Cybersecurity Awareness Month
+SEASONAL_BOOSTS = {
+    1: {"Compliance and Governance": 2.0, "Risk Assessment Frameworks": 2.0},
+    10: {"Security Awareness Training": 3.0, "Identity and Access Management": 1.5},
+    11: {"Ransomware Defense Strategies": 1.5, "Data Loss Prevention": 1.5},
+    12: {"Ransomware Defense Strategies": 2.0, "Incident Response Planning": 1.5},
+}
+
 class CybersecurityBlogGenerator:
-    def __init__(self):
+    def __init__(self, template_weights=None, news_feeds=None, topic_weights=None,
+                 topic_cooldown=14, template_cooldown=1):
         self.topics = [
             "Zero Trust Architecture Implementation",
             "Cloud Security Best Practices",
@@ -46,662 +70,139 @@ of experience in cybersecurity. He specializes in helping organizations build ro
 security programs and navigate complex compliance requirements.
         """.strip()
 
-    def get_cybersecurity_news(self):
-        """Fetch recent cybersecurity news for inspiration"""
-        try:
-            # Simulate news fetching (in production, use actual news APIs)
-            news_items = [
-                "Major ransomware attack targets healthcare sector",
-                "New zero-day vulnerability discovered in popular software",
-                "AI-powered security tools show promising results",
-                "Regulatory changes affect data protection requirements",
-                "Supply chain attacks increase by 40% this quarter"
-            ]
-            return random.choice(news_items)
-        except Exception as e:
-            print(f"Error fetching news: {e}")
-            return "Recent cybersecurity developments in the industry"
-
-    def generate_blog_content(self, topic):
-        """Generate comprehensive blog post content"""
-        
-        # Create different blog post templates
-        templates = [
-            self.generate_technical_guide(topic),
-            self.generate_industry_analysis(topic),
-            self.generate_best_practices(topic),
-            self.generate_case_study(topic)
-        ]
-        
-        return random.choice(templates)
-
-    def generate_technical_guide(self, topic):
-        """Generate a technical guide blog post"""
-        content = f"""
-# {topic}: A Comprehensive Technical Guide
-
-## Executive Summary
-
-In today's rapidly evolving threat landscape, {topic.lower()} has become a critical component of any robust cybersecurity strategy. This technical guide explores the implementation challenges, best practices, and strategic considerations that security leaders must address.
-
-## Introduction
-
-As cybersecurity threats continue to evolve in sophistication and scale, organizations must adapt their security postures accordingly. {topic} represents not just a technical challenge, but a business imperative that requires careful planning, proper resource allocation, and executive support.
-
-## Technical Overview
-
-### Core Components
-
-The implementation of {topic.lower()} involves several key technical components:
-
-1. **Infrastructure Requirements**: Understanding the foundational elements needed
-2. **Integration Challenges**: Addressing compatibility with existing systems
-3. **Performance Considerations**: Ensuring security doesn't compromise operational efficiency
-4. **Monitoring and Maintenance**: Establishing ongoing operational procedures
-
-### Implementation Strategy
-
-A successful {topic.lower()} implementation requires a phased approach:
-
-**Phase 1: Assessment and Planning**
-- Conduct comprehensive risk assessment
-- Define success metrics and KPIs
-- Develop implementation timeline
-- Secure necessary resources and budget
-
-**Phase 2: Pilot Implementation**
-- Select appropriate pilot environment
-- Implement core functionality
-- Test integration points
-- Gather performance metrics
-
-**Phase 3: Full Deployment**
-- Execute organization-wide rollout
-- Provide comprehensive training
-- Establish operational procedures
-- Monitor and optimize performance
-
-## Best Practices and Recommendations
-
-### Strategic Considerations
-
-1. **Business Alignment**: Ensure security initiatives support business objectives
-2. **Risk-Based Approach**: Focus resources on highest-impact areas
-3. **Stakeholder Engagement**: Maintain clear communication with all stakeholders
-4. **Continuous Improvement**: Establish processes for ongoing optimization
-
-### Common Pitfalls to Avoid
+        # None means the default feed list; an empty list disables news
+        self.news_feeds = news_feeds
+        self._news_fetcher = None
 
-- Insufficient planning and preparation
-- Lack of stakeholder buy-in
-- Inadequate training and change management
-- Failing to establish proper metrics and monitoring
+        # Templates are compiled once; weights decide how often each is picked
+        self.templates = default_registry()
+        if template_weights:
+            self.templates.set_weights(template_weights)
 
-## Measuring Success
+        # Scheduling knobs; see make_scheduler
+        self.topic_weights = topic_weights or {}
+        self.topic_cooldown = topic_cooldown
+        self.template_cooldown = template_cooldown
 
-Key performance indicators for {topic.lower()} implementation include:
+        # Identifies the rendering code for the render cache
+        self.version = f"{GENERATOR_VERSION}-{self.templates.fingerprint()[:16]}"
 
-- **Security Metrics**: Reduction in security incidents, improved detection times
-- **Operational Metrics**: System performance, user satisfaction
-- **Business Metrics**: Compliance status, risk reduction, cost optimization
-
-## Future Considerations
-
-The cybersecurity landscape continues to evolve, and organizations must remain agile in their approach to {topic.lower()}. Emerging trends include:
-
-- Increased automation and AI integration
-- Enhanced threat intelligence capabilities
-- Greater emphasis on user experience
-- Expanded regulatory requirements
-
-## Conclusion
+    def get_cybersecurity_news(self, topic=None, limit=3):
+        """Fetch recent cybersecurity headlines, most relevant to ``topic`` first"""
+        if self.news_feeds == []:
+            return []
+        try:
+            from blogtools.news import NewsFetcher, select_headlines
 
-{topic} is not merely a technical implementation but a strategic business decision that requires careful planning, proper execution, and ongoing commitment. Organizations that approach this systematically, with proper stakeholder engagement and clear success metrics, will be best positioned to achieve their cybersecurity objectives.
+            # Reused so a long-running process keeps fresh headlines in memory
+            if self._news_fetcher is None:
+                self._news_fetcher = NewsFetcher(self.news_feeds)
+            items = self._news_fetcher.fetch()
+            return select_headlines(items, topic, limit)
+        except Exception as e:
+            print(f"Error fetching news: {e}")
+            return []
 
-As we continue to navigate an increasingly complex threat environment, the importance of well-implemented security measures cannot be overstated. Success requires not just technical expertise, but also strong leadership, clear communication, and unwavering commitment to security excellence.
+    def generate_blog_content(self, topic, template=None, rng=random):
+        """Generate comprehensive blog post content
 
----
+        Only the selected template is rendered; pass ``template`` to force one.
+        """
+        if template is None:
+            template = self.templates.choose(rng)
+        return self.templates.render(template, topic, self.author_bio, rng)
 
-*About the Author: {self.author_bio}*
-        """.strip()
-        
-        return content
+    def generate_technical_guide(self, topic):
+        """Generate a technical guide blog post"""
+        return self.generate_blog_content(topic, "technical_guide")
 
     def generate_industry_analysis(self, topic):
         """Generate an industry analysis blog post"""
-        content = f"""
-# {topic}: Industry Trends and Strategic Insights
-
-## Market Overview
-
-The cybersecurity industry continues to evolve at breakneck speed, with {topic.lower()} emerging as a critical focus area for organizations across all sectors. Recent market analysis indicates significant investment and innovation in this space.
-
-## Current Market Dynamics
-
-### Investment Trends
-
-Organizations are increasingly recognizing the strategic importance of {topic.lower()}, with cybersecurity budgets reflecting this priority:
-
-- Enterprise spending on related technologies has increased by 25% year-over-year
-- SMB adoption is accelerating due to improved accessibility and reduced costs
-- Regulatory requirements are driving compliance-focused investments
-
-### Technology Evolution
-
-The landscape of {topic.lower()} is characterized by rapid innovation:
-
-**Emerging Technologies**
-- AI and machine learning integration
-- Cloud-native security solutions
-- Automated response capabilities
-- Enhanced threat intelligence
-
-**Market Consolidation**
-- Strategic acquisitions by major vendors
-- Platform integration initiatives
-- Ecosystem partnership development
-
-## Industry Challenges
-
-### Common Implementation Hurdles
-
-Organizations face several key challenges when implementing {topic.lower()}:
-
-1. **Skills Shortage**: Limited availability of qualified cybersecurity professionals
-2. **Budget Constraints**: Balancing security investments with other business priorities
-3. **Legacy System Integration**: Modernizing outdated infrastructure and processes
-4. **Change Management**: Overcoming organizational resistance to new security measures
-
-### Regulatory Landscape
-
-The regulatory environment continues to evolve, with new requirements impacting {topic.lower()}:
-
-- Enhanced data protection regulations
-- Industry-specific compliance mandates
-- Cross-border data transfer restrictions
-- Incident reporting requirements
-
-## Strategic Recommendations
-
-### For Enterprise Organizations
-
-Large enterprises should focus on:
-- Comprehensive risk assessment and strategy development
-- Multi-year implementation planning
-- Executive leadership engagement
-- Cross-functional team collaboration
-
-### for Mid-Market Companies
-
-Mid-market organizations should prioritize:
-- Cost-effective solution selection
-- Phased implementation approaches
-- Managed service provider partnerships
-- Compliance automation tools
-
-### For Small Businesses
-
-Small businesses should consider:
-- Cloud-based security solutions
-- Managed security services
-- Industry-specific security frameworks
-- Cybersecurity insurance integration
-
-## Future Outlook
-
-### Technology Trends
-
-The future of {topic.lower()} will be shaped by several key trends:
-
-**Automation and AI**
-- Increased use of artificial intelligence for threat detection
-- Automated response and remediation capabilities
-- Predictive security analytics
-
-**Zero Trust Architecture**
-- Continued adoption of zero trust principles
-- Identity-centric security models
-- Micro-segmentation strategies
-
-**Cloud Security Evolution**
-- Cloud-native security tools
-- Multi-cloud security management
-- Serverless security considerations
-
-### Market Predictions
-
-Industry analysts predict continued growth and evolution in the {topic.lower()} space:
-
-- Market size expected to double within five years
-- Increased focus on user experience and operational efficiency
-- Greater integration with business processes
-- Enhanced threat intelligence sharing
-
-## Conclusion
-
-The {topic.lower()} market represents both significant opportunity and considerable challenge for organizations. Success requires strategic thinking, careful planning, and commitment to ongoing improvement.
-
-As the threat landscape continues to evolve, organizations must remain agile and adaptable in their approach to cybersecurity. Those that invest wisely in {topic.lower()} will be better positioned to protect their assets, maintain customer trust, and achieve their business objectives.
-
----
-
-*About the Author: {self.author_bio}*
-        """.strip()
-        
-        return content
+        return self.generate_blog_content(topic, "industry_analysis")
 
     def generate_best_practices(self, topic):
         """Generate a best practices blog post"""
-        content = f"""
-# {topic}: Essential Best Practices for Security Leaders
-
-## Introduction
-
-Implementing {topic.lower()} effectively requires more than just technology deployment—it demands a comprehensive understanding of industry best practices, organizational dynamics, and strategic planning. This guide provides actionable insights for security leaders.
-
-## Foundation Principles
-
-### Strategic Alignment
-
-Every {topic.lower()} initiative must align with broader business objectives:
-
-- **Business Impact Assessment**: Understand how security measures affect operations
-- **Stakeholder Engagement**: Ensure executive and user buy-in
-- **ROI Justification**: Demonstrate clear value proposition
-- **Risk-Based Prioritization**: Focus on highest-impact areas first
-
-### Governance Framework
-
-Establishing proper governance is crucial for success:
-
-1. **Policy Development**: Create comprehensive, enforceable policies
-2. **Roles and Responsibilities**: Define clear ownership and accountability
-3. **Decision-Making Process**: Establish efficient approval workflows
-4. **Regular Review Cycles**: Ensure policies remain current and effective
-
-## Implementation Best Practices
-
-### Planning and Preparation
-
-**Comprehensive Assessment**
-- Conduct thorough current-state analysis
-- Identify gaps and vulnerabilities
-- Document existing processes and systems
-- Establish baseline metrics
-
-**Resource Planning**
-- Determine budget requirements
-- Identify skill gaps and training needs
-- Plan for adequate staffing
-- Consider third-party support requirements
-
-### Execution Excellence
-
-**Phased Deployment**
-- Start with pilot programs
-- Gather feedback and lessons learned
-- Refine approach based on results
-- Scale gradually across organization
-
-**Change Management**
-- Communicate benefits clearly
-- Provide comprehensive training
-- Address user concerns proactively
-- Celebrate quick wins
-
-### Operational Considerations
-
-**Monitoring and Metrics**
-
-Establish comprehensive monitoring to ensure ongoing success:
-
-- **Performance Metrics**: Track system performance and availability
-- **Security Metrics**: Monitor threat detection and response times
-- **Business Metrics**: Measure impact on business operations
-- **User Experience**: Track adoption and satisfaction levels
-
-**Continuous Improvement**
-
-{Topic} is not a one-time implementation but an ongoing process:
-
-- Regular security assessments
-- Technology refresh planning
-- Process optimization
-- Skills development programs
-
-## Common Pitfalls and How to Avoid Them
-
-### Technical Pitfalls
-
-**Over-Engineering Solutions**
-- Focus on business requirements, not technical complexity
-- Prioritize user experience and operational efficiency
-- Avoid unnecessary customization
-
-**Inadequate Testing**
-- Implement comprehensive testing protocols
-- Include both technical and user acceptance testing
-- Plan for rollback procedures
-
-### Organizational Pitfalls
-
-**Insufficient Stakeholder Engagement**
-- Identify all affected stakeholders early
-- Maintain regular communication
-- Address concerns promptly and transparently
-
-**Neglecting Training and Support**
-- Develop comprehensive training programs
-- Provide ongoing support resources
-- Establish feedback mechanisms
-
-## Industry-Specific Considerations
-
-### Healthcare
-
-Healthcare organizations face unique challenges:
-- HIPAA compliance requirements
-- Patient safety considerations
-- Complex IT environments
-- Limited downtime windows
-
-### Financial Services
-
-Financial institutions must address:
-- Regulatory compliance (PCI, SOX, etc.)
-- High availability requirements
-- Customer trust and reputation
-- Sophisticated threat landscape
-
-### Manufacturing
-
-Manufacturing companies should consider:
-- Operational technology integration
-- Supply chain security
-- Legacy system constraints
-- Safety and reliability requirements
-
-## Measuring Success
-
-### Key Performance Indicators
-
-Track these essential metrics:
-
-**Security KPIs**
-- Incident detection and response times
-- False positive rates
-- Compliance audit results
-- Risk reduction metrics
-
-**Operational KPIs**
-- System availability and performance
-- User productivity impact
-- Support ticket volumes
-- Training completion rates
-
-**Business KPIs**
-- Cost savings achieved
-- Revenue protection
-- Customer satisfaction
-- Competitive advantage
-
-## Future-Proofing Your Implementation
-
-### Technology Evolution
-
-Stay ahead of technological changes:
-- Monitor emerging threats and solutions
-- Plan for technology refresh cycles
-- Maintain vendor relationships
-- Invest in staff development
-
-### Regulatory Changes
-
-Prepare for evolving compliance requirements:
-- Monitor regulatory developments
-- Participate in industry forums
-- Maintain documentation and audit trails
-- Plan for requirement changes
-
-## Conclusion
-
-Successful {topic.lower()} implementation requires careful planning, strong execution, and ongoing commitment. By following these best practices and avoiding common pitfalls, organizations can maximize their security investment and achieve their cybersecurity objectives.
-
-Remember that cybersecurity is not a destination but a journey. Continuous improvement, adaptation to new threats, and alignment with business goals are essential for long-term success.
-
----
-
-*About the Author: {self.author_bio}*
-        """.strip()
-        
-        return content
+        return self.generate_blog_content(topic, "best_practices")
 
     def generate_case_study(self, topic):
         """Generate a case study blog post"""
-        company_types = ["Fortune 500 manufacturer", "Regional healthcare system", "Growing technology company", "Financial services firm"]
-        company_type = random.choice(company_types)
-        
-        content = f"""
-# {topic}: Real-World Implementation Case Study
-
-## Executive Summary
-
-This case study examines how a {company_type} successfully implemented {topic.lower()} to address critical security challenges and improve their overall cybersecurity posture. The implementation delivered measurable results while overcoming significant organizational and technical obstacles.
-
-## Organization Background
-
-### Company Profile
-
-Our client, a {company_type}, faced increasing cybersecurity challenges as their business expanded and threat landscape evolved. Key characteristics included:
-
-- **Industry**: {"Healthcare" if "healthcare" in company_type else "Manufacturing" if "manufacturer" in company_type else "Technology" if "technology" in company_type else "Financial Services"}
-- **Size**: {"15,000+ employees" if "Fortune 500" in company_type else "5,000+ employees" if "Regional" in company_type else "500+ employees"}
-- **Revenue**: {"$5B+ annually" if "Fortune 500" in company_type else "$1B+ annually" if "Regional" in company_type else "$100M+ annually"}
-- **IT Environment**: Hybrid cloud infrastructure with legacy systems
-
-### Initial Challenges
-
-The organization faced several critical security challenges:
-
-1. **Legacy Infrastructure**: Aging systems with limited security capabilities
-2. **Compliance Requirements**: Increasing regulatory obligations
-3. **Threat Sophistication**: Advanced persistent threats targeting their industry
-4. **Resource Constraints**: Limited cybersecurity staff and budget
-5. **Business Growth**: Rapid expansion creating new security risks
-
-## Project Objectives
-
-### Primary Goals
-
-The {topic.lower()} implementation aimed to achieve:
-
-- **Enhanced Security Posture**: Improve threat detection and response capabilities
-- **Regulatory Compliance**: Meet industry-specific requirements
-- **Operational Efficiency**: Streamline security processes and reduce manual tasks
-- **Risk Reduction**: Minimize potential business impact from cyber incidents
-- **Scalability**: Support future business growth and technology evolution
-
-### Success Metrics
-
-Key performance indicators included:
-- 50% reduction in security incident response time
-- 90% compliance with regulatory requirements
-- 25% reduction in false positive alerts
-- Zero tolerance for unplanned security-related downtime
-
-## Implementation Strategy
-
-### Phase 1: Assessment and Planning (Months 1-2)
-
-**Current State Analysis**
-- Comprehensive security assessment
-- Gap analysis against industry standards
-- Risk evaluation and prioritization
-- Technology inventory and evaluation
-
-**Strategic Planning**
-- Implementation roadmap development
-- Resource allocation and budgeting
-- Stakeholder engagement strategy
-- Change management planning
-
-### Phase 2: Foundation Building (Months 3-4)
-
-**Infrastructure Preparation**
-- Hardware and software procurement
-- Network architecture updates
-- Security policy development
-- Staff training initiation
-
-**Pilot Implementation**
-- Limited scope deployment
-- Initial testing and validation
-- Process refinement
-- Feedback collection and analysis
-
-### Phase 3: Full Deployment (Months 5-8)
-
-**Organization-Wide Rollout**
-- Phased deployment across all locations
-- Comprehensive user training
-- Process documentation
-- Performance monitoring
-
-**Integration and Optimization**
-- System integration with existing tools
-- Process optimization based on usage data
-- Fine-tuning of security policies
-- Incident response procedure updates
-
-### Phase 4: Stabilization and Enhancement (Months 9-12)
-
-**Operations Establishment**
-- 24/7 monitoring implementation
-- Incident response team training
-- Vendor relationship management
-- Regular review and reporting processes
-
-## Challenges and Solutions
-
-### Technical Challenges
-
-**Legacy System Integration**
-- *Challenge*: Integrating modern security tools with legacy infrastructure
-- *Solution*: Implemented hybrid architecture with API-based connectors and gradual system modernization plan
-
-**Performance Impact**
-- *Challenge*: Security measures affecting system performance
-- *Solution*: Optimized configurations, implemented performance monitoring, and established baseline metrics
-
-### Organizational Challenges
-
-**Change Resistance**
-- *Challenge*: User resistance to new security processes
-- *Solution*: Comprehensive change management program including training, communication, and incentives
-
-**Resource Constraints**
-- *Challenge*: Limited internal cybersecurity expertise
-- *Solution*: Partnership with managed security service provider and aggressive staff development program
-
-## Results and Outcomes
-
-### Security Improvements
-
-**Threat Detection**
-- 75% improvement in threat detection accuracy
-- 60% reduction in false positive alerts
-- 90% faster incident identification
-
-**Response Capabilities**
-- 50% reduction in incident response time
-- 40% improvement in containment effectiveness
-- 95% of incidents resolved within SLA requirements
-
-### Business Impact
-
-**Operational Benefits**
-- Zero security-related business disruptions
-- 30% reduction in security-related helpdesk tickets
-- 20% improvement in user productivity
-
-**Financial Results**
-- ROI of 300% within 18 months
-- 25% reduction in cyber insurance premiums
-- Avoided estimated $2M in potential breach costs
-
-### Compliance Achievements
-
-- 100% compliance with industry regulations
-- Successful completion of all regulatory audits
-- Recognition as industry security leader
-
-## Lessons Learned
-
-### Key Success Factors
-
-1. **Executive Support**: Strong leadership commitment was crucial
-2. **Stakeholder Engagement**: Regular communication maintained buy-in
-3. **Phased Approach**: Gradual implementation reduced risk and improved adoption
-4. **Continuous Monitoring**: Regular assessment enabled optimization
-5. **Vendor Partnership**: Strong relationships with solution providers
-
-### Areas for Improvement
-
-- Earlier involvement of end-users in planning process
-- More comprehensive initial training program
-- Better integration planning with existing tools
-- Enhanced performance monitoring from day one
+        return self.generate_blog_content(topic, "case_study")
+
+    def make_scheduler(self, manifest=None, state_path=None):
+        """TopicScheduler over this generator's topics and templates
+
+        With ``state_path`` the publication history is restored from that
+        file, falling back to ``manifest`` when it doesn't exist yet;
+        otherwise the scheduler starts with no history.
+        """
+        options = dict(cooldown_days=self.topic_cooldown, template_cooldown=self.template_cooldown,
+                       weights=self.topic_weights, seasonal=SEASONAL_BOOSTS,
+                       template_weights=self.templates.weights)
+        if state_path is None:
+            return TopicScheduler(self.topics, self.templates.names, **options)
+        return TopicScheduler.load(self.topics, self.templates.names, state_path, manifest, **options)
+
+    def plan_post(self, when, ordinal=0, exclude_topics=(), scheduler=None):
+        """Pick topic, template and render seed for a post
+
+        Randomness comes only from the post date and its ordinal within that
+        day, so the same date and scheduler history reproduce the same post.
+        Nothing is recorded in ``scheduler``; callers record the posts they keep.
+        """
+        rng = random.Random(f"{when:%Y-%m-%d}#{ordinal}")
+        scheduler = scheduler or self.make_scheduler()
+        topic, template = scheduler.pick(when, rng, exclude_topics)
+        return PostSpec(when, topic, template, rng.getrandbits(64))
+
+    def plan_backfill(self, start, end, count=None):
+        """Plan ``count`` posts spread evenly over the days from start to end
+
+        Without a count, one post is planned per day. Posts sharing a day get
+        distinct topics so their filenames never collide. Each backfill gets
+        a scheduler of its own starting from no history, so rerunning the
+        same range reproduces the same posts.
+        """
+        days = (end - start).days + 1
+        if days < 1:
+            raise ValueError("Backfill end date is before start date")
+        count = days if count is None else count
+        per_day = [0] * days
+        for i in range(count):
+            per_day[i * days // count] += 1
+        if max(per_day) > len(self.topics):
+            raise ValueError(f"At most {len(self.topics)} posts per day are possible without repeating a filename")
+
+        specs = []
+        scheduler = self.make_scheduler()
+        for offset, posts in enumerate(per_day):
+            day = start + timedelta(days=offset)
+            used = set()
+            for ordinal in range(posts):
+                when = day + timedelta(hours=10) + ordinal * timedelta(hours=14) / posts
+                spec = self.plan_post(when, ordinal, used, scheduler)
+                scheduler.record(spec.topic, spec.template, when)
+                used.add(spec.topic)
+                specs.append(spec)
+        return specs
+
+    def post_filename(self, spec):
+        """Filename a planned post is written to, known before rendering"""
+        return f"{spec.when.strftime('%Y-%m-%d')}-{spec.topic.lower().replace(' ', '-').replace(':', '')}.md"
+
+    def render_post(self, spec):
+        """Render a planned post; returns (filename, full file content)"""
+        topic = spec.topic
+        content = self.templates.render(spec.template, topic, self.author_bio,
+                                        random.Random(spec.seed), spec.news)
 
-## Recommendations for Similar Organizations
-
-### Getting Started
-
-1. **Conduct Thorough Assessment**: Understand current state and requirements
-2. **Secure Executive Buy-In**: Ensure leadership commitment and support
-3. **Plan Comprehensively**: Develop detailed implementation roadmap
-4. **Start Small**: Begin with pilot implementation
-5. **Focus on Change Management**: Invest in user adoption
-
-### Implementation Best Practices
-
-- Prioritize user experience and operational impact
-- Maintain regular communication with all stakeholders
-- Establish clear success metrics and monitoring
-- Plan for ongoing optimization and improvement
-- Build strong vendor relationships
-
-## Conclusion
-
-This case study demonstrates that successful {topic.lower()} implementation requires more than just technology deployment. It demands strategic planning, strong execution, and ongoing commitment to continuous improvement.
-
-The organization achieved its security objectives while delivering measurable business value. Key to their success was a comprehensive approach that addressed not only technical requirements but also organizational change management and stakeholder engagement.
-
-As cybersecurity threats continue to evolve, this implementation provides a strong foundation for future security enhancements and business growth.
-
----
-
-*About the Author: {self.author_bio}*
-        """.strip()
-        
-        return content
-
-    def create_blog_post(self):
-        """Create a new blog post"""
-        topic = random.choice(self.topics)
-        current_news = self.get_cybersecurity_news()
-        
-        # Generate content
-        content = self.generate_blog_content(topic)
-        
         # Create filename
-        today = datetime.now()
-        filename = f"{today.strftime('%Y-%m-%d')}-{topic.lower().replace(' ', '-').replace(':', '')}.md"
-        
+        filename = self.post_filename(spec)
+
         # Create frontmatter
         frontmatter = f"""---
 layout: post
 title: "{topic}"
-date: {today.strftime('%Y-%m-%d %H:%M:%S')} +0000
+date: {spec.when.strftime('%Y-%m-%d %H:%M:%S')} +0000
 categories: cybersecurity
 tags: [cybersecurity, security, technology, {topic.lower().replace(' ', '-')}]
 author: Adam Rivers
@@ -709,71 +210,276 @@ excerpt: "Latest insights on {topic.lower()} and its implications for modern cyb
 ---
 
 """
-        
-        # Create full post content
-        full_content = frontmatter + content
-        
+        return filename, frontmatter + content
+
+    def create_blog_post(self, when=None, posts_dir=POSTS_DIR, manifest=None, scheduler=None,
+                         duplicates=None, attempts=5):
+        """Create a new blog post, recording it in ``manifest`` and ``scheduler`` if given
+
+        With a ``duplicates`` index, a post too similar to an earlier one is
+        replanned with a different topic, up to ``attempts`` times.
+        """
+        when = when or datetime.now()
+        rejected = []
+        for attempt in range(attempts):
+            with metrics.phase("schedule"):
+                spec = self.plan_post(when, attempt, rejected, scheduler)
+            with metrics.phase("news"):
+                current_news = self.get_cybersecurity_news(spec.topic)
+            spec = spec._replace(news=tuple(current_news))
+
+            # Generate content
+            with metrics.phase("render"):
+                filename, full_content = self.render_post(spec)
+
+            if duplicates is None:
+                break
+            with metrics.phase("dedup"):
+                from blogtools.dedup import signature
+
+                post_signature = signature(full_content)
+                match = duplicates.find_duplicate(post_signature, exclude=filename)
+            if match is None:
+                break
+            print(f"Rejected {filename}: {match[1]:.0%} similar to {match[0]}")
+            metrics.count("posts_rejected")
+            rejected.append(spec.topic)
+        else:
+            from blogtools.dedup import DuplicatePostError
+
+            raise DuplicatePostError(f"No post for {when:%Y-%m-%d} passed the duplicate check "
+                                     f"after {attempts} attempts")
+
+        # Warn about, but still publish, posts that read badly
+        with metrics.phase("quality"):
+            from blogtools.readability import check_post
+
+            for problem in check_post(full_content):
+                print(f"Quality warning for {filename}: {problem}")
+                metrics.count("quality_warnings")
+
         # Ensure _posts directory exists
-        posts_dir = Path("_posts")
+        posts_dir = Path(posts_dir)
         posts_dir.mkdir(exist_ok=True)
-        
-        # Write the blog post
+
+        # Write the blog post; the same bytes are hashed for the manifest
         post_path = posts_dir / filename
-        with open(post_path, 'w', encoding='utf-8') as f:
-            f.write(full_content)
-        
+        data = full_content.encode('utf-8')
+        with metrics.phase("write"), PostWriter(posts_dir) as writer:
+            if writer.write(filename, data):
+                metrics.count("bytes_written", len(data))
+                metrics.count("posts_written")
+        sha = content_hash(data)
+        # Only the accepted attempt counts; rejected topics don't go on cooldown
+        if scheduler is not None:
+            scheduler.record(spec.topic, spec.template, when)
+        if manifest is not None:
+            with metrics.phase("manifest"):
+                manifest.record([(post_path, spec.topic, spec.template, sha)])
+        if duplicates is not None:
+            with metrics.phase("dedup"):
+                duplicates.add(filename, sha, post_signature)
+
         print(f"Created blog post: {filename}")
         return post_path
 
-    def commit_and_push(self, post_path):
-        """Commit and push the new blog post to GitHub"""
-        try:
-            # Configure git (in case it's not configured)
-            subprocess.run(['git', 'config', 'user.name', 'Blog Generator'], check=True)
-            subprocess.run(['git', 'config', 'user.email', 'blog@adamrivers.com'], check=True)
-            
-            # Add the new post
-            subprocess.run(['git', 'add', str(post_path)], check=True)
-            
-            # Commit the changes
-            commit_message = f"Add new blog post: {post_path.stem}"
-            subprocess.run(['git', 'commit', '-m', commit_message], check=True)
-            
-            # Push to remote
-            subprocess.run(['git', 'push'], check=True)
-            
-            print(f"Successfully committed and pushed {post_path}")
-            
-        except subprocess.CalledProcessError as e:
-            print(f"Git operation failed: {e}")
-        except Exception as e:
-            print(f"Error in git operations: {e}")
+    def queue_for_publishing(self, *post_paths):
+        """Add the given blog posts to the publish queue
+
+        Nothing touches git or the network here; the queue is drained by
+        ``python -m blogtools.publish_queue`` (or the server's worker).
+        """
+        from blogtools.publish_queue import PublishQueue
+
+        with metrics.phase("publish"), PublishQueue() as queue:
+            queue.add(*post_paths)
+            print(f"Queued {len(post_paths)} post(s) for publishing ({len(queue)} waiting)")
+
+# Per-process state for backfill workers, set once by _init_backfill_worker
+_worker_generator = None
+_worker_posts_dir = None
+
+
+def _init_backfill_worker(generator, posts_dir):
+    global _worker_generator, _worker_posts_dir
+    _worker_generator = generator
+    _worker_posts_dir = posts_dir
+
+
+def _write_backfill_posts(specs):
+    """Render and write a chunk of posts as one PostWriter batch"""
+    results = []
+    with PostWriter(_worker_posts_dir) as writer:
+        for spec in specs:
+            filename, full_content = _worker_generator.render_post(spec)
+            data = full_content.encode('utf-8')
+            changed = writer.write(filename, data)
+            results.append(((_worker_posts_dir / filename, spec.topic, spec.template, content_hash(data)),
+                            len(data), changed))
+    return results
+
+
+def backfill(generator, start, end, count=None, posts_dir=POSTS_DIR, jobs=None,
+             manifest=None, cache=None):
+    """Render and write a date range of posts across a process pool
+
+    Planning happens up front in this process so the output is identical
+    regardless of how the work is split between workers. Posts whose
+    render key maps, in ``cache``, to the hash ``manifest`` holds for the
+    file on disk are skipped without rendering; files that would come out
+    byte-identical are never rewritten. Each worker writes its posts in
+    batches of up to WRITE_BATCH, renamed into place atomically with one
+    directory fsync per batch.
+
+    Returns (written, unchanged): ``written`` holds (post_path, topic,
+    template, sha256) for every file that changed, ready to be passed to
+    PostManifest.record, and ``unchanged`` counts the posts left alone.
+    """
+    with metrics.phase("plan"):
+        specs = generator.plan_backfill(start, end, count)
+    posts_dir = Path(posts_dir)
+    posts_dir.mkdir(exist_ok=True)
+
+    with metrics.phase("render_cache"):
+        keys = {spec: render_key(generator.version, spec) for spec in specs}
+        cached = cache.get_many(keys.values()) if cache is not None else {}
+        on_disk = manifest.hashes() if manifest is not None and cached else {}
+        todo = [spec for spec in specs
+                if cached.get(keys[spec]) is None
+                or cached[keys[spec]] != on_disk.get(generator.post_filename(spec))]
+
+    with metrics.phase("render_write"):
+        if jobs == 1 or len(todo) < 64:
+            _init_backfill_worker(generator, posts_dir)
+            chunks = [todo[i:i + WRITE_BATCH] for i in range(0, len(todo), WRITE_BATCH)]
+            results = [result for chunk in chunks for result in _write_backfill_posts(chunk)]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            jobs = jobs or os.cpu_count() or 1
+            size = min(WRITE_BATCH, max(1, len(todo) // (jobs * 4)))
+            chunks = [todo[i:i + size] for i in range(0, len(todo), size)]
+            with ProcessPoolExecutor(jobs, initializer=_init_backfill_worker,
+                                     initargs=(generator, posts_dir)) as pool:
+                results = [result for chunk in pool.map(_write_backfill_posts, chunks) for result in chunk]
+        written = [entry for entry, _, changed in results if changed]
+        metrics.count("bytes_written", sum(size for _, size, changed in results if changed))
+        metrics.count("posts_written", len(written))
+
+    if cache is not None:
+        with metrics.phase("render_cache"):
+            cache.put_many((keys[spec], entry[3]) for spec, (entry, _, _) in zip(todo, results))
+    return written, len(specs) - len(written)
+
 
-def main():
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate cybersecurity blog posts")
+    parser.add_argument('--backfill', nargs=2, metavar=('START', 'END'), type=_parse_date,
+                        help="generate posts for every day from START to END (inclusive)")
+    parser.add_argument('--count', type=int,
+                        help="with --backfill, spread exactly COUNT posts over the range")
+    parser.add_argument('--jobs', type=int,
+                        help="worker processes for --backfill (default: CPU count)")
+    parser.add_argument('--no-publish', dest='publish', action='store_false',
+                        help="write posts without queuing them for publishing")
+    parser.add_argument('--news-feed', dest='news_feeds', action='append', metavar='URL',
+                        help="RSS/Atom feed for the 'In the News' section (repeatable; default: built-in list)")
+    parser.add_argument('--no-news', dest='news_feeds', action='store_const', const=[],
+                        help="don't fetch news headlines")
+    parser.add_argument('--max-similarity', type=float, default=0.95, metavar='RATIO',
+                        help="replan a new post whose estimated similarity to an earlier one reaches "
+                             "RATIO (default: 0.95; above 1 disables the check)")
+    parser.add_argument('--check-today', action='store_true',
+                        help="only report whether today's post exists (exit status 0 if it does)")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="run the rest of the command under -X importtime and report import costs")
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help="write per-phase wall/CPU time, bytes written and subprocess counts as JSON")
+    parser.add_argument('--metrics-prom', metavar='PATH',
+                        help="write the same metrics as a Prometheus textfile")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="write phase spans in Chrome trace viewer format")
+    args = parser.parse_args(argv)
+    if args.count is not None and not args.backfill:
+        parser.error("--count requires --backfill")
+    if args.count is not None and args.count < 1:
+        parser.error("--count must be at least 1")
+    return args
+
+
+def run_backfill(generator, manifest, args):
+    start, end = args.backfill
+    began = time.perf_counter()
+    try:
+        with RenderCache() as cache:
+            written, unchanged = backfill(generator, start, end, args.count, jobs=args.jobs,
+                                          manifest=manifest, cache=cache)
+    except ValueError as e:
+        print(f"Error planning backfill: {e}")
+        sys.exit(1)
+    with metrics.phase("manifest"):
+        manifest.record(written)
+    with metrics.phase("schedule"):
+        scheduler = generator.make_scheduler(manifest, SCHEDULER_STATE)
+        for post_path, topic, template, _ in written:
+            day = datetime.strptime(split_filename(Path(post_path).name)[0], '%Y-%m-%d')
+            scheduler.record(topic, template, day)
+        scheduler.save(SCHEDULER_STATE)
+    elapsed = time.perf_counter() - began
+    print(f"Backfilled {len(written)} posts from {start:%Y-%m-%d} to {end:%Y-%m-%d} "
+          f"({unchanged} unchanged) in {elapsed:.2f}s")
+
+    if written and args.publish and Path(".git").exists():
+        generator.queue_for_publishing(*(post_path for post_path, *_ in written))
+
+
+def main(argv=None):
     """Main function to generate blog content"""
-    print("Starting cybersecurity blog content generation...")
-    
-    generator = CybersecurityBlogGenerator()
-    
-    # Check if a post was already created today
-    today = datetime.now().strftime('%Y-%m-%d')
-    posts_dir = Path("_posts")
-    
-    if posts_dir.exists():
-        today_posts = list(posts_dir.glob(f"{today}-*.md"))
-        if today_posts:
-            print(f"Blog post already exists for today: {today_posts[0].name}")
-            return
-    
-    # Generate new blog post
+    args = parse_args(argv)
+    if args.startup_profile:
+        from blogtools.startup import profile_startup
+
+        argv = sys.argv[1:] if argv is None else argv
+        sys.exit(profile_startup(__file__, [a for a in argv if a != '--startup-profile']))
+
+    if args.metrics_json or args.metrics_prom or args.trace:
+        metrics.enable(trace=bool(args.trace))
     try:
-        post_path = generator.create_blog_post()
+        run(args)
+    finally:
+        metrics.write_reports(args.metrics_json, args.metrics_prom, args.trace)
+
+
+def run_daily(generator, manifest, args, when):
+    """Generate, record and queue the post for ``when``"""
+    try:
+        with metrics.phase("schedule"):
+            scheduler = generator.make_scheduler(manifest, SCHEDULER_STATE)
+        duplicates = None
+        if args.max_similarity <= 1:
+            from blogtools.dedup import DuplicateIndex
+
+            with metrics.phase("dedup"):
+                duplicates = DuplicateIndex(threshold=args.max_similarity)
+                duplicates.sync(manifest, POSTS_DIR)
+        post_path = generator.create_blog_post(when, manifest=manifest, scheduler=scheduler,
+                                               duplicates=duplicates)
+        scheduler.save(SCHEDULER_STATE)
         
-        # Commit and push if we're in a git repository
-        if Path(".git").exists():
-            generator.commit_and_push(post_path)
+        # Queue for the publisher if we're in a git repository
+        if not args.publish:
+            print("Publishing disabled, not queuing the post")
+        elif Path(".git").exists():
+            generator.queue_for_publishing(post_path)
         else:
-            print("Not in a git repository, skipping commit/push")
+            print("Not in a git repository, not queuing the post")
             
     except Exception as e:
         print(f"Error generating blog content: {e}")
@@ -781,5 +487,41 @@ def main():
     
     print("Blog content generation completed successfully!")
 
+
+def run(args):
+    """Generate (or backfill) posts as requested on the command line"""
+    with metrics.phase("manifest"):
+        manifest = PostManifest(POSTS_DIR)
+        manifest.refresh()
+
+    # Check if a post was already created today
+    now = datetime.now()
+    today = now.strftime('%Y-%m-%d')
+    today_post = manifest.post_for_date(today)
+    if args.check_today:
+        print(f"Blog post already exists for today: {today_post}" if today_post
+              else "No blog post exists for today")
+        sys.exit(0 if today_post else 1)
+
+    print("Starting cybersecurity blog content generation...")
+    
+    generator = CybersecurityBlogGenerator(news_feeds=args.news_feeds)
+
+    # Runs writing the same dates take turns; whichever waited sees the
+    # other's posts once it refreshes the manifest
+    if args.backfill:
+        with post_lock(*args.backfill):
+            manifest.refresh()
+            run_backfill(generator, manifest, args)
+        return
+
+    with post_lock(now):
+        manifest.refresh()
+        today_post = manifest.post_for_date(today)
+        if today_post:
+            print(f"Blog post already exists for today: {today_post}")
+            return
+        run_daily(generator, manifest, args, now)
+
 if __name__ == "__main__":
     main()
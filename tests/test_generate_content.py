@@ -0,0 +1,35 @@
+"""Daily post creation against the topic scheduler"""
+
+from datetime import datetime
+
+from generate_content import CybersecurityBlogGenerator
+
+
+class RejectFirst:
+    """Duplicate index that finds the first post it sees too similar"""
+
+    def __init__(self):
+        self.checked = 0
+
+    def find_duplicate(self, sig, exclude=None):
+        self.checked += 1
+        return ("earlier.md", 1.0) if self.checked == 1 else None
+
+    def add(self, name, sha, sig):
+        pass
+
+
+def test_rejected_attempt_is_not_recorded(tmp_path):
+    generator = CybersecurityBlogGenerator(news_feeds=[])
+    scheduler = generator.make_scheduler()
+    when = datetime(2026, 3, 2, 10)
+    rejected = generator.plan_post(when, 0, (), scheduler)
+
+    generator.create_blog_post(when, tmp_path / "_posts", scheduler=scheduler,
+                               duplicates=RejectFirst())
+    history = scheduler.to_dict()
+    # Only the accepted post is on cooldown and counts as a recent template
+    assert list(history["topics"]) != [rejected.topic]
+    assert len(history["topics"]) == 1
+    assert len(history["recent_templates"]) == 1
+    assert scheduler.last_used(rejected.topic) is None
@@ -0,0 +1,95 @@
+"""Link checker against a local stand-in server"""
+
+import asyncio
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from blogtools.linkcheck import check_urls
+
+pytest.importorskip("aiohttp")
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _answer(self, head):
+        self.server.requests.append((self.command, self.path))
+        if self.path == "/no-head" and head:
+            status = 405
+        elif self.path == "/missing":
+            status = 404
+        else:
+            status = 200
+        if self.path.startswith("/slow"):
+            with self.server.lock:
+                self.server.active += 1
+                self.server.peak = max(self.server.peak, self.server.active)
+            time.sleep(0.1)
+            with self.server.lock:
+                self.server.active -= 1
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._answer(head=True)
+
+    def do_GET(self):
+        self._answer(head=False)
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests, server.lock, server.active, server.peak = [], threading.Lock(), 0, 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def check(urls, **options):
+    return {result[0]: result[1:] for result in asyncio.run(check_urls(urls, **options))}
+
+
+def test_head_refused_falls_back_to_get(server):
+    results = check([url(server, "/no-head")])
+    assert results[url(server, "/no-head")] == (200, None)
+    assert server.requests == [("HEAD", "/no-head"), ("GET", "/no-head")]
+
+
+def test_working_link_needs_only_head(server):
+    assert check([url(server, "/ok")])[url(server, "/ok")] == (200, None)
+    assert server.requests == [("HEAD", "/ok")]
+
+
+def test_missing_page(server):
+    assert check([url(server, "/missing")])[url(server, "/missing")] == (404, None)
+
+
+def test_connection_refused():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # Nothing listens on the port once the socket is closed
+    status, error = check([f"http://127.0.0.1:{port}/"])[f"http://127.0.0.1:{port}/"]
+    assert status is None
+    assert error
+
+
+def test_per_host_limit(server):
+    urls = [url(server, f"/slow/{i}") for i in range(12)]
+    results = check(urls, concurrency=12, per_host=3)
+    assert all(result == (200, None) for result in results.values())
+    assert len(results) == 12
+    assert server.peak == 3
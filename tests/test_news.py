@@ -0,0 +1,98 @@
+"""News fetcher against a local feed server, and hostile headlines in posts"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from blogtools import news
+from blogtools.news import NewsFetcher
+from blogtools.templates import _news_section
+
+pytest.importorskip("requests")
+pytest.importorskip("feedparser")
+
+ETAG = '"v1"'
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Local feed</title>
+<item>
+  <title>&lt;img src=x onerror=alert(1)&gt; Breach disclosed</title>
+  <link>javascript:alert(1)</link>
+  <pubDate>Mon, 02 Mar 2026 10:00:00 GMT</pubDate>
+</item>
+<item>
+  <title>Patch now)](javascript:alert(1)) {{ site.title }}</title>
+  <link>https://example.com/advisory?id=1 "x")</link>
+  <pubDate>Sun, 01 Mar 2026 10:00:00 GMT</pubDate>
+</item>
+</channel></rss>
+"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(FEED)))
+        self.end_headers()
+        self.wfile.write(FEED)
+
+
+@pytest.fixture
+def feed(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetcher(feed, tmp_path, **options):
+    url = f"http://127.0.0.1:{feed.server_address[1]}/feed.xml"
+    return NewsFetcher([url], cache_path=tmp_path / "news_cache.json", **options)
+
+
+def test_unchanged_feed_is_revalidated_with_etag(feed, tmp_path):
+    first = fetcher(feed, tmp_path, ttl=0).fetch()
+    again = fetcher(feed, tmp_path, ttl=0).fetch()
+    assert feed.requests == [None, ETAG]
+    assert [item.title for item in again] == [item.title for item in first]
+    assert len(first) == 2
+
+
+def test_cached_feed_is_not_fetched_until_ttl_expires(feed, tmp_path, monkeypatch):
+    now = 1_800_000_000.0
+    monkeypatch.setattr(news.time, "time", lambda: now)
+    fetcher(feed, tmp_path, ttl=3600).fetch()
+    fetcher(feed, tmp_path, ttl=3600).fetch()
+    assert feed.requests == [None]
+
+    now += 3600
+    assert len(fetcher(feed, tmp_path, ttl=3600).fetch()) == 2
+    assert feed.requests == [None, ETAG]
+
+
+def test_hostile_headlines_are_inert(feed, tmp_path):
+    markdown = pytest.importorskip("markdown")
+    items = fetcher(feed, tmp_path).fetch()
+    section = _news_section({"news": items})
+    page = markdown.markdown(section)
+
+    assert "<img" not in page
+    assert "href=\"javascript" not in page
+    assert "{{" not in section
+    # The unsafe link is dropped, the http(s) one kept but encoded
+    assert page.count("<a ") == 1
+    assert 'href="https://example.com/advisory?id=1%20%22x%22%29"' in page
+    assert "&lt;img src=x onerror=alert(1)&gt; Breach disclosed" in page
@@ -0,0 +1,100 @@
+"""Publish queue against a local bare repository that can be made to reject pushes"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from blogtools.publish import GitPublisher
+from blogtools.publish_queue import PublishQueue
+
+IDENTITY = ["-c", "user.name=Test", "-c", "user.email=test@example.com"]
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *IDENTITY, *args], cwd=cwd, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def reject_pushes(remote, reject=True):
+    hook = remote / "hooks" / "pre-receive"
+    if reject:
+        hook.write_text("#!/bin/sh\nexit 1\n")
+        hook.chmod(0o755)
+    else:
+        hook.unlink()
+
+
+@pytest.fixture
+def remote(tmp_path):
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", "-b", "main", str(remote))
+    seed = tmp_path / "seed"
+    git(tmp_path, "clone", "-q", str(remote), str(seed))
+    (seed / "README.md").write_text("init\n")
+    git(seed, "add", "README.md")
+    git(seed, "commit", "-q", "-m", "init")
+    git(seed, "push", "-q", "origin", "HEAD:main")
+    return remote
+
+
+def clone(remote, path):
+    git(path.parent, "clone", "-q", str(remote), str(path))
+    return path
+
+
+def remote_files(remote):
+    return git(remote, "ls-tree", "-r", "--name-only", "main").split()
+
+
+def test_publishes_queued_post(remote, tmp_path):
+    work = clone(remote, tmp_path / "work")
+    post = work / "_posts" / "2026-01-01-post.md"
+    post.parent.mkdir()
+    post.write_text("hello\n")
+    with PublishQueue(work / ".blog" / "queue.sqlite3", work) as queue:
+        queue.add(post)
+        assert queue.publish_once(GitPublisher(work))
+        assert len(queue) == 0
+    assert "_posts/2026-01-01-post.md" in remote_files(remote)
+
+
+def test_failed_push_keeps_post_queued(remote, tmp_path):
+    work = clone(remote, tmp_path / "work")
+    post = work / "_posts" / "2026-01-01-post.md"
+    post.parent.mkdir()
+    post.write_text("hello\n")
+    reject_pushes(remote)
+    with PublishQueue(work / ".blog" / "queue.sqlite3", work) as queue:
+        queue.add(post)
+        with pytest.raises(subprocess.CalledProcessError):
+            queue.publish_once(GitPublisher(work))
+        assert queue.pending() == ["_posts/2026-01-01-post.md"]
+        assert queue.attempts == 1
+        reject_pushes(remote, False)
+        queue.publish_once(GitPublisher(work))
+        assert len(queue) == 0
+    assert "_posts/2026-01-01-post.md" in remote_files(remote)
+
+
+def test_commit_from_another_checkout_is_made_again(remote, tmp_path):
+    # Run N commits the post but its push is rejected
+    first = clone(remote, tmp_path / "first")
+    post = first / "_posts" / "2026-01-01-post.md"
+    post.parent.mkdir()
+    post.write_text("hello\n")
+    reject_pushes(remote)
+    with PublishQueue(first / ".blog" / "queue.sqlite3", first) as queue:
+        queue.add(post)
+        with pytest.raises(subprocess.CalledProcessError):
+            queue.publish_once(GitPublisher(first))
+    reject_pushes(remote, False)
+
+    # Run N+1 starts from a fresh checkout with the cached .blog/ restored
+    second = clone(remote, tmp_path / "second")
+    shutil.copytree(first / ".blog", second / ".blog")
+    with PublishQueue(second / ".blog" / "queue.sqlite3", second) as queue:
+        assert queue.publish_once(GitPublisher(second))
+        assert len(queue) == 0
+    assert "_posts/2026-01-01-post.md" in remote_files(remote)
+    assert git(remote, "show", "main:_posts/2026-01-01-post.md") == "hello\n"
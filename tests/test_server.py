@@ -0,0 +1,45 @@
+"""Generator service previews against a scheduler with live cooldowns"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from blogtools.server import GeneratorService, RequestError
+from generate_content import CybersecurityBlogGenerator
+
+START = datetime(2026, 3, 1, 10)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    generator = CybersecurityBlogGenerator(news_feeds=[])
+    service = GeneratorService(generator, tmp_path / "_posts", max_similarity=2)
+    for offset in range(10):
+        when = START + timedelta(days=offset)
+        topic, template = service.scheduler.pick(when, random.Random(offset))
+        service.scheduler.record(topic, template, when)
+    return service
+
+
+def cooling(service):
+    return {topic for topic in service.generator.topics if service.scheduler.last_used(topic)}
+
+
+def test_future_preview_leaves_cooldowns_alone(service):
+    resting = cooling(service)
+    before = service.scheduler.to_dict()
+    service.preview(date="2030-01-01")
+    assert service.scheduler.to_dict() == before
+
+    when = START + timedelta(days=10)
+    for seed in range(100):
+        topic, _ = service.scheduler.pick(when, random.Random(seed))
+        assert topic not in resting
+
+
+def test_preview_rejects_unknown_template(service):
+    with pytest.raises(RequestError) as error:
+        service.preview(template="nope")
+    assert error.value.status == 400